@@ -0,0 +1,351 @@
+"""
+Compile throughput of the dispatch-table DuckDbCompiler against the closure based
+compiler it replaced.
+
+    python -m benchmarks.compile_throughput --iterations 20000
+"""
+import argparse
+import json
+import time
+from src.datachain.query.compilers.duckdb import DuckDbCompiler, render_literal
+from src.datachain.query.models import (
+    SQLQuery,
+    SelectItem,
+    QueryColumn,
+    TimeGrainedQueryColumn,
+    SQLMeasure,
+    BinaryMetric,
+    WindowSpec,
+    SQLChangeWindow,
+    SQLMovingAverageWindow,
+    Comparison,
+    And,
+    Or,
+    Not,
+    ColumnComparison,
+    Join,
+    GroupBy,
+    OrderBy,
+    HavingComparison,
+    Aggregation,
+    Arithmetic,
+    Sorting,
+)
+
+
+def legacy_compile(query: SQLQuery, params: list | None = None) -> str:
+    """The closure based compiler the dispatch compiler replaced, kept verbatim as the baseline"""
+    def render_identifier(table: str, column: str) -> str:
+        return f"{table}.{column}"
+
+    def render_metric(expr) -> str:
+        if isinstance(expr, QueryColumn):
+            return render_identifier(expr.table, expr.name)
+        if isinstance(expr, TimeGrainedQueryColumn):
+            # Use date_trunc style for time grain where appropriate
+            return f"{expr.time_grain}({render_identifier(expr.table, expr.name)})"
+        if isinstance(expr, SQLMeasure):
+            agg = expr.aggregation.value if hasattr(expr.aggregation, 'value') else str(expr.aggregation)
+            return f"{agg}({render_identifier(expr.table, expr.column)})"
+        if isinstance(expr, BinaryMetric):
+            left = render_metric(expr.left)
+            op = expr.arithmetic.value
+            right = render_metric(expr.right)
+            return f"({left} {op} {right})"
+        if isinstance(expr, WindowSpec):
+            field = expr.field
+            partition = ''
+            order = ''
+            if expr.partition_by:
+                parts = [render_metric(p) for p in expr.partition_by]
+                partition = 'PARTITION BY ' + ', '.join(parts)
+            if expr.order_by:
+                parts = []
+                for o in expr.order_by:
+                    if isinstance(o, OrderBy):
+                        parts.append(f"{render_metric(o.column)} {o.sorting.value}")
+                    else:
+                        parts.append(render_metric(o))
+                order = 'ORDER BY ' + ', '.join(parts)
+
+            over = ' '.join([s for s in (partition, order) if s])
+
+            # Support simple change and moving average windows
+            w = expr.window
+            if isinstance(w, SQLChangeWindow):
+                # ABSOLUTE: field - lag(field, period)
+                # PERCENTAGE: (field - lag(field, period)) / NULLIF(lag(field, period),0) * 100
+                lag = f"LAG({field}, {w.period}) OVER ({over})"
+                if w.mode == 'ABSOLUTE':
+                    return f"({field} - {lag})"
+                return f"(({field} - {lag}) / NULLIF({lag},0) * 100)"
+            if isinstance(w, SQLMovingAverageWindow):
+                # Simple moving average using window frame of preceding (period-1) rows
+                return f"AVG({field}) OVER ({over} ROWS BETWEEN {w.period-1} PRECEDING AND CURRENT ROW)"
+
+            return f"{field} OVER ({over})"
+
+        # Fallback
+        return str(expr)
+
+    def render_value(v):
+        if isinstance(v, list):
+            items = ', '.join(render_value(x) for x in v)
+            return f"({items})"
+        if params is not None:
+            params.append(v)
+            return f"${len(params)}"
+        return render_literal(v)
+
+    def render_pred(pred) -> str:
+        if pred is None:
+            return ''
+        if isinstance(pred, Comparison):
+            comp = pred.comparator.value if hasattr(pred.comparator, 'value') else str(pred.comparator)
+            if comp in ('IS NULL', 'IS NOT NULL'):
+                return f"{render_identifier(pred.table, pred.column)} {comp}"
+            if comp in ('IN', 'NOT IN'):
+                return f"{render_identifier(pred.table, pred.column)} {comp} {render_value(pred.value)}"
+            return f"{render_identifier(pred.table, pred.column)} {comp} {render_value(pred.value)}"
+        if isinstance(pred, ColumnComparison):
+            comp = pred.comparator.value if hasattr(pred.comparator, 'value') else str(pred.comparator)
+            return f"{pred.left} {comp} {pred.right}"
+        if isinstance(pred, And):
+            parts = [render_pred(p) for p in pred.predicates]
+            return '(' + ' AND '.join(parts) + ')'
+        if isinstance(pred, Or):
+            parts = [render_pred(p) for p in pred.predicates]
+            return '(' + ' OR '.join(parts) + ')'
+        if isinstance(pred, Not):
+            return f"NOT ({render_pred(pred.predicate)})"
+
+        return str(pred)
+
+    def render_join(j: Join) -> str:
+        conditions = []
+        for l, r in zip(j.left_keys, j.right_keys):
+            conditions.append(f"{j.left_table}.{l} = {j.right_table}.{r}")
+        on = ' AND '.join(conditions)
+        return f"LEFT JOIN {j.right_table} ON {on}"
+
+    def render_group_by(group_by: list[GroupBy]) -> str:
+        if not group_by:
+            return ''
+        parts = []
+        for g in group_by:
+            if isinstance(g.column, TimeGrainedQueryColumn):
+                parts.append(render_metric(g.column))
+            else:
+                parts.append(render_identifier(g.table, g.column.name if hasattr(g.column, 'name') else g.column))
+        return 'GROUP BY ' + ', '.join(parts)
+
+    def render_order_by(order_by: list[OrderBy]) -> str:
+        if not order_by:
+            return ''
+        parts = []
+        for o in order_by:
+            col = o.column
+            if isinstance(col, (QueryColumn, TimeGrainedQueryColumn, SQLMeasure, BinaryMetric, WindowSpec)):
+                parts.append(f"{render_metric(col)} {o.sorting.value}")
+            else:
+                parts.append(f"{col} {o.sorting.value}")
+        return 'ORDER BY ' + ', '.join(parts)
+
+    def render_select_columns(cols: list[SelectItem]) -> str:
+        parts = []
+        for c in cols:
+            expr = c.expression
+            sql = render_metric(expr)
+            if c.alias:
+                parts.append(f"{sql} AS {c.alias}")
+            else:
+                parts.append(sql)
+        return ', '.join(parts)
+
+    # Internal compile that can produce either a subquery body or full WITH-wrapped query
+    def _compile(q: SQLQuery, as_subquery: bool = False) -> str:
+        select_clause = 'SELECT ' + (render_select_columns(q.columns) if q.columns else '*')
+        # FROM
+        if isinstance(q.from_, SQLQuery):
+            # compile inner as subquery for CTE
+            inner = _compile(q.from_, as_subquery=True)
+            from_clause = f"FROM ({inner}) AS cte"
+        else:
+            from_clause = f"FROM {q.from_}"
+
+        join_clause = ''
+        if q.joins:
+            join_clause = ' ' + ' '.join(render_join(j) for j in q.joins)
+
+        where_clause = ''
+        if q.filters:
+            where_clause = 'WHERE ' + render_pred(q.filters)
+
+        group_clause = render_group_by(q.group_by) if getattr(q, 'group_by', None) else ''
+
+        having_clause = ''
+        if q.having:
+            if isinstance(q.having, HavingComparison):
+                having_clause = 'HAVING ' + f"{render_metric(q.having.metric)} {q.having.comparator.value} {render_value(q.having.value)}"
+            else:
+                having_clause = 'HAVING ' + render_pred(q.having)
+
+        order_clause = render_order_by(q.order_by) if getattr(q, 'order_by', None) else ''
+
+        limit_clause = f"LIMIT {q.limit}" if getattr(q, 'limit', None) is not None else ''
+        offset_clause = f"OFFSET {q.offset}" if getattr(q, 'offset', None) is not None else ''
+
+        parts = [select_clause, from_clause]
+        if join_clause:
+            parts.append(join_clause)
+        if where_clause:
+            parts.append(where_clause)
+        if group_clause:
+            parts.append(group_clause)
+        if having_clause:
+            parts.append(having_clause)
+        if order_clause:
+            parts.append(order_clause)
+        if limit_clause:
+            parts.append(limit_clause)
+        if offset_clause:
+            parts.append(offset_clause)
+
+        body = '\n'.join(parts)
+        return body
+
+    # If top-level from_ is SQLQuery we should render as CTE
+    if isinstance(query.from_, SQLQuery):
+        inner = _compile(query.from_, as_subquery=True)
+        outer_select = 'SELECT ' + (render_select_columns(query.columns) if query.columns else '*')
+        outer_from = 'FROM cte'
+        outer_order = render_order_by(query.order_by) if getattr(query, 'order_by', None) else ''
+        outer_limit = f"LIMIT {query.limit}" if getattr(query, 'limit', None) is not None else ''
+
+        body_parts = [f"WITH cte AS (", inner, ")", outer_select, outer_from]
+        if outer_order:
+            body_parts.append(outer_order)
+        if outer_limit:
+            body_parts.append(outer_limit)
+
+        return '\n'.join(body_parts)
+
+    return _compile(query)
+
+
+def workload() -> list[SQLQuery]:
+    """Queries shaped like the planner's output: joins, filters, repeated measures and windows"""
+    revenue = SQLMeasure(table="Sales", column="revenue", aggregation=Aggregation.SUM)
+    cost = SQLMeasure(table="Sales", column="cost", aggregation=Aggregation.SUM)
+    margin = BinaryMetric(left=BinaryMetric(left=revenue, arithmetic=Arithmetic.SUB, right=cost), arithmetic=Arithmetic.DIV, right=revenue)
+    month = TimeGrainedQueryColumn(time_grain="MONTH", table="Sales", name="order_date")
+    region = QueryColumn(table="Customer", name="region")
+    join = Join(left_table="Sales", right_table="Customer", left_keys=["customer_id"], right_keys=["customer_id"])
+    filters = And(predicates=[
+        Comparison(table="Customer", column="region", comparator="IN", value=["North", "South", "East"]),
+        Or(predicates=[
+            Comparison(table="Sales", column="channel", comparator="=", value="web"),
+            Not(predicate=Comparison(table="Sales", column="discount", comparator="IS NULL")),
+        ]),
+        ColumnComparison(left="Sales.revenue", comparator=">", right="Sales.cost"),
+    ])
+
+    grouped = SQLQuery(
+        from_="Sales",
+        columns=[
+            SelectItem(alias="region", expression=region),
+            SelectItem(alias="month", expression=month),
+            SelectItem(alias="revenue", expression=revenue),
+            SelectItem(alias="margin", expression=margin),
+        ],
+        joins=[join],
+        filters=filters,
+        group_by=[GroupBy(table="Customer", column=region), GroupBy(table="Sales", column=month)],
+        having=HavingComparison(metric=revenue, comparator=">", value=1000),
+        order_by=[OrderBy(column=revenue, sorting=Sorting.DESC), OrderBy(column=margin)],
+        limit=100,
+    )
+    windowed = SQLQuery(
+        from_=grouped,
+        columns=[
+            SelectItem(alias="revenue_change", expression=WindowSpec(
+                field="revenue",
+                partition_by=[QueryColumn(table="cte", name="region")],
+                order_by=[OrderBy(column=QueryColumn(table="cte", name="month"))],
+                window=SQLChangeWindow(period=1, mode="PERCENTAGE"),
+            )),
+            SelectItem(alias="revenue_avg", expression=WindowSpec(
+                field="revenue",
+                order_by=[OrderBy(column=QueryColumn(table="cte", name="month"))],
+                window=SQLMovingAverageWindow(period=3, mode="BEHIND"),
+            )),
+        ],
+        order_by=[OrderBy(column=QueryColumn(table="cte", name="month"))],
+    )
+    simple = SQLQuery(
+        from_="Sales",
+        columns=[SelectItem(alias="revenue", expression=revenue)],
+        filters=Comparison(table="Sales", column="channel", comparator="=", value="store"),
+    )
+    return [grouped, windowed, simple]
+
+
+def same_rows(sql: str, expected_sql: str) -> bool:
+    """Run both queries on a small generated DuckDB database and compare their rows"""
+    import duckdb
+
+    con = duckdb.connect()
+    con.execute("SET threads TO 1")  # the moving average orders by month only, so keep tie order stable
+    con.execute(
+        "CREATE TABLE Customer AS SELECT i AS customer_id, ['North', 'South', 'East', 'West'][i % 4 + 1] AS region "
+        "FROM range(40) t(i)"
+    )
+    con.execute(
+        "CREATE TABLE Sales AS SELECT i % 40 AS customer_id, (i * 37) % 500 + 100 AS revenue, (i * 11) % 300 AS cost, "
+        "DATE '2024-01-01' + INTERVAL (i % 12) MONTH AS order_date, "
+        "CASE WHEN i % 3 = 0 THEN 'web' ELSE 'store' END AS channel, "
+        "CASE WHEN i % 5 = 0 THEN NULL ELSE 0.1 END AS discount "
+        "FROM range(5000) t(i)"
+    )
+    rows = con.execute(sql).fetchall()
+    return len(rows) > 0 and rows == con.execute(expected_sql).fetchall()
+
+
+def _throughput(compile_fn, queries: list[SQLQuery], iterations: int) -> float:
+    start = time.perf_counter()
+    for i in range(iterations):
+        compile_fn(queries[i % len(queries)])
+    return iterations / (time.perf_counter() - start)
+
+
+def run(iterations: int) -> dict:
+    queries = workload()
+    compiler = DuckDbCompiler()
+    for query in queries:
+        if any(isinstance(c.expression, WindowSpec) for c in query.columns):
+            # Window queries declare shared windows once and project each LAG once, so their
+            # SQL differs by design; both compilers must still return identical rows
+            assert same_rows(compiler.compile(query), legacy_compile(query)), "compilers disagree"
+            continue
+        assert compiler.compile(query) == legacy_compile(query), "compilers disagree"
+        assert compiler.compile_parameterized(query).sql == legacy_compile(query, params=[])
+
+    legacy = _throughput(legacy_compile, queries, iterations)
+    dispatch = _throughput(compiler.compile, queries, iterations)
+    return {
+        "iterations": iterations,
+        "legacy_compiles_per_s": round(legacy),
+        "dispatch_compiles_per_s": round(dispatch),
+        "speedup": round(dispatch / legacy, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+    print(json.dumps(run(args.iterations), indent=2))
+
+
+if __name__ == "__main__":
+    main()
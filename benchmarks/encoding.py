@@ -0,0 +1,104 @@
+"""
+Size and speed of the columnar result encoding against pandas' row-oriented JSON.
+
+    python -m benchmarks.encoding --rows 100 1000 10000 100000 --output encoding.json
+
+Results mimic aggregated BI output: a few low-cardinality string dimensions, a month
+column and float/integer metrics. Each encoder is timed from the Arrow table to the final
+JSON string, so the pandas conversion counts against to_json as it would in the tool.
+"""
+import argparse
+import datetime
+import json
+import random
+import statistics
+import time
+from dataclasses import dataclass, asdict
+import pandas as pd
+import pyarrow as pa
+from src.datachain.execution.encoding import encode_result
+from .planning import percentile, environment
+
+
+@dataclass
+class EncodingResult:
+    rows: int
+    encoder: str
+    p50_ms: float
+    p95_ms: float
+    bytes: int
+    approx_tokens: int  # bytes / 4, a rough rule of thumb for JSON
+
+
+def generate_result(rows: int, seed: int = 0) -> pa.Table:
+    rng = random.Random(seed)
+    regions = ["north", "south", "east", "west"]
+    segments = ["AUTOMOBILE", "BUILDING", "FURNITURE", "HOUSEHOLD", "MACHINERY"]
+    months = [datetime.datetime(2020 + i // 12, i % 12 + 1, 1) for i in range(60)]
+    return pa.table({
+        "region": [rng.choice(regions) for _ in range(rows)],
+        "segment": [rng.choice(segments) for _ in range(rows)],
+        "month": pa.array([rng.choice(months) for _ in range(rows)], pa.timestamp("us")),
+        "revenue": [rng.uniform(0, 1e6) for _ in range(rows)],
+        "margin_pct": [rng.uniform(-20, 60) for _ in range(rows)],
+        "orders": [rng.randint(0, 10_000) for _ in range(rows)],
+    })
+
+
+ENCODERS = {
+    "pandas_to_json": lambda table: table.to_pandas().to_json(orient="records", date_format="iso"),
+    "columnar": lambda table: encode_result(table),
+}
+
+
+def benchmark(rows: int, repeats: int, seed: int) -> list[EncodingResult]:
+    table = generate_result(rows, seed)
+    results = []
+    for name, encode in ENCODERS.items():
+        encoded = encode(table)  # warm up
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            encode(table)
+            timings.append((time.perf_counter() - start) * 1000)
+        samples = sorted(timings)
+        size = len(encoded.encode("utf-8"))
+        results.append(EncodingResult(
+            rows=rows,
+            encoder=name,
+            p50_ms=percentile(samples, 50),
+            p95_ms=percentile(samples, 95),
+            bytes=size,
+            approx_tokens=size // 4,
+        ))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", nargs="+", type=int, default=[100, 1000, 10000, 100000])
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the results as JSON to this path")
+    args = parser.parse_args()
+
+    results = []
+    for rows in args.rows:
+        batch = benchmark(rows, args.repeats, args.seed)
+        baseline = batch[0]
+        for result in batch:
+            results.append(result)
+            print(
+                f"{rows:>7} {result.encoder:<15} p50 {result.p50_ms:9.3f}ms  p95 {result.p95_ms:9.3f}ms  "
+                f"{result.bytes:>11,} bytes ({result.bytes / baseline.bytes:6.1%})  "
+                f"speedup {baseline.p50_ms / result.p50_ms:5.2f}x"
+            )
+
+    report = {"environment": environment() | {"pandas": pd.__version__, "pyarrow": pa.__version__}, "results": [asdict(r) for r in results]}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+End-to-end latency, rows scanned and peak memory of BIQueries on generated TPC-H-like data.
+
+    python -m benchmarks.execution --scale-factors 0.01 0.1 1 --runs 20 --output execution.json
+
+Every query of the fixed workload runs through the full pipeline (validate, resolve, plan,
+build the ibis expression, execute on DuckDB) with no result cache. Databases are generated
+once per scale factor into --data-dir and reused by later runs. Rows scanned come from DuckDB's
+query profiler in a separate pass so profiling does not skew the timings. Peak RSS is reset
+before each query where the platform allows it (Linux), otherwise it is the process peak so far.
+"""
+import argparse
+import json
+import os
+import resource
+import statistics
+import sys
+import time
+from dataclasses import dataclass, asdict
+import duckdb
+import ibis
+from src.datachain.biquery import BIQuery
+from src.datachain.data_connection import DataConnection
+from src.datachain.execution import QueryExecutor
+from .planning import percentile, environment
+from .tpch import WORKLOAD, build_model, generate
+
+
+@dataclass
+class QueryResult:
+    scale_factor: float
+    query: str
+    runs: int
+    rows: int
+    mean_ms: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    rows_scanned: int | None
+    peak_rss_mb: float
+
+
+def reset_peak_rss() -> bool:
+    """Reset the process' peak resident set size, True if the platform supports it"""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def rows_scanned(con: duckdb.DuckDBPyConnection, run) -> int | None:
+    """Rows read from base tables by the last statement `run` executes, from DuckDB's profiler"""
+    con.execute("SET enable_profiling = 'no_output'")
+    try:
+        run()
+        profile = json.loads(con.get_profiling_information(format="json"))
+    finally:
+        con.execute("PRAGMA disable_profiling")
+    return profile.get("cumulative_rows_scanned")
+
+
+def database_path(data_dir: str, scale_factor: float) -> str:
+    return os.path.join(data_dir, f"tpch_sf{scale_factor:g}.duckdb")
+
+
+def benchmark(path: str, scale_factor: float, workload: dict[str, BIQuery], runs: int, warmup: int) -> list[QueryResult]:
+    connection = DataConnection(ibis.duckdb.connect(path, read_only=True))
+    builder = build_model(connection)
+    executor = QueryExecutor(builder.data_model, builder.semantic_model, connection)
+
+    def run(biquery: BIQuery):
+        result = executor.execute(biquery)
+        if not result.success:
+            raise RuntimeError(f"Benchmark query failed: {result.errors}")
+        return result.result
+
+    results = []
+    for name, biquery in workload.items():
+        for _ in range(warmup):
+            run(biquery)
+
+        reset_peak_rss()
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            table = run(biquery)
+            timings.append((time.perf_counter() - start) * 1000)
+        peak = peak_rss_mb()
+
+        samples = sorted(timings)
+        results.append(QueryResult(
+            scale_factor=scale_factor,
+            query=name,
+            runs=runs,
+            rows=table.num_rows,
+            mean_ms=statistics.fmean(samples),
+            p50_ms=percentile(samples, 50),
+            p95_ms=percentile(samples, 95),
+            p99_ms=percentile(samples, 99),
+            rows_scanned=rows_scanned(connection.conn.con, lambda: run(biquery)),
+            peak_rss_mb=peak,
+        ))
+
+    connection.conn.disconnect()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scale-factors", nargs="+", type=float, default=[0.01, 0.1])
+    parser.add_argument("--queries", nargs="+", choices=list(WORKLOAD), default=list(WORKLOAD))
+    parser.add_argument("--runs", type=int, default=20, help="timed runs per query")
+    parser.add_argument("--warmup", type=int, default=2, help="untimed runs per query before timing")
+    parser.add_argument("--data-dir", default=".benchmark_data", help="where the generated databases are kept")
+    parser.add_argument("--regenerate", action="store_true", help="regenerate databases that already exist")
+    parser.add_argument("--output", help="write the results as JSON to this path")
+    args = parser.parse_args()
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    workload = {name: WORKLOAD[name] for name in args.queries}
+    databases = {}
+    results = []
+    for scale_factor in args.scale_factors:
+        path = database_path(args.data_dir, scale_factor)
+        if args.regenerate or not os.path.exists(path):
+            start = time.perf_counter()
+            counts = generate(path, scale_factor, overwrite=True)
+            print(f"generated sf {scale_factor:g} in {time.perf_counter() - start:.1f}s: {counts}")
+        databases[f"{scale_factor:g}"] = {"path": path, "bytes": os.path.getsize(path)}
+
+        for result in benchmark(path, scale_factor, workload, args.runs, args.warmup):
+            results.append(result)
+            print(
+                f"sf {scale_factor:<6g} {result.query:<30} p50 {result.p50_ms:9.2f}ms  p95 {result.p95_ms:9.2f}ms  "
+                f"p99 {result.p99_ms:9.2f}ms  scanned {result.rows_scanned or 0:>11,}  rss {result.peak_rss_mb:8.1f}MB"
+            )
+
+    report = {
+        "environment": environment() | {
+            "duckdb": duckdb.__version__,
+            "peak_rss_per_query": reset_peak_rss(),
+        },
+        "databases": databases,
+        "results": [asdict(r) for r in results],
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Synthetic ModelBuilder models for benchmarks.
+
+    star       one fact table joined directly to every dimension table
+    snowflake  one fact table with chains of dimension tables `depth` joins deep
+    fan        one shared dimension table feeding every fact table
+"""
+import random
+from dataclasses import dataclass, field
+from typing import Literal
+from src.datachain.biquery import BIQuery
+from src.datachain.data_model import ModelBuilder, TableModel
+
+Shape = Literal["star", "snowflake", "fan"]
+SHAPES: tuple[Shape, ...] = ("star", "snowflake", "fan")
+
+
+@dataclass
+class SyntheticModel:
+    shape: Shape
+    builder: ModelBuilder
+    # Names of the dimensions and metrics defined on each table
+    dimensions: dict[str, list[str]] = field(default_factory=dict)
+    metrics: dict[str, list[str]] = field(default_factory=dict)
+    # Dimension tables ordered by distance from the fact tables, farthest last
+    dimension_tables: list[str] = field(default_factory=list)
+
+    @property
+    def table_count(self) -> int:
+        return len(self.dimensions)
+
+
+def build_model(
+    shape: Shape,
+    tables: int,
+    metrics_per_fact: int = 4,
+    dimensions_per_table: int = 3,
+    depth: int = 4,
+) -> SyntheticModel:
+    """Build a model of the given shape with `tables` tables in total (at least 2)"""
+    if tables < 2:
+        raise ValueError("A synthetic model needs at least 2 tables")
+    builder = ModelBuilder()
+    model = SyntheticModel(shape=shape, builder=builder)
+
+    if shape == "star":
+        fact = _add_fact(model, "fact", [f"dim_{i}" for i in range(tables - 1)], metrics_per_fact)
+        for i in range(tables - 1):
+            dim = _add_dimension(model, f"dim_{i}", [], dimensions_per_table)
+            _relate(builder, dim, fact)
+    elif shape == "snowflake":
+        dims = tables - 1
+        chains = max(1, dims // depth)
+        # Every chain is a path dim_c_0 -> dim_c_1 -> ... ending at the fact table
+        layout = [[] for _ in range(chains)]
+        for i in range(dims):
+            layout[i % chains].append(f"dim_{i % chains}_{i // chains}")
+        fact = _add_fact(model, "fact", [chain[0] for chain in layout], metrics_per_fact)
+        for chain in layout:
+            child = fact
+            for position, name in enumerate(chain):
+                parent_key = [chain[position + 1]] if position + 1 < len(chain) else []
+                dim = _add_dimension(model, name, parent_key, dimensions_per_table)
+                _relate(builder, dim, child)
+                child = dim
+        model.dimension_tables.sort(key=lambda name: int(name.rsplit("_", 1)[1]))
+    elif shape == "fan":
+        facts = [_add_fact(model, f"fact_{i}", ["hub"], metrics_per_fact) for i in range(tables - 1)]
+        hub = _add_dimension(model, "hub", [], dimensions_per_table)
+        for fact in facts:
+            _relate(builder, hub, fact)
+    else:
+        raise ValueError(f"Unknown shape '{shape}'")
+
+    return model
+
+
+def generate_queries(model: SyntheticModel, count: int, dimensions: int = 3, metrics: int = 2, seed: int = 0) -> list[BIQuery]:
+    """Deterministic queries; snowflake queries favour the deepest tables to exercise long join paths"""
+    rng = random.Random(seed)
+    fact_tables = list(model.metrics)
+    dimension_tables = model.dimension_tables
+    if model.shape == "snowflake":
+        dimension_tables = dimension_tables[len(dimension_tables) // 2:]
+
+    queries = []
+    for _ in range(count):
+        fact = rng.choice(fact_tables)
+        tables = rng.sample(dimension_tables, min(dimensions, len(dimension_tables)))
+        queries.append(BIQuery(
+            dimensions=[rng.choice(model.dimensions[t]) for t in tables],
+            metrics=rng.sample(model.metrics[fact], min(metrics, len(model.metrics[fact]))),
+        ))
+    return queries
+
+
+def _add_fact(model: SyntheticModel, name: str, dimension_tables: list[str], metric_count: int) -> TableModel:
+    schema = {"id": "int64"} | {f"{d}_id": "int64" for d in dimension_tables} | {f"measure_{i}": "float64" for i in range(metric_count)}
+    table = model.builder.table(name=name)(lambda: schema)
+    model.dimensions[name] = []
+    model.metrics[name] = []
+    for i in range(metric_count):
+        metric_name = f"{name}__measure_{i}_sum"
+        model.builder.metric(name=metric_name, grain=name)(
+            lambda dm, sm, table=name, column=f"measure_{i}": dm[table][column].sum()
+        )
+        model.metrics[name].append(metric_name)
+    return table
+
+
+def _add_dimension(model: SyntheticModel, name: str, parent_tables: list[str], attribute_count: int) -> TableModel:
+    schema = {"id": "int64"} | {f"{p}_id": "int64" for p in parent_tables} | {f"attr_{i}": "string" for i in range(attribute_count)}
+    table = model.builder.table(name=name)(lambda: schema)
+    model.dimensions[name] = []
+    model.dimension_tables.append(name)
+    for i in range(attribute_count):
+        dimension_name = f"{name}__attr_{i}"
+        model.builder.dimension(name=dimension_name)(
+            lambda dm, table=name, column=f"attr_{i}": dm[table][column]
+        )
+        model.dimensions[name].append(dimension_name)
+    return table
+
+
+def _relate(builder: ModelBuilder, one: TableModel, many: TableModel):
+    """The `one` side's id is referenced by the `many` side's <one>_id column"""
+    builder.relationship(left=one, right=many)(
+        lambda left, right, key=f"{one.name}_id": left["id"] == right[key]
+    )
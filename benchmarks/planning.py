@@ -0,0 +1,152 @@
+"""
+Latency and allocations of the planning pipeline on synthetic models.
+
+    python -m benchmarks.planning --shapes star snowflake fan --sizes 5 50 500 2000 --output planning.json
+
+Each stage (resolve_query, generate_logical_plan, build_ibis_expression, compile) is
+timed over a fixed set of generated queries. Allocations are measured with tracemalloc
+in a separate pass so they do not skew the timings.
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+from dataclasses import dataclass, asdict
+from typing import Any, Callable
+import ibis
+from src.datachain.execution.ibis_builder import build_ibis_expression
+from src.datachain.planner import generate_logical_plan
+from src.datachain.resolver import resolve_query
+from .models import SHAPES, build_model, generate_queries
+
+STAGES = ("resolve_query", "generate_logical_plan", "build_ibis_expression", "compile")
+
+
+@dataclass
+class StageResult:
+    shape: str
+    tables: int
+    stage: str
+    queries: int
+    mean_ms: float
+    p50_ms: float
+    p95_ms: float
+    max_ms: float
+    allocated_kb: float  # total allocated per query
+    peak_kb: float  # peak traced memory during one query
+
+
+def run_pipeline(model, biquery) -> dict[str, Callable[[], Any]]:
+    """The stages of one query, each a thunk over the previous stage's output"""
+    data_model = model.builder.data_model
+    semantic_model = model.builder.semantic_model
+    state: dict[str, Any] = {}
+
+    def resolve():
+        state["resolved"] = resolve_query(biquery, semantic_model, data_model).resolved_query
+
+    def plan():
+        state["plan"] = generate_logical_plan(state["resolved"], data_model).logical_plan
+
+    def build():
+        state["expr"] = build_ibis_expression(state["plan"], state["resolved"])
+
+    def compile_():
+        state["sql"] = ibis.to_sql(state["expr"], dialect="duckdb")
+
+    return dict(zip(STAGES, (resolve, plan, build, compile_)))
+
+
+def benchmark(shape: str, tables: int, queries: int, seed: int) -> list[StageResult]:
+    model = build_model(shape, tables)
+    biqueries = generate_queries(model, queries, seed=seed)
+
+    timings: dict[str, list[float]] = {stage: [] for stage in STAGES}
+    for biquery in biqueries:
+        for stage, thunk in run_pipeline(model, biquery).items():
+            start = time.perf_counter()
+            thunk()
+            timings[stage].append((time.perf_counter() - start) * 1000)
+
+    allocated: dict[str, list[float]] = {stage: [] for stage in STAGES}
+    peaks: dict[str, list[float]] = {stage: [] for stage in STAGES}
+    tracemalloc.start()
+    try:
+        for biquery in biqueries:
+            for stage, thunk in run_pipeline(model, biquery).items():
+                tracemalloc.reset_peak()
+                before, _ = tracemalloc.get_traced_memory()
+                thunk()
+                after, peak = tracemalloc.get_traced_memory()
+                allocated[stage].append(max(after - before, 0) / 1024)
+                peaks[stage].append((peak - before) / 1024)
+    finally:
+        tracemalloc.stop()
+
+    results = []
+    for stage in STAGES:
+        samples = sorted(timings[stage])
+        results.append(StageResult(
+            shape=shape,
+            tables=tables,
+            stage=stage,
+            queries=len(samples),
+            mean_ms=statistics.fmean(samples),
+            p50_ms=percentile(samples, 50),
+            p95_ms=percentile(samples, 95),
+            max_ms=samples[-1],
+            allocated_kb=statistics.fmean(allocated[stage]),
+            peak_kb=max(peaks[stage]),
+        ))
+    return results
+
+
+def percentile(sorted_samples: list[float], p: float) -> float:
+    """Nearest-rank percentile of already sorted samples"""
+    if not sorted_samples:
+        return 0.0
+    rank = max(1, round(p / 100 * len(sorted_samples)))
+    return sorted_samples[min(rank, len(sorted_samples)) - 1]
+
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "ibis": ibis.__version__,
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--shapes", nargs="+", default=list(SHAPES), choices=SHAPES)
+    parser.add_argument("--sizes", nargs="+", type=int, default=[5, 50, 500, 2000])
+    parser.add_argument("--queries", type=int, default=20, help="queries per model")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the results as JSON to this path")
+    args = parser.parse_args()
+
+    results = []
+    for shape in args.shapes:
+        for tables in args.sizes:
+            for result in benchmark(shape, tables, args.queries, args.seed):
+                results.append(result)
+                print(f"{shape:<10} {tables:>5} {result.stage:<22} p50 {result.p50_ms:8.3f}ms  p95 {result.p95_ms:8.3f}ms  alloc {result.allocated_kb:9.1f}KB")
+
+    report = {"environment": environment(), "results": [asdict(r) for r in results]}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+TPC-H-like data, semantic model and query workload for end-to-end benchmarks.
+
+    region -> nation -> customer -> orders -> lineitem <- part
+
+Row counts follow TPC-H (150k customers, 200k parts, 1.5M orders and ~6M line items per
+unit of scale factor) so fractional scale factors give small, quick databases. Values are
+derived from hashes of the row number, so the same scale factor always generates the same data.
+"""
+import os
+from src.datachain.biquery import BIQuery
+from src.datachain.data_connection import DataConnection
+from src.datachain.data_model import ModelBuilder
+
+TABLES = ("region", "nation", "customer", "part", "orders", "lineitem")
+
+REGIONS = ("AFRICA", "AMERICA", "ASIA", "EUROPE", "MIDDLE EAST")
+SEGMENTS = ("AUTOMOBILE", "BUILDING", "FURNITURE", "HOUSEHOLD", "MACHINERY")
+PRIORITIES = ("1-URGENT", "2-HIGH", "3-MEDIUM", "4-NOT SPECIFIED", "5-LOW")
+SHIP_MODES = ("AIR", "FOB", "MAIL", "RAIL", "REG AIR", "SHIP", "TRUCK")
+LINES_PER_ORDER = 4
+
+
+def _pick(values: tuple[str, ...], seed: str) -> str:
+    """SQL choosing one of the values from a hash of the seed expression"""
+    items = ", ".join(f"'{v}'" for v in values)
+    return f"[{items}][(hash({seed}) % {len(values)})::INTEGER + 1]"
+
+
+def _uniform(seed: str, low: float, high: float) -> str:
+    """SQL for a deterministic pseudo-random DOUBLE in [low, high)"""
+    return f"({low} + (hash({seed}) % 1000000) / 1000000.0 * {high - low})"
+
+
+def generate(path: str, scale_factor: float, overwrite: bool = False) -> dict[str, int]:
+    """Write the tables into a DuckDB file and return the row count of each table"""
+    import duckdb
+
+    if os.path.exists(path):
+        if not overwrite:
+            raise FileExistsError(f"'{path}' already exists")
+        os.remove(path)
+
+    customers = max(1, int(150_000 * scale_factor))
+    parts = max(1, int(200_000 * scale_factor))
+    orders = max(1, int(1_500_000 * scale_factor))
+
+    statements = [
+        f"""CREATE TABLE region AS
+            SELECT range AS r_regionkey, [{", ".join(f"'{r}'" for r in REGIONS)}][range + 1] AS r_name
+            FROM range(5)""",
+        f"""CREATE TABLE nation AS
+            SELECT range AS n_nationkey, 'NATION ' || range AS n_name, range % 5 AS n_regionkey
+            FROM range(25)""",
+        f"""CREATE TABLE customer AS
+            SELECT range AS c_custkey,
+                   'Customer#' || lpad(range::VARCHAR, 9, '0') AS c_name,
+                   {_pick(SEGMENTS, 'range * 3')} AS c_mktsegment,
+                   hash(range * 5) % 25 AS c_nationkey
+            FROM range({customers})""",
+        f"""CREATE TABLE part AS
+            SELECT range AS p_partkey,
+                   'Brand#' || (hash(range * 7) % 5 + 1) || (hash(range * 11) % 5 + 1) AS p_brand,
+                   (hash(range * 13) % 50 + 1)::INTEGER AS p_size
+            FROM range({parts})""",
+        f"""CREATE TABLE orders AS
+            SELECT range AS o_orderkey,
+                   hash(range * 17) % {customers} AS o_custkey,
+                   DATE '1992-01-01' + (hash(range * 19) % 2406)::INTEGER AS o_orderdate,
+                   {_pick(PRIORITIES, 'range * 23')} AS o_orderpriority
+            FROM range({orders})""",
+        f"""CREATE TABLE lineitem AS
+            SELECT range // {LINES_PER_ORDER} AS l_orderkey,
+                   range % {LINES_PER_ORDER} + 1 AS l_linenumber,
+                   hash(range * 29) % {parts} AS l_partkey,
+                   round({_uniform('range * 31', 1, 51)}) AS l_quantity,
+                   round({_uniform('range * 37', 900, 105000)}, 2) AS l_extendedprice,
+                   round({_uniform('range * 41', 0, 0.1)}, 2) AS l_discount,
+                   {_pick(('A', 'N', 'R'), 'range * 43')} AS l_returnflag,
+                   {_pick(SHIP_MODES, 'range * 47')} AS l_shipmode
+            FROM range({orders * LINES_PER_ORDER})""",
+    ]
+
+    with duckdb.connect(path) as con:
+        for statement in statements:
+            con.execute(statement)
+        return {table: con.execute(f"SELECT count(*) FROM {table}").fetchone()[0] for table in TABLES}
+
+
+def build_model(connection: DataConnection) -> ModelBuilder:
+    """The semantic model over the generated tables; schemas are introspected from the connection"""
+    builder = ModelBuilder(connection)
+    region, nation, customer, part, orders, lineitem = (builder.lazy_table(name) for name in TABLES)
+
+    @builder.relationship(left=region, right=nation)
+    def region_nations(left, right):
+        return left["r_regionkey"] == right["n_regionkey"]
+
+    @builder.relationship(left=nation, right=customer)
+    def nation_customers(left, right):
+        return left["n_nationkey"] == right["c_nationkey"]
+
+    @builder.relationship(left=customer, right=orders)
+    def customer_orders(left, right):
+        return left["c_custkey"] == right["o_custkey"]
+
+    @builder.relationship(left=orders, right=lineitem)
+    def order_lines(left, right):
+        return left["o_orderkey"] == right["l_orderkey"]
+
+    @builder.relationship(left=part, right=lineitem)
+    def part_lines(left, right):
+        return left["p_partkey"] == right["l_partkey"]
+
+    @builder.metric(name="revenue", grain="lineitem")
+    def revenue_metric(dm, sm):
+        line = dm["lineitem"]
+        return (line["l_extendedprice"] * (1 - line["l_discount"])).sum()
+
+    @builder.metric(name="quantity", grain="lineitem")
+    def quantity_metric(dm, sm):
+        return dm["lineitem"]["l_quantity"].sum()
+
+    @builder.metric(name="line_count", grain="lineitem")
+    def line_count_metric(dm, sm):
+        return dm["lineitem"]["l_linenumber"].count()
+
+    @builder.metric(name="avg_discount", grain="lineitem")
+    def avg_discount_metric(dm, sm):
+        return dm["lineitem"]["l_discount"].mean()
+
+    @builder.metric(name="revenue_per_unit", grain="lineitem", dependencies=[revenue_metric, quantity_metric])
+    def revenue_per_unit_metric(dm, sm):
+        return sm.get_metric("revenue").resolve(dm, sm) / sm.get_metric("quantity").resolve(dm, sm)
+
+    @builder.metric(name="order_count", grain="orders")
+    def order_count_metric(dm, sm):
+        return dm["orders"]["o_orderkey"].count()
+
+    dimensions = {
+        "region": lambda dm: dm["region"]["r_name"],
+        "nation": lambda dm: dm["nation"]["n_name"],
+        "market_segment": lambda dm: dm["customer"]["c_mktsegment"],
+        "brand": lambda dm: dm["part"]["p_brand"],
+        "order_priority": lambda dm: dm["orders"]["o_orderpriority"],
+        "order_year": lambda dm: dm["orders"]["o_orderdate"].year(),
+        "order_month": lambda dm: dm["orders"]["o_orderdate"].truncate("M"),
+        "ship_mode": lambda dm: dm["lineitem"]["l_shipmode"],
+        "return_flag": lambda dm: dm["lineitem"]["l_returnflag"],
+    }
+    for name, expression in dimensions.items():
+        builder.dimension(name=name)(expression)
+
+    @builder.filter(name="recent_orders")
+    def recent_orders_filter(dm, sm):
+        return dm["orders"]["o_orderdate"] >= "1997-01-01"
+
+    @builder.filter(name="discounted")
+    def discounted_filter(dm, sm):
+        return dm["lineitem"]["l_discount"] > 0.05
+
+    return builder
+
+
+# A fixed workload from single-join rollups to five-table join paths
+WORKLOAD: dict[str, BIQuery] = {
+    "revenue_by_region": BIQuery(dimensions=["region"], metrics=["revenue"]),
+    "revenue_by_nation_year": BIQuery(
+        dimensions=["nation", "order_year"], metrics=["revenue", "quantity"],
+        orderby=[("nation", "asc"), ("order_year", "asc")],
+    ),
+    "lines_by_ship_mode": BIQuery(dimensions=["ship_mode"], metrics=["line_count", "avg_discount"]),
+    "orders_by_segment": BIQuery(dimensions=["market_segment"], metrics=["order_count"]),
+    "top_brands": BIQuery(dimensions=["brand"], metrics=["revenue"], orderby=[("revenue", "desc")], limit=10),
+    "recent_orders_by_month": BIQuery(
+        dimensions=["order_month", "order_priority"], metrics=["order_count"], filters=["recent_orders"],
+    ),
+    "discounted_returns_by_region": BIQuery(
+        dimensions=["region", "return_flag"], metrics=["revenue", "quantity"], filters=["discounted"],
+    ),
+    "revenue_per_unit_by_segment": BIQuery(dimensions=["market_segment", "ship_mode"], metrics=["revenue_per_unit"]),
+}
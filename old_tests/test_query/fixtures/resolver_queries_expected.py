@@ -194,6 +194,15 @@ orderby_measure_and_resolved = (
         ]
     ),
     ResolvedBIQuery(
+        # The resolver carries the query's measures over, so they are part of the expected result
+        measures=[
+            BIMeasure(
+                name="total_revenue",
+                table="Sales",
+                column="revenue",
+                aggregation=Aggregation.SUM
+            )
+        ],
         order_by=[
             ResolvedOrderByMeasure(
                 measure=BIMeasure(
@@ -52,4 +52,80 @@ simple_agg_and_groupby_sql_query = SQLQuery(
             column=QueryColumn(table="Sales", name="customer_id")
         )
     ]
-)
\ No newline at end of file
+)
+
+def filtered_agg_sql_query(region: str, min_revenue: int, customers: list[str] | None = None) -> SQLQuery:
+    return SQLQuery(
+        from_="Sales",
+        columns=[
+            SelectItem(
+                alias="ID",
+                expression=QueryColumn(table="Sales", name="customer_id")
+            ),
+            SelectItem(
+                alias="total_revenue",
+                expression=SQLMeasure(
+                    table="Sales",
+                    column="revenue",
+                    aggregation=Aggregation.SUM
+                )
+            )
+        ],
+        filters=And(predicates=[
+            Comparison(table="Sales", column="region", comparator="=", value=region),
+            Comparison(table="Sales", column="customer_id", comparator="IN", value=customers or ["c1", "c2"]),
+        ]),
+        group_by=[
+            GroupBy(
+                table="Sales",
+                column=QueryColumn(table="Sales", name="customer_id")
+            )
+        ],
+        having=HavingComparison(
+            metric=SQLMeasure(table="Sales", column="revenue", aggregation=Aggregation.SUM),
+            comparator=">",
+            value=min_revenue
+        ),
+        order_by=[
+            OrderBy(column=QueryColumn(table="Sales", name="customer_id"))
+        ]
+    )
+
+
+def _revenue_window(window) -> WindowSpec:
+    return WindowSpec(
+        field="total_revenue",
+        partition_by=[QueryColumn(table="cte", name="Sales region")],
+        order_by=[OrderBy(column=QueryColumn(table="cte", name="Sales month"))],
+        window=window,
+    )
+
+
+period_over_period_sql_query = SQLQuery(
+    from_=SQLQuery(
+        from_="Sales",
+        columns=[
+            SelectItem(alias="Sales region", expression=QueryColumn(table="Sales", name="region")),
+            SelectItem(alias="Sales month", expression=QueryColumn(table="Sales", name="month")),
+            SelectItem(
+                alias="total_revenue",
+                expression=SQLMeasure(table="Sales", column="revenue", aggregation=Aggregation.SUM)
+            ),
+        ],
+        group_by=[
+            GroupBy(table="Sales", column=QueryColumn(table="Sales", name="region")),
+            GroupBy(table="Sales", column=QueryColumn(table="Sales", name="month")),
+        ],
+    ),
+    columns=[
+        SelectItem(alias="Sales region", expression=QueryColumn(table="cte", name="Sales region")),
+        SelectItem(alias="Sales month", expression=QueryColumn(table="cte", name="Sales month")),
+        SelectItem(alias="change", expression=_revenue_window(SQLChangeWindow(period=1, mode="ABSOLUTE"))),
+        SelectItem(alias="change_pct", expression=_revenue_window(SQLChangeWindow(period=1, mode="PERCENTAGE"))),
+        SelectItem(alias="moving_avg", expression=_revenue_window(SQLMovingAverageWindow(period=2, mode="BEHIND"))),
+    ],
+    order_by=[
+        OrderBy(column=QueryColumn(table="cte", name="Sales region")),
+        OrderBy(column=QueryColumn(table="cte", name="Sales month")),
+    ]
+)
@@ -1,11 +1,193 @@
+import pytest
+from concurrent.futures import ThreadPoolExecutor
 from src.datachain.query.compilers.duckdb import DuckDbCompiler
+from src.datachain.query.models import QueryColumn, SQLQuery, SelectItem, Join
+from src.datachain.query.executor import DuckDbExecutor
 from .fixtures import queries
 
 def test_compiler_simplest_sql():
-    result = DuckDbCompiler.compile(queries.simplest_sql_query)
+    result = DuckDbCompiler().compile(queries.simplest_sql_query)
     print(result)
 
 
 def test_compiler_agg_group_by_sql():
-    result = DuckDbCompiler.compile(queries.simple_agg_and_groupby_sql_query)
-    print(result)
\ No newline at end of file
+    result = DuckDbCompiler().compile(queries.simple_agg_and_groupby_sql_query)
+    print(result)
+
+def test_compiler_escapes_string_literals():
+    result = DuckDbCompiler().compile(queries.filtered_agg_sql_query("O'Brien", 10))
+    assert "Sales.region = 'O''Brien'" in result
+
+
+def test_compiler_casts_non_finite_floats():
+    assert "HAVING SUM(Sales.revenue) > '-inf'::DOUBLE" in DuckDbCompiler().compile(queries.filtered_agg_sql_query("north", float("-inf")))
+    assert "HAVING SUM(Sales.revenue) > 'nan'::DOUBLE" in DuckDbCompiler().compile(queries.filtered_agg_sql_query("north", float("nan")))
+
+
+def test_executor_binds_non_finite_floats():
+    duckdb = pytest.importorskip("duckdb")
+    con = duckdb.connect()
+    con.execute(
+        "CREATE TABLE Sales AS SELECT * FROM (VALUES "
+        "('c1', 'north', 10.0), ('c2', 'north', 15.0)"
+        ") t(customer_id, region, revenue)"
+    )
+    executor = DuckDbExecutor(con)
+
+    everything = executor.execute(queries.filtered_agg_sql_query("north", float("-inf")))
+    nothing = executor.execute(queries.filtered_agg_sql_query("north", float("inf")))
+    # DuckDB orders NaN above every other value
+    above_nan = executor.execute(queries.filtered_agg_sql_query("north", float("nan")))
+
+    assert sorted(row["ID"] for row in everything.to_pylist()) == ["c1", "c2"]
+    assert nothing.num_rows == 0 and above_nan.num_rows == 0
+    assert executor.stats.hits == 2
+
+
+def test_compiler_parameterized_shares_skeleton():
+    compiler = DuckDbCompiler()
+    first = compiler.compile_parameterized(queries.filtered_agg_sql_query("north", 10))
+    second = compiler.compile_parameterized(queries.filtered_agg_sql_query("south", 99))
+
+    assert first.sql == second.sql
+    assert "north" not in first.sql
+    assert first.params == ["north", "c1", "c2", 10]
+    assert second.params == ["south", "c1", "c2", 99]
+
+
+def test_executor_reuses_prepared_statements():
+    duckdb = pytest.importorskip("duckdb")
+    con = duckdb.connect()
+    con.execute(
+        "CREATE TABLE Sales AS SELECT * FROM (VALUES "
+        "('c1', 'north', 10), ('c1', 'north', 15), ('c2', 'north', 4), ('c2', 'south', 50)"
+        ") t(customer_id, region, revenue)"
+    )
+    executor = DuckDbExecutor(con)
+
+    north = executor.execute(queries.filtered_agg_sql_query("north", 5))
+    south = executor.execute(queries.filtered_agg_sql_query("south", 5))
+
+    assert north.to_pylist() == [{"ID": "c1", "total_revenue": 25}]
+    assert south.to_pylist() == [{"ID": "c2", "total_revenue": 50}]
+    assert executor.stats.misses == 1
+    assert executor.stats.hits == 1
+
+
+def test_compiler_memoizes_repeated_measures():
+    compiler = DuckDbCompiler()
+    first = compiler.compile(queries.filtered_agg_sql_query("north", 10))
+    memoized = len(compiler._memo)
+    second = compiler.compile(queries.filtered_agg_sql_query("north", 10))
+
+    assert first == second
+    assert memoized == len(compiler._memo)
+    assert "HAVING SUM(Sales.revenue) > 10" in first
+
+
+def test_compiler_memo_evicts_least_recently_used():
+    compiler = DuckDbCompiler(max_memo_entries=2)
+    hot, warm, cold = (QueryColumn(table="Sales", name=name) for name in ("region", "month", "revenue"))
+    compiler.render_expression(hot)
+    compiler.render_expression(warm)
+    compiler.render_expression(hot)
+    compiler.render_expression(cold)
+
+    assert list(compiler._memo) == [(QueryColumn, "Sales", "region"), (QueryColumn, "Sales", "revenue")]
+
+
+def test_compiler_can_be_shared_by_threads():
+    compiler = DuckDbCompiler(max_memo_entries=1)
+    regions = [f"region {i}" for i in range(64)]
+    expected = [DuckDbCompiler().compile(queries.filtered_agg_sql_query(r, 10)) for r in regions]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        compiled = list(pool.map(lambda r: compiler.compile(queries.filtered_agg_sql_query(r, 10)), regions * 8))
+
+    assert compiled == expected * 8
+    assert len(compiler._memo) == 1
+
+
+def test_compiler_quotes_table_names():
+    duckdb = pytest.importorskip("duckdb")
+    query = SQLQuery(
+        from_="Sales 2024",
+        columns=[SelectItem(alias="region", expression=QueryColumn(table="Customer list", name="region"))],
+        joins=[Join(left_table="Sales 2024", right_table="Customer list", left_keys=["customer_id"], right_keys=["id"])],
+    )
+    sql = DuckDbCompiler().compile(query)
+
+    assert 'FROM "Sales 2024"' in sql and 'LEFT JOIN "Customer list" ON' in sql
+    con = duckdb.connect()
+    con.execute('CREATE TABLE "Sales 2024" AS SELECT 1 AS customer_id')
+    con.execute('CREATE TABLE "Customer list" AS SELECT 1 AS id, \'north\' AS region')
+    assert con.execute(sql).fetchall() == [("north",)]
+
+
+def test_compiler_declares_windows_and_lags_once():
+    duckdb = pytest.importorskip("duckdb")
+    sql = DuckDbCompiler().compile(queries.period_over_period_sql_query)
+
+    assert sql.count("LAG(") == 1
+    assert sql.count("PARTITION BY") == 1
+    assert "WINDOW w0 AS (" in sql
+
+    con = duckdb.connect()
+    con.execute(
+        "CREATE TABLE Sales AS SELECT * FROM (VALUES "
+        "('north', 1, 10), ('north', 2, 15), ('north', 2, 5), ('north', 3, 30), ('south', 1, 8)"
+        ") t(region, month, revenue)"
+    )
+    rows = con.execute(sql).fetchall()
+    assert rows == [
+        ("north", 1, None, None, 10.0),
+        ("north", 2, 10, 100.0, 15.0),
+        ("north", 3, 10, 50.0, 25.0),
+        ("south", 1, None, None, 8.0),
+    ]
+
+
+def test_compiler_moves_large_in_lists_to_temp_tables():
+    compiler = DuckDbCompiler(in_list_threshold=1)
+    compiled = compiler.compile_parameterized(queries.filtered_agg_sql_query("north", 10))
+
+    assert "Sales.customer_id IN (SELECT value FROM __datachain_in_list_0)" in compiled.sql
+    assert compiled.params == ["north", 10]
+    assert compiled.temp_tables == {"__datachain_in_list_0": ["c1", "c2"]}
+    # Plain compilation has nowhere to put the table and keeps inlining
+    assert "IN ('c1', 'c2')" in compiler.compile(queries.filtered_agg_sql_query("north", 10))
+
+
+def test_executor_registers_in_list_tables():
+    duckdb = pytest.importorskip("duckdb")
+    con = duckdb.connect()
+    con.execute(
+        "CREATE TABLE Sales AS SELECT * FROM (VALUES "
+        "('c1', 'north', 10), ('c2', 'north', 15), ('c3', 'north', 20)"
+        ") t(customer_id, region, revenue)"
+    )
+    executor = DuckDbExecutor(con, compiler=DuckDbCompiler(in_list_threshold=1))
+
+    result = executor.execute(queries.filtered_agg_sql_query("north", 0))
+
+    assert result.to_pylist() == [{"ID": "c1", "total_revenue": 10}, {"ID": "c2", "total_revenue": 15}]
+    assert con.execute("SELECT count(*) FROM duckdb_views() WHERE view_name LIKE '__datachain%'").fetchone() == (0,)
+
+
+def test_executor_binds_each_in_list_to_its_own_query():
+    duckdb = pytest.importorskip("duckdb")
+    con = duckdb.connect()
+    con.execute(
+        "CREATE TABLE Sales AS SELECT * FROM (VALUES "
+        "('c1', 'north', 10), ('c2', 'north', 15), ('c3', 'north', 20)"
+        ") t(customer_id, region, revenue)"
+    )
+    executor = DuckDbExecutor(con, compiler=DuckDbCompiler(in_list_threshold=1))
+
+    first = executor.execute(queries.filtered_agg_sql_query("north", 0, customers=["c1", "c2"]))
+    second = executor.execute(queries.filtered_agg_sql_query("north", 0, customers=["c3", "c2", "c9"]))
+
+    assert sorted(row["ID"] for row in first.to_pylist()) == ["c1", "c2"]
+    assert sorted(row["ID"] for row in second.to_pylist()) == ["c2", "c3"]
+    # A prepared statement would stay bound to the first registered list
+    assert executor.stats.hits == 0
@@ -0,0 +1,88 @@
+import pytest
+from src.datachain.query.compilers.duckdb import DuckDbCompiler
+from src.datachain.query.materialize import materialize_time_grains
+from src.datachain.query.planner import QueryPlanner
+from src.datachain.query.types import QueryContext
+from src.datachain.query.models import (
+    SemanticModel,
+    Table,
+    SemanticColumn,
+    DataType,
+    ResolvedBIQuery,
+    ResolvedBIDimensionTimeGrain,
+    BIMeasure,
+    Aggregation,
+    TimeGrain,
+)
+
+
+def build_semantic_model(time_grains: dict | None) -> SemanticModel:
+    return SemanticModel(tables=[
+        Table(
+            name="Sales",
+            description="Sales fact table",
+            columns=[
+                SemanticColumn(name="order_date", type=DataType.DATE, description="Order date", time_grains=time_grains),
+                SemanticColumn(name="revenue", type=DataType.NUMERIC, description="Revenue amount"),
+            ],
+        )
+    ])
+
+
+monthly_revenue = ResolvedBIQuery(
+    time_grained_dimensions=[
+        ResolvedBIDimensionTimeGrain(time_grain=TimeGrain.MONTH, table="Sales", column="order_date")
+    ],
+    measures=[
+        BIMeasure(name="total_revenue", table="Sales", column="revenue", aggregation=Aggregation.SUM)
+    ],
+)
+
+
+def plan_and_compile(semantic_model: SemanticModel) -> str:
+    ctx = QueryContext()
+    ctx.tables = {"Sales"}
+    ctx.common_table = "Sales"
+    planner = QueryPlanner()
+    planner.analyse_context(monthly_revenue, ctx, semantic_model)
+    return DuckDbCompiler().compile(planner.plan(monthly_revenue, ctx, semantic_model))
+
+
+def test_time_grains_only_on_date_columns():
+    with pytest.raises(ValueError):
+        SemanticColumn(name="revenue", type=DataType.NUMERIC, description="", time_grains={TimeGrain.MONTH: "m"})
+
+
+def test_planner_computes_grains_that_are_not_populated():
+    sql = plan_and_compile(build_semantic_model({TimeGrain.MONTH: "order_date_month"}))
+
+    assert "order_date_month" not in sql
+    assert "MONTH(Sales.order_date)" in sql
+
+
+def test_planner_groups_on_materialized_grain():
+    semantic_model = build_semantic_model({TimeGrain.MONTH: "order_date_month"})
+    semantic_model.mark_time_grains_populated("Sales", ["order_date_month"])
+    sql = plan_and_compile(semantic_model)
+
+    assert "SELECT Sales.order_date_month AS" in sql
+    assert "GROUP BY Sales.order_date_month" in sql
+    assert "MONTH(Sales.order_date)" not in sql
+
+
+def test_materialized_grain_matches_computed_grain():
+    duckdb = pytest.importorskip("duckdb")
+    con = duckdb.connect()
+    con.execute(
+        "CREATE TABLE Sales AS SELECT * FROM (VALUES "
+        "(DATE '2024-01-05', 10), (DATE '2024-01-20', 5), (DATE '2024-02-01', 7)"
+        ") t(order_date, revenue)"
+    )
+    materialized_model = build_semantic_model({TimeGrain.MONTH: "order_date_month"})
+
+    assert materialize_time_grains(con, materialized_model) == {"Sales": ["order_date_month"]}
+    assert materialized_model.populated_time_grains == {("Sales", "order_date_month")}
+
+    computed = con.execute(plan_and_compile(build_semantic_model(None))).fetchall()
+    materialized = con.execute(plan_and_compile(materialized_model)).fetchall()
+    assert sorted(computed) == sorted(materialized) == [(1, 15), (2, 7)]
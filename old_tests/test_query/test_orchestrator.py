@@ -0,0 +1,133 @@
+import pytest
+from src.datachain.query.orchestrator import QueryOrchestrator
+from src.datachain.query import orchestrator as orchestrator_module
+from src.datachain.query.models import BIQuery, BIDimension, BIMeasure, BIFilter, Aggregation
+from .fixtures.semantic_fixture import semantic_model
+
+
+def revenue_by_country(countries: list[str], min_quantity: int = 0) -> BIQuery:
+    return BIQuery(
+        dimensions=[BIDimension(table="Customer", column="country")],
+        measures=[BIMeasure(name="revenue", table="Sales", column="revenue", aggregation=Aggregation.SUM)],
+        dimension_filters=[
+            BIFilter(field="Customer.country", comparator="IN", value=countries),
+            BIFilter(field="Sales.quantity", comparator=">", value=min_quantity),
+        ],
+    )
+
+
+def test_identical_queries_hit_the_cache():
+    orchestrator = QueryOrchestrator(semantic_model)
+
+    first = orchestrator.run(revenue_by_country(["FR", "DE"]))
+    second = orchestrator.run(revenue_by_country(["FR", "DE"]))
+
+    assert not first.errors and not first.context.cache_hit
+    assert second.context.cache_hit
+    assert second.sql_query == first.sql_query and second.sql_query is not first.sql_query
+    assert second.sql == first.sql
+    assert second.context.cache_stats.hits == 1
+    assert second.context.cache_stats.misses == 1
+
+
+def test_filter_order_does_not_change_the_key():
+    orchestrator = QueryOrchestrator(semantic_model)
+    query = revenue_by_country(["FR", "DE"])
+    reordered = revenue_by_country(["DE", "FR"])
+    reordered.dimension_filters.reverse()
+
+    orchestrator.run(query)
+    assert orchestrator.run(reordered).context.cache_hit
+    assert not orchestrator.run(revenue_by_country(["FR"])).context.cache_hit
+
+
+def test_semantic_model_change_invalidates_plans():
+    orchestrator = QueryOrchestrator(semantic_model)
+    orchestrator.run(revenue_by_country(["FR"]))
+
+    changed = semantic_model.model_copy(deep=True)
+    changed.tables[0].description = "Customers"
+    orchestrator.set_semantic_model(changed)
+
+    assert not orchestrator.run(revenue_by_country(["FR"])).context.cache_hit
+
+
+def test_in_place_model_edits_invalidate_plans():
+    model = semantic_model.model_copy(deep=True)
+    orchestrator = QueryOrchestrator(model)
+    orchestrator.run(revenue_by_country(["FR"]))
+
+    model.tables[0].description = "Customers"
+    model.clear_caches()
+
+    assert not orchestrator.run(revenue_by_country(["FR"])).context.cache_hit
+
+
+def test_assigning_model_fields_invalidates_plans():
+    model = semantic_model.model_copy(deep=True)
+    orchestrator = QueryOrchestrator(model)
+    orchestrator.run(revenue_by_country(["FR"]))
+
+    tables = [table.model_copy() for table in model.tables]
+    tables[0].description = "Customers"
+    model.tables = tables
+
+    assert not orchestrator.run(revenue_by_country(["FR"])).context.cache_hit
+
+
+def test_cache_hits_do_not_rehash_the_model(monkeypatch):
+    orchestrator = QueryOrchestrator(semantic_model.model_copy(deep=True))
+    orchestrator.run(revenue_by_country(["FR"]))
+    monkeypatch.setattr(orchestrator_module, "semantic_model_version", lambda model: pytest.fail("model rehashed"))
+
+    assert orchestrator.run(revenue_by_country(["FR"])).context.cache_hit
+
+
+def test_cache_hits_do_not_share_state():
+    orchestrator = QueryOrchestrator(semantic_model)
+    first = orchestrator.run(revenue_by_country(["FR"]))
+    first.context.joins.append(("Nowhere", "Sales"))
+
+    second = orchestrator.run(revenue_by_country(["FR"]))
+    second.context.warnings.append("edited")
+    third = orchestrator.run(revenue_by_country(["FR"]))
+
+    assert third.context.cache_hit
+    assert ("Nowhere", "Sales") not in third.context.joins
+    assert third.context.warnings == []
+
+
+def test_errors_are_not_cached():
+    orchestrator = QueryOrchestrator(semantic_model)
+
+    orchestrator.run(BIQuery())
+    result = orchestrator.run(BIQuery())
+
+    assert result.errors
+    assert not result.context.cache_hit
+    assert len(orchestrator.cache) == 0
+
+
+def test_compiled_sql_runs():
+    duckdb = pytest.importorskip("duckdb")
+    con = duckdb.connect()
+    con.execute("CREATE TABLE Customer AS SELECT * FROM (VALUES ('c1', 'FR'), ('c2', 'DE')) t(customer_id, country)")
+    con.execute(
+        "CREATE TABLE Sales AS SELECT * FROM (VALUES ('c1', 10, 1), ('c1', 5, 2), ('c2', 7, 1)) t(customer_id, revenue, quantity)"
+    )
+
+    result = QueryOrchestrator(semantic_model).run(revenue_by_country(["FR", "DE"]))
+
+    assert sorted(con.execute(result.sql).fetchall()) == [("DE", 7), ("FR", 15)]
+
+
+def test_run_many_preserves_order_across_workers():
+    orchestrator = QueryOrchestrator(semantic_model)
+    queries = [revenue_by_country([f"country_{i}"], min_quantity=i) for i in range(12)] + [BIQuery()]
+
+    batch = orchestrator.run_many(queries, max_workers=2, chunksize=3)
+
+    assert [r.sql for r in batch.results] == [orchestrator.run(q).sql for q in queries]
+    assert batch.results[-1].errors
+    assert sum(w.queries for w in batch.workers) == len(queries)
+    assert all(w.queries_per_second > 0 for w in batch.workers)
@@ -1,4 +1,5 @@
 from src.datachain.query.planner import QueryPlanner
+from src.datachain.query.models.semantic import find_join_path
 from .fixtures.semantic_fixture import semantic_model
 from .fixtures import planner_queries
 from src.datachain.query.types import QueryContext
@@ -8,13 +9,13 @@ planner = QueryPlanner()
 graph = semantic_model.get_relationship_graph()
 
 def test_find_join_path_to_common_table_product_customer():
-    joins = planner._find_join_path_to_common_table("Product", "Sales", graph)
+    joins = find_join_path("Product", "Sales", graph)
     expected = [
         ("Product", "Sales")
     ]
     assert joins == expected
 
-    joins = planner._find_join_path_to_common_table("Customer", "Sales", graph)
+    joins = find_join_path("Customer", "Sales", graph)
     expected = [
         ("Customer", "Sales")
     ]
@@ -1,5 +1,6 @@
 from src.datachain.query.resolver import QueryResolver
 from src.datachain.query.types import QueryContext
+from src.datachain.query.models import ResolvedBIQuery, ResolvedOrderByDimension, Sorting
 from .fixtures.semantic_fixture import semantic_model
 from .fixtures import resolver_queries_expected
 
@@ -67,4 +68,12 @@ def test_resolve_dimensions():
     assert result == expected
 
 def test_resolve():
-    """Full resolve method tested against a query, sm and ctx"""
\ No newline at end of file
+    """Full resolve method tested against a query, sm and ctx"""
+
+def test_resolved_query_holds_resolved_order_bys_and_an_integer_limit():
+    """order_by takes the resolved order bys and limit a row count"""
+    order_by = ResolvedOrderByDimension(table="Sales", column="region", sorting=Sorting.DESC)
+    resolved = ResolvedBIQuery(order_by=[order_by], limit=10)
+
+    assert resolved.order_by == [order_by]
+    assert resolved.limit == 10
@@ -266,4 +266,35 @@ def test_invalid_contains_cycle_complex():
                     type=RelationshipType.ONE_TO_MANY
                 )
             ]
-        )
\ No newline at end of file
+        )
+
+def test_relationship_index_and_cached_join_paths():
+    from .fixtures.semantic_fixture import semantic_model
+
+    relationships = semantic_model.get_relationships("Customer", "Sales")
+    assert [r.keys_incoming for r in relationships] == [["customer_id"]]
+    assert semantic_model.get_relationships("Sales", "Customer") == ()
+
+    path = semantic_model.get_join_path("Customer", "Sales")
+    assert path == [("Customer", "Sales")]
+    path.append(("Sales", "Nowhere"))
+    assert semantic_model.get_join_path("Customer", "Sales") == [("Customer", "Sales")]
+    assert semantic_model.get_join_path("Sales", "Customer") is None
+
+    with pytest.raises(TypeError):
+        semantic_model.get_relationship_graph()["Customer"] = ()
+
+    copy = semantic_model.model_copy()
+    assert copy._join_paths == {}
+    assert semantic_model._join_paths
+
+
+def test_relationship_index_keeps_every_relationship_of_a_table_pair():
+    from .fixtures.semantic_fixture import semantic_model
+
+    duplicate = semantic_model.get_relationships("Customer", "Sales")[0].model_copy(
+        update={"keys_incoming": ["region"], "keys_outgoing": ["region"]}
+    )
+    model = semantic_model.model_copy(update={"relationships": semantic_model.relationships + [duplicate]})
+
+    assert len(model.get_relationships("Customer", "Sales")) == 2
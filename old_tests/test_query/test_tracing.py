@@ -0,0 +1,100 @@
+import io
+import json
+import pytest
+from src.datachain.query.orchestrator import QueryOrchestrator
+from src.datachain.query.tracing import Tracer, InMemoryExporter, JsonLinesExporter
+from src.datachain.query.models import BIQuery, BIDimension, BIMeasure, Aggregation
+from .fixtures.semantic_fixture import semantic_model
+
+revenue_by_country = BIQuery(
+    dimensions=[BIDimension(table="Customer", column="country")],
+    measures=[BIMeasure(name="revenue", table="Sales", column="revenue", aggregation=Aggregation.SUM)],
+)
+
+
+def test_tracer_nests_spans_and_events():
+    tracer = Tracer(level="debug")
+    with tracer.span("outer", tables=2):
+        tracer.event("starting")
+        with tracer.span("inner"):
+            tracer.event("working")
+
+    outer = tracer.spans[0]
+    assert outer.attributes == {"tables": 2}
+    assert outer.events == ["starting"]
+    assert [c.name for c in outer.children] == ["inner"]
+    assert outer.children[0].events == ["working"]
+    assert outer.duration_ms >= outer.children[0].duration_ms >= 0
+    assert tracer.lines()[0].startswith("[outer ")
+    assert tracer.lines()[2].startswith("  [inner ")
+
+
+def test_orchestrator_exports_stage_spans():
+    memory = InMemoryExporter()
+    stream = io.StringIO()
+    orchestrator = QueryOrchestrator(semantic_model, exporters=[memory, JsonLinesExporter(stream)], trace_level="debug")
+
+    result = orchestrator.run(revenue_by_country)
+
+    [root] = memory.spans
+    assert root.name == "query"
+    assert [c.name for c in root.children] == [
+        "validate_structure", "validate_references", "resolve", "validate_join_path", "plan", "compile"
+    ]
+    resolve = root.children[2]
+    assert resolve.attributes["tables"] == ["Customer", "Sales"]
+    assert root.children[4].attributes["joins"] == 1
+
+    exported = json.loads(stream.getvalue().splitlines()[0])
+    assert exported["name"] == "query"
+    assert len(exported["children"]) == 6
+
+    assert any("Validating join path" in line for line in result.context.trace)
+
+
+def test_cache_hits_are_traced():
+    memory = InMemoryExporter()
+    orchestrator = QueryOrchestrator(semantic_model, exporters=[memory], trace_level="summary")
+
+    orchestrator.run(revenue_by_country)
+    orchestrator.run(revenue_by_country)
+
+    assert [s.attributes["cache_hit"] for s in memory.spans] == [False, True]
+    assert memory.spans[1].children == []
+
+
+def test_summary_level_skips_messages():
+    tracer = Tracer(level="summary")
+    with tracer.span("stage"):
+        tracer.event("never formatted %s", object())
+
+    assert tracer.spans[0].events == []
+    assert len(tracer.lines()) == 1
+
+
+def test_off_level_records_nothing():
+    memory = InMemoryExporter()
+    orchestrator = QueryOrchestrator(semantic_model, exporters=[memory], max_cached_plans=0)
+
+    result = orchestrator.run(revenue_by_country)
+
+    assert not result.errors
+    assert result.context.trace == []
+    assert memory.spans == []
+
+
+def test_disabled_spans_keep_nothing():
+    tracer = Tracer()
+    with tracer.span("first") as span:
+        span.attributes["rows"] = 1
+        span.attributes.update(rows=2)
+        span.attributes.setdefault("hit", True)
+        with pytest.raises(AttributeError):
+            span.events.append("leaked")
+        with pytest.raises(AttributeError):
+            span.end = 1.0
+
+    with tracer.span("second") as span:
+        assert span.attributes == {}
+        assert span.events == () and span.children == ()
+    assert tracer.spans == [] and tracer.lines() == []
@@ -1 +1,2 @@
-from .biquery import BIQuery, SortingDir
\ No newline at end of file
+from .biquery import BIQuery, SortingDir
+from .fingerprint import canonicalize_biquery, canonical_key, fingerprint_biquery
\ No newline at end of file
@@ -0,0 +1,98 @@
+import hashlib
+import json
+from dataclasses import asdict
+from .biquery import BIQuery
+from ..data_model import DataModel, SemanticModel, Metric, Dimension, Filter
+from ..data_model.digest import expr_digest
+
+
+def canonicalize_biquery(biquery: BIQuery) -> BIQuery:
+    """
+    Normalise a BIQuery so that semantically identical queries compare equal.
+    Dimensions, metrics and filters are sets (results are addressed by column name),
+    so they are sorted and de-duplicated. Order by keeps its order, with lower-cased
+    directions and only the first occurrence of each column.
+    """
+    orderby = []
+    seen = set()
+    for col, direction in biquery.orderby:
+        if col not in seen:
+            seen.add(col)
+            orderby.append((col, direction.lower()))
+
+    return BIQuery(
+        dimensions=sorted(set(biquery.dimensions)),
+        metrics=sorted(set(biquery.metrics)),
+        filters=sorted(set(biquery.filters)),
+        metric_filters=sorted(set(biquery.metric_filters)),
+        orderby=orderby,
+        limit=biquery.limit,
+        offset=biquery.offset,
+        distinct=biquery.distinct,
+    )
+
+
+def canonical_key(biquery: BIQuery) -> tuple:
+    """Hashable key of the canonical form of a BIQuery, for in-process dictionaries."""
+    q = canonicalize_biquery(biquery)
+    return (
+        tuple(q.dimensions),
+        tuple(q.metrics),
+        tuple(q.filters),
+        tuple(q.metric_filters),
+        tuple(q.orderby),
+        q.limit,
+        q.offset,
+        q.distinct,
+    )
+
+
+def fingerprint_dimension(dimension: Dimension, data_model: DataModel) -> str:
+    return expr_digest(dimension.resolve(data_model))
+
+
+def fingerprint_metric(metric: Metric, data_model: DataModel, semantic_model: SemanticModel) -> str:
+    return expr_digest(metric.resolve(data_model, semantic_model))
+
+
+def fingerprint_filter(filter: Filter, data_model: DataModel, semantic_model: SemanticModel) -> str:
+    return expr_digest(filter.resolve(data_model, semantic_model))
+
+
+def fingerprint_biquery(biquery: BIQuery, semantic_model: SemanticModel, data_model: DataModel) -> str:
+    """
+    Digest of the canonical query and the definitions of every semantic object it references.
+    It is stable across processes and changes whenever a referenced definition changes,
+    so it can key result, compile and plan caches without tracking model versions.
+    Unknown names are kept in the digest as undefined so the fingerprint is always computable.
+    """
+    q = canonicalize_biquery(biquery)
+    definitions: dict[str, str | None] = {}
+
+    for name in q.dimensions:
+        dim = semantic_model.get_dimension(name)
+        definitions[f"dimension:{name}"] = fingerprint_dimension(dim, data_model) if dim else None
+
+    for name in q.metrics:
+        metric = semantic_model.get_metric(name)
+        definitions[f"metric:{name}"] = fingerprint_metric(metric, data_model, semantic_model) if metric else None
+
+    for name in q.filters + q.metric_filters:
+        filter_obj = semantic_model.get_filter(name)
+        definitions[f"filter:{name}"] = (
+            fingerprint_filter(filter_obj, data_model, semantic_model) if filter_obj else None
+        )
+
+    for col, _ in q.orderby:
+        if f"dimension:{col}" in definitions or f"metric:{col}" in definitions:
+            continue
+        obj = semantic_model.get_dimension(col) or semantic_model.get_metric(col)
+        if isinstance(obj, Dimension):
+            definitions[f"dimension:{col}"] = fingerprint_dimension(obj, data_model)
+        elif isinstance(obj, Metric):
+            definitions[f"metric:{col}"] = fingerprint_metric(obj, data_model, semantic_model)
+        else:
+            definitions[f"orderby:{col}"] = None
+
+    payload = json.dumps({"query": asdict(q), "definitions": definitions}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
@@ -1,4 +1,4 @@
-from biquery import BIQuery
+from .biquery import BIQuery
 from ..errors import DataChainError
 
 def validate_biquery(biquery: BIQuery) -> list[DataChainError]:
@@ -14,9 +14,8 @@ def validate_biquery(biquery: BIQuery) -> list[DataChainError]:
             )
         )
 
-    biquery.orderby = [(col, direction.lower()) for col, direction in biquery.orderby]
     for col, direction in biquery.orderby:
-        if direction not in ("asc", "desc"):
+        if direction.lower() not in ("asc", "desc"):
             errors.append(
                 DataChainError(
                     stage="validate_structure",
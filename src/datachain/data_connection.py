@@ -1,5 +1,6 @@
 from typing import Protocol, Any
 import ibis.expr.types as ir
+import pyarrow as pa
 
 # The below is just duck typing to create a consistent interface around Ibis connections
 
@@ -13,6 +14,8 @@ class IbisConnection(Protocol):
 
     def execute(self, query: ir.Expr) -> Any:...
 
+    def to_pyarrow(self, query: ir.Expr) -> pa.Table:...
+
 
 class DataConnection(IbisConnection):
     """Wrapper around an Ibis connection to provide a consistent interface."""
@@ -30,4 +33,7 @@ class DataConnection(IbisConnection):
         return self.conn.table(name)
 
     def execute(self, query: ir.Expr) -> Any:
-        return self.conn.execute(query)
\ No newline at end of file
+        return self.conn.execute(query)
+
+    def to_pyarrow(self, query: ir.Expr) -> pa.Table:
+        return self.conn.to_pyarrow(query)
\ No newline at end of file
@@ -1,3 +1,5 @@
 from .data_model import DataModel, TableModel, Relationship, ColumnType
 from .semantic_model import SemanticModel, Metric, Dimension, Filter
-from .builder import ModelBuilder
\ No newline at end of file
+from .builder import ModelBuilder
+from .snapshot import ModelSnapshot, compile_snapshot, write_snapshot, load_snapshot
+from .registry import ModelRegistry, ModelVersion, ModelChange, ReloadResult
\ No newline at end of file
@@ -3,16 +3,22 @@ from .data_model import DataModel, TableModel, Relationship, ColumnType
 from typing import Callable
 import ibis.expr.types as ir
 from .semantic_model import SemanticModel, Metric, Dimension, Filter
+from ..data_connection import DataConnection
 
 class ModelBuilder:
-    def __init__(self):
+    def __init__(self, connection: DataConnection | None = None):
         self._data_model = DataModel()
         self._semantic_model = SemanticModel()
+        self._connection = connection
 
     @property
     def data_model(self) -> DataModel:
         return self._data_model
 
+    @property
+    def semantic_model(self) -> SemanticModel:
+        return self._semantic_model
+
     def table(self, name: str) -> TableModel:
         """Decorator to create a table model from a function."""
         def decorator(func: Callable[[], dict[str, ColumnType]]) -> TableModel:
@@ -22,6 +28,15 @@ class ModelBuilder:
             return table_model
         return decorator
 
+    def lazy_table(self, name: str, connection: DataConnection | None = None) -> TableModel:
+        """Declare a table by name only; its schema is fetched from the connection on first use."""
+        connection = connection or self._connection
+        if connection is None:
+            raise ValueError(f"Lazy table '{name}' needs a connection to introspect its schema")
+        table_model = TableModel(name=name, connection=connection)
+        self._data_model.register_table(table_model)
+        return table_model
+
     def relationship(self, left: TableModel, right: TableModel, how: str = "left"):
         """Decorator to create a relationship between two table models."""
         def decorator(
@@ -1,24 +1,70 @@
+import weakref
 from dataclasses import dataclass, field
 import ibis.expr.types as ir
 import ibis
 from typing import Literal, Callable
 import ibis.expr.types as ir
+from ..data_connection import DataConnection
 
 ColumnType = Literal["int64", "float64", "string", "boolean", "timestamp"]
 
-@dataclass
+
+@dataclass(eq=False)
 class TableModel:
+    """
+    A table in the data model. Tables declared with a connection and no schema are
+    introspected from the connection on first use; the fetched schema is cached
+    against the table version so bumping the version refetches it. Introspected
+    columns keep the warehouse type as an ibis type string (e.g. "decimal(10, 2)",
+    "date" or "json"), which may lie outside ColumnType.
+    """
     name: str
-    schema: dict[str, ColumnType]
+    schema: dict[str, ColumnType | str] | None = None
+    connection: DataConnection | None = field(default=None, repr=False, compare=False)
+    version: int = 0
     _ibis_table: ir.Table = field(init=False, repr=False, default=None)
+    _schema_version: int | None = field(init=False, repr=False, compare=False, default=None)
+    _models: weakref.WeakSet = field(init=False, repr=False, compare=False, default_factory=weakref.WeakSet)
+
+    @property
+    def is_lazy(self) -> bool:
+        return self.connection is not None
+
+    def get_schema(self) -> dict[str, ColumnType | str]:
+        if self.is_lazy and (self.schema is None or self._schema_version != self.version):
+            schema = self.connection.table(self.name).schema()
+            self.schema = {column: str(dtype) for column, dtype in schema.items()}
+            self._schema_version = self.version
+            self._ibis_table = None
+        return self.schema
+
+    def refresh(self):
+        """
+        Bump the version so the next access rebuilds the table (and refetches a lazy schema).
+        Semantic expressions resolved against the data models holding this table are rebuilt too.
+        """
+        self.version += 1
+        self._ibis_table = None
+        for model in self._models:
+            model._revision += 1
 
     def ibis(self) -> ir.Table:
+        schema = self.get_schema()
         if self._ibis_table is None:
-            self._ibis_table = ibis.table(self.schema, name=self.name)
+            self._ibis_table = ibis.table(schema, name=self.name)
         return self._ibis_table
 
     def __getitem__(self, key: str) -> ir.Column:
         return self.ibis()[key]
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_models"]  # weak references cannot be pickled; DataModel re-links on load
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._models = weakref.WeakSet()
     
 @dataclass(frozen=True)
 class Relationship:
@@ -26,6 +72,7 @@ class Relationship:
     right: TableModel
     on: Callable[[TableModel, TableModel], ir.BooleanValue]
     how: str = "left"
+    version: int = 0
 
 class DataModel():
     def __init__(
@@ -33,6 +80,21 @@ class DataModel():
     ):
         self._tables: dict[str, TableModel] = {}
         self._relationships: list[Relationship] = []
+        self._graph_cache: dict[bool, dict[str, list[Relationship]]] = {}
+        self._revision = 0
+
+    @property
+    def version(self) -> int:
+        """
+        Changes whenever a table or relationship is registered or a table is refreshed.
+        Resolved semantic expressions are cached against it.
+        """
+        return self._revision
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        for table in self._tables.values():
+            table._models.add(self)
 
     def __getitem__(self, key: str) -> TableModel:
         return self.get_table(key)
@@ -42,14 +104,29 @@ class DataModel():
     
     def register_table(self, table: TableModel):
         self._tables[table.name] = table
+        table._models.add(self)
+        self._revision += 1
+        self._graph_cache.clear()
 
     def register_relationship(self, relationship: Relationship):
         self._relationships.append(relationship)
+        self._revision += 1
+        self._graph_cache.clear()
 
     def get_relationship_graph(self, directed: bool = True) -> dict[str, list[Relationship]]:
+        if directed in self._graph_cache:
+            return self._graph_cache[directed]
         graph = {table.name: [] for table in self._tables.values()}
         for rel in self._relationships:
             graph[rel.left.name].append(rel)
             if not directed:
                 graph[rel.right.name].append(rel)
-        return graph
\ No newline at end of file
+        self._graph_cache[directed] = graph
+        return graph
+
+    def set_relationship_graph(self, graph: dict[str, list[Relationship]], directed: bool = True):
+        """Install a precomputed relationship graph, e.g. one restored from a snapshot."""
+        unknown = set(graph) - set(self._tables)
+        if unknown:
+            raise ValueError(f"Relationship graph references unknown tables: {sorted(unknown)}")
+        self._graph_cache[directed] = graph
\ No newline at end of file
@@ -0,0 +1,39 @@
+import hashlib
+from collections.abc import Mapping
+import ibis.expr.types as ir
+
+# Python's hash() is salted per process, so Ibis' own node hashes cannot be used
+# as keys that outlive the process. These digests walk the expression structure instead.
+
+def expr_digest(expr: ir.Expr) -> str:
+    """Stable structural digest of an Ibis expression, identical across processes."""
+    return _digest(expr.op(), {})
+
+def _digest(value, memo: dict[int, str]) -> str:
+    key = id(value)
+    if key in memo:
+        return memo[key]
+
+    h = hashlib.sha256()
+    h.update(f"{type(value).__module__}.{type(value).__qualname__}".encode())
+
+    if hasattr(value, "__argnames__") and hasattr(value, "__args__"):
+        for name, arg in zip(value.__argnames__, value.__args__):
+            h.update(name.encode())
+            h.update(_digest(arg, memo).encode())
+    elif isinstance(value, Mapping):
+        for k, v in value.items():
+            h.update(_digest(k, memo).encode())
+            h.update(_digest(v, memo).encode())
+    elif isinstance(value, (tuple, list)):
+        for item in value:
+            h.update(_digest(item, memo).encode())
+    elif isinstance(value, (set, frozenset)):
+        for item in sorted(_digest(item, memo) for item in value):
+            h.update(item.encode())
+    else:
+        h.update(repr(value).encode())
+
+    digest = h.hexdigest()
+    memo[key] = digest
+    return digest
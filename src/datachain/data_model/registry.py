@@ -0,0 +1,253 @@
+import threading
+from dataclasses import dataclass, field, replace
+from typing import Literal
+import ibis.expr.types as ir
+from .builder import ModelBuilder
+from .data_model import DataModel, TableModel, Relationship
+from .semantic_model import SemanticModel, Metric, Dimension, Filter
+from ..errors import DataChainError
+
+ObjectKind = Literal["table", "relationship", "metric", "dimension", "filter"]
+ChangeAction = Literal["added", "changed", "removed"]
+
+
+@dataclass(frozen=True)
+class ModelVersion:
+    """A consistent pair of models. Queries hold on to one for their whole lifetime."""
+    version: int
+    data_model: DataModel
+    semantic_model: SemanticModel
+
+
+@dataclass(frozen=True)
+class ModelChange:
+    kind: ObjectKind
+    name: str
+    action: ChangeAction
+
+
+@dataclass()
+class ReloadResult:
+    success: bool
+    model: ModelVersion
+    changes: list[ModelChange] = field(default_factory=list)
+    errors: list[DataChainError] = field(default_factory=list)
+
+
+class ModelRegistry:
+    """
+    Serves the live models and hot reloads them from a freshly executed ModelBuilder.
+    Unchanged objects are carried over as-is (keeping their versions and cached expressions),
+    only changed objects are revalidated, and the new ModelVersion is swapped in atomically.
+    The builder's own objects are never modified; changed objects are copied into the new version.
+    Pass the registry to QueryExecutor.from_registry to serve queries from the live models.
+    """
+    def __init__(self, builder: ModelBuilder):
+        self._lock = threading.Lock()
+        self._current = ModelVersion(version=1, data_model=builder.data_model, semantic_model=builder.semantic_model)
+
+    @property
+    def current(self) -> ModelVersion:
+        return self._current
+
+    def reload(self, builder: ModelBuilder) -> ReloadResult:
+        with self._lock:
+            live = self._current
+            changes: list[ModelChange] = []
+            errors: list[DataChainError] = []
+
+            data_model = DataModel()
+            changed_tables = self._merge_tables(live.data_model, builder.data_model, data_model, changes)
+            self._merge_relationships(live.data_model, builder.data_model, data_model, changes, errors)
+
+            semantic_model = SemanticModel()
+            self._merge_semantics(live, builder, data_model, semantic_model, changed_tables, changes, errors)
+
+            if errors:
+                return ReloadResult(success=False, model=live, changes=changes, errors=errors)
+
+            if changes:
+                self._current = ModelVersion(
+                    version=live.version + 1, data_model=data_model, semantic_model=semantic_model
+                )
+            return ReloadResult(success=True, model=self._current, changes=changes)
+
+    def _merge_tables(self, old: DataModel, new: DataModel, merged: DataModel, changes: list[ModelChange]) -> set[str]:
+        changed: set[str] = set()
+        for name, table in new._tables.items():
+            previous = old.get_table(name)
+            if previous is not None and _same_table(previous, table):
+                merged.register_table(previous)
+                continue
+            merged.register_table(replace(table, version=previous.version + 1 if previous else table.version))
+            changed.add(name)
+            changes.append(ModelChange("table", name, "changed" if previous else "added"))
+
+        for name in old._tables.keys() - new._tables.keys():
+            changed.add(name)
+            changes.append(ModelChange("table", name, "removed"))
+        return changed
+
+    def _merge_relationships(
+        self,
+        old: DataModel,
+        new: DataModel,
+        merged: DataModel,
+        changes: list[ModelChange],
+        errors: list[DataChainError],
+    ):
+        # Several relationships may join the same pair of tables, so each one is
+        # identified by its tables and the name of the function that defines it.
+        previous: dict[tuple[str, str, str], list[Relationship]] = {}
+        for rel in old._relationships:
+            previous.setdefault(_relationship_key(rel), []).append(rel)
+
+        built: list[tuple[tuple[str, str, str], Relationship, ir.BooleanValue]] = []
+        for rel in new._relationships:
+            key = _relationship_key(rel)
+            left, right = merged.get_table(key[0]), merged.get_table(key[1])
+            if left is None or right is None:
+                errors.append(DataChainError(
+                    stage="reload",
+                    code="table_not_found",
+                    message=f"Relationship '{_relationship_name(key)}' references a table that is not in the data model.",
+                ))
+                continue
+
+            rel = replace(rel, left=left, right=right)
+            try:
+                built.append((key, rel, rel.on(left, right)))
+            except Exception as e:
+                errors.append(DataChainError(
+                    stage="reload",
+                    code="invalid_definition",
+                    message=f"Relationship '{_relationship_name(key)}' could not be built: {e}",
+                ))
+
+        # Pair identical definitions first, so reordering them is not a change
+        unchanged: dict[int, Relationship] = {}
+        for i, (key, rel, on) in enumerate(built):
+            candidates = previous.get(key, [])
+            for old_rel in candidates:
+                if old_rel.how == rel.how and old_rel.on(old_rel.left, old_rel.right).equals(on):
+                    candidates.remove(old_rel)
+                    unchanged[i] = old_rel
+                    break
+
+        for i, (key, rel, _) in enumerate(built):
+            if i in unchanged:
+                merged.register_relationship(unchanged[i])
+                continue
+            candidates = previous.get(key)
+            old_rel = candidates.pop(0) if candidates else None
+            if old_rel is not None:
+                rel = replace(rel, version=old_rel.version + 1)
+            merged.register_relationship(rel)
+            changes.append(ModelChange("relationship", _relationship_name(key), "changed" if old_rel else "added"))
+
+        for key, rels in previous.items():
+            changes.extend(ModelChange("relationship", _relationship_name(key), "removed") for _ in rels)
+
+    def _merge_semantics(
+        self,
+        live: ModelVersion,
+        builder: ModelBuilder,
+        data_model: DataModel,
+        semantic_model: SemanticModel,
+        changed_tables: set[str],
+        changes: list[ModelChange],
+        errors: list[DataChainError],
+    ):
+        old_sm, new_sm = live.semantic_model, builder.semantic_model
+
+        # New definitions are resolved as copies, so the builder's objects keep their caches
+        candidates = SemanticModel()
+        for metric in new_sm._metrics.values():
+            candidates.register_metric(replace(metric, _cached_expr=None))
+        for metric in candidates._metrics.values():
+            metric.dependencies = [candidates.get_metric(dep.name) or dep for dep in metric.dependencies]
+        for dimension in new_sm._dimensions.values():
+            candidates.register_dimension(replace(dimension, _cached_expr=None))
+        for filter in new_sm._filters.values():
+            candidates.register_filter(replace(filter, _cached_expr=None))
+
+        sections = (
+            ("metric", old_sm._metrics, candidates._metrics, semantic_model.register_metric),
+            ("dimension", old_sm._dimensions, candidates._dimensions, semantic_model.register_dimension),
+            ("filter", old_sm._filters, candidates._filters, semantic_model.register_filter),
+        )
+
+        for kind, old_objects, new_objects, register in sections:
+            for name, obj in new_objects.items():
+                try:
+                    # New definitions are resolved against the merged data model so unchanged
+                    # tables keep their identity and cached Ibis tables
+                    expr = _resolve(obj, data_model, candidates)
+                except Exception as e:
+                    errors.append(DataChainError(
+                        stage="reload",
+                        code="invalid_definition",
+                        message=f"The {kind} '{name}' could not be resolved: {e}",
+                    ))
+                    continue
+
+                previous = old_objects.get(name)
+                unchanged = (
+                    previous is not None
+                    and _resolve(previous, live.data_model, old_sm).equals(expr)
+                    and not _tables_in(expr) & changed_tables
+                )
+                if unchanged:
+                    register(previous)
+                    continue
+
+                errors.extend(_validate_tables(kind, name, expr, data_model))
+                if previous is not None:
+                    obj.version = previous.version + 1
+                register(obj)
+                changes.append(ModelChange(kind, name, "changed" if previous else "added"))
+
+            for name in old_objects.keys() - new_objects.keys():
+                changes.append(ModelChange(kind, name, "removed"))
+
+        # Point the dependencies of changed metrics at the objects that are now live
+        for metric in semantic_model._metrics.values():
+            if old_sm.get_metric(metric.name) is not metric:
+                metric.dependencies = [semantic_model.get_metric(dep.name) or dep for dep in metric.dependencies]
+
+
+def _same_table(old: TableModel, new: TableModel) -> bool:
+    if old.is_lazy or new.is_lazy:
+        return old.is_lazy and new.is_lazy and old.connection is new.connection
+    return old.schema == new.schema
+
+
+def _relationship_key(rel: Relationship) -> tuple[str, str, str]:
+    return rel.left.name, rel.right.name, getattr(rel.on, "__name__", "")
+
+
+def _relationship_name(key: tuple[str, str, str]) -> str:
+    left, right, function = key
+    return f"{left} -> {right} ({function})" if function else f"{left} -> {right}"
+
+
+def _resolve(obj: Metric | Dimension | Filter, data_model: DataModel, semantic_model: SemanticModel) -> ir.Expr:
+    if isinstance(obj, Dimension):
+        return obj.resolve(data_model)
+    return obj.resolve(data_model, semantic_model)
+
+
+def _tables_in(expr: ir.Expr) -> set[str]:
+    return {relation.name for relation in expr.op().relations}
+
+
+def _validate_tables(kind: str, name: str, expr: ir.Expr, data_model: DataModel) -> list[DataChainError]:
+    return [
+        DataChainError(
+            stage="reload",
+            code="table_not_found",
+            message=f"The {kind} '{name}' references table '{table}' which is not in the data model.",
+        )
+        for table in sorted(_tables_in(expr))
+        if data_model.get_table(table) is None
+    ]
@@ -11,12 +11,17 @@ class Dimension(Generic[ExprT]):
     name: str
     expression: Callable[[DataModel], ExprT]
     _cached_expr: ExprT | None = None
+    version: int = 0
+    _cached_version: int | None = field(default=None, repr=False, compare=False)
 
     def resolve(self, data_model: DataModel) -> ExprT:
-        if self._cached_expr is not None:
+        # Cached against the data model version so refreshed tables are picked up
+        data_version = data_model.version
+        if self._cached_expr is not None and self._cached_version == data_version:
             return self._cached_expr
         expr = self.expression(data_model)
         self._cached_expr = expr
+        self._cached_version = data_version
         return expr
 
 @dataclass()
@@ -27,15 +32,19 @@ class Metric(Generic[ExprT]):
     dependencies: list["Metric"]
     expression: Callable[[DataModel, "SemanticModel"], ExprT]
     _cached_expr: ExprT | None = None
+    version: int = 0
+    _cached_version: int | None = field(default=None, repr=False, compare=False)
 
     def resolve(self, data_model: DataModel, semantic_model: "SemanticModel") -> ExprT:
-        if self._cached_expr is not None:
+        data_version = data_model.version
+        if self._cached_expr is not None and self._cached_version == data_version:
             return self._cached_expr
         # resolve dependencies first
         for dep in self.dependencies:
             dep.resolve(data_model, semantic_model)
         expr = self.expression(data_model, semantic_model)
         self._cached_expr = expr
+        self._cached_version = data_version
         return expr
 
 @dataclass()
@@ -43,12 +52,16 @@ class Filter():
     name: str
     expression: Callable[[DataModel, "SemanticModel"], ir.BooleanValue]
     _cached_expr: ir.BooleanValue | None = None
+    version: int = 0
+    _cached_version: int | None = field(default=None, repr=False, compare=False)
 
     def resolve(self, data_model: DataModel, semantic_model: "SemanticModel") -> ir.BooleanValue:
-        if self._cached_expr is not None:
+        data_version = data_model.version
+        if self._cached_expr is not None and self._cached_version == data_version:
             return self._cached_expr
         expr = self.expression(data_model, semantic_model)
         self._cached_expr = expr
+        self._cached_version = data_version
         return expr
 
 
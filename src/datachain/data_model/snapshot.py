@@ -0,0 +1,266 @@
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+from dataclasses import dataclass, fields
+from types import MappingProxyType
+from typing import Mapping
+import ibis.expr.types as ir
+from .data_model import DataModel, TableModel, Relationship, ColumnType
+from .semantic_model import SemanticModel, Metric, Dimension, Filter
+from .digest import expr_digest
+from ..errors import SnapshotError
+
+SNAPSHOT_FORMAT_VERSION = 1
+_MAGIC = b"DATACHAIN-SNAPSHOT"
+
+
+class FrozenExpression:
+    """Stands in for a builder function and returns the expression captured at snapshot time."""
+    def __init__(self, expr: ir.Expr):
+        self.expr = expr
+
+    def __call__(self, *args) -> ir.Expr:
+        return self.expr
+
+
+@dataclass(frozen=True)
+class RelationshipDef:
+    left: str
+    right: str
+    how: str
+    on: ir.BooleanValue
+
+
+@dataclass(frozen=True)
+class MetricDef:
+    name: str
+    grain: str
+    dependencies: tuple[str, ...]
+    expression: ir.Value
+
+
+@dataclass(frozen=True)
+class ExpressionDef:
+    name: str
+    expression: ir.Value
+
+
+@dataclass(frozen=True)
+class ModelSnapshot:
+    """Immutable, fully resolved copy of a DataModel and SemanticModel."""
+    model_version: str
+    schemas: Mapping[str, Mapping[str, ColumnType | str]]
+    relationships: tuple[RelationshipDef, ...]
+    join_index: Mapping[str, tuple[int, ...]]  # table name -> indices of outgoing relationships
+    metrics: tuple[MetricDef, ...]
+    dimensions: tuple[ExpressionDef, ...]
+    filters: tuple[ExpressionDef, ...]
+    checksum: str
+    format_version: int = SNAPSHOT_FORMAT_VERSION
+
+    def __post_init__(self):
+        schemas = {name: MappingProxyType(dict(schema)) for name, schema in self.schemas.items()}
+        object.__setattr__(self, "schemas", MappingProxyType(schemas))
+        object.__setattr__(self, "join_index", MappingProxyType(dict(self.join_index)))
+
+    def __reduce__(self):
+        # mappingproxy cannot be pickled, so plain dicts are stored and re-wrapped on load
+        values = {f.name: getattr(self, f.name) for f in fields(self)}
+        values["schemas"] = {name: dict(schema) for name, schema in self.schemas.items()}
+        values["join_index"] = dict(self.join_index)
+        return (_restore_snapshot, (values,))
+
+    def to_models(self) -> tuple[DataModel, SemanticModel]:
+        """Rebuild live models without re-running any builder functions."""
+        data_model = DataModel()
+        tables = {name: TableModel(name=name, schema=dict(schema)) for name, schema in self.schemas.items()}
+        for table in tables.values():
+            data_model.register_table(table)
+
+        relationships = [
+            Relationship(left=tables[rel.left], right=tables[rel.right], on=FrozenExpression(rel.on), how=rel.how)
+            for rel in self.relationships
+        ]
+        for rel in relationships:
+            data_model.register_relationship(rel)
+        data_model.set_relationship_graph({
+            name: [relationships[i] for i in indices] for name, indices in self.join_index.items()
+        })
+
+        semantic_model = SemanticModel()
+        metrics: dict[str, Metric] = {}
+        for m in self.metrics:
+            metric = Metric(
+                name=m.name,
+                grain=m.grain,
+                dependencies=[metrics[dep] for dep in m.dependencies],
+                expression=FrozenExpression(m.expression),
+                _cached_expr=m.expression,
+            )
+            metrics[m.name] = metric
+            semantic_model.register_metric(metric)
+
+        for d in self.dimensions:
+            semantic_model.register_dimension(
+                Dimension(name=d.name, expression=FrozenExpression(d.expression), _cached_expr=d.expression)
+            )
+
+        for f in self.filters:
+            semantic_model.register_filter(
+                Filter(name=f.name, expression=FrozenExpression(f.expression), _cached_expr=f.expression)
+            )
+
+        return data_model, semantic_model
+
+
+def compile_snapshot(data_model: DataModel, semantic_model: SemanticModel, model_version: str = "") -> ModelSnapshot:
+    """Resolve every object in the models and capture the result as a ModelSnapshot."""
+    schemas = {name: dict(table.get_schema()) for name, table in data_model._tables.items()}
+
+    relationships = tuple(
+        RelationshipDef(left=rel.left.name, right=rel.right.name, how=rel.how, on=rel.on(rel.left, rel.right))
+        for rel in data_model._relationships
+    )
+    index_of = {id(rel): i for i, rel in enumerate(data_model._relationships)}
+    join_index = {
+        name: tuple(index_of[id(rel)] for rel in rels)
+        for name, rels in data_model.get_relationship_graph().items()
+    }
+
+    metrics = tuple(
+        MetricDef(
+            name=metric.name,
+            grain=metric.grain,
+            dependencies=tuple(dep.name for dep in metric.dependencies),
+            expression=metric.resolve(data_model, semantic_model),
+        )
+        for metric in _dependency_order(semantic_model._metrics.values())
+    )
+    dimensions = tuple(
+        ExpressionDef(name=dim.name, expression=dim.resolve(data_model))
+        for dim in semantic_model._dimensions.values()
+    )
+    filters = tuple(
+        ExpressionDef(name=f.name, expression=f.resolve(data_model, semantic_model))
+        for f in semantic_model._filters.values()
+    )
+
+    checksum = _definitions_checksum(schemas, relationships, metrics, dimensions, filters)
+
+    return ModelSnapshot(
+        model_version=model_version,
+        schemas=schemas,
+        relationships=relationships,
+        join_index=join_index,
+        metrics=metrics,
+        dimensions=dimensions,
+        filters=filters,
+        checksum=checksum,
+    )
+
+
+def write_snapshot(snapshot: ModelSnapshot, path: str | os.PathLike) -> None:
+    """Atomically write the snapshot so concurrently booting workers never read a partial file."""
+    payload = pickle.dumps(snapshot, protocol=pickle.HIGHEST_PROTOCOL)
+    header = json.dumps({
+        "format_version": snapshot.format_version,
+        "model_version": snapshot.model_version,
+        "checksum": snapshot.checksum,
+        "payload_sha256": hashlib.sha256(payload).hexdigest(),
+    }).encode()
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".snapshot-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_MAGIC + b"\n" + header + b"\n" + payload)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def load_snapshot(
+    path: str | os.PathLike,
+    expected_checksum: str | None = None,
+    expected_model_version: str | None = None,
+) -> ModelSnapshot:
+    """
+    Load a snapshot written by write_snapshot.
+    Raises SnapshotError if the file is corrupt, was written by another format version,
+    its definitions no longer match its checksum, or it was built for a different
+    model version or definitions checksum than the expected ones.
+    """
+    with open(path, "rb") as f:
+        magic = f.readline().rstrip(b"\n")
+        if magic != _MAGIC:
+            raise SnapshotError(f"{path} is not a datachain snapshot")
+        try:
+            header = json.loads(f.readline())
+        except ValueError as e:
+            raise SnapshotError(f"Snapshot header in {path} is unreadable") from e
+        payload = f.read()
+
+    if header.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+        raise SnapshotError(
+            f"Snapshot format version {header.get('format_version')} is not supported "
+            f"(expected {SNAPSHOT_FORMAT_VERSION})"
+        )
+    if hashlib.sha256(payload).hexdigest() != header.get("payload_sha256"):
+        raise SnapshotError(f"Snapshot payload in {path} is corrupt")
+    if expected_model_version is not None and header.get("model_version") != expected_model_version:
+        raise SnapshotError(
+            f"Snapshot {path} is stale: model version {header.get('model_version')!r} "
+            f"does not match {expected_model_version!r}"
+        )
+    if expected_checksum is not None and header.get("checksum") != expected_checksum:
+        raise SnapshotError(
+            f"Snapshot {path} is stale: checksum {header.get('checksum')} does not match {expected_checksum}"
+        )
+
+    try:
+        snapshot = pickle.loads(payload)
+    except Exception as e:
+        raise SnapshotError(f"Snapshot payload in {path} is unreadable") from e
+    if (snapshot.model_version, snapshot.checksum) != (header.get("model_version"), header.get("checksum")):
+        raise SnapshotError(f"Snapshot header in {path} does not describe its payload")
+    checksum = _definitions_checksum(
+        snapshot.schemas, snapshot.relationships, snapshot.metrics, snapshot.dimensions, snapshot.filters
+    )
+    if checksum != snapshot.checksum:
+        raise SnapshotError(f"Snapshot {path} definitions do not match checksum {snapshot.checksum}")
+    return snapshot
+
+
+def _restore_snapshot(values: dict) -> ModelSnapshot:
+    return ModelSnapshot(**values)
+
+
+def _dependency_order(metrics) -> list[Metric]:
+    """Order metrics so that every dependency precedes the metrics built on it."""
+    ordered: dict[str, Metric] = {}
+
+    def visit(metric: Metric):
+        if metric.name in ordered:
+            return
+        for dep in metric.dependencies:
+            visit(dep)
+        ordered[metric.name] = metric
+
+    for metric in metrics:
+        visit(metric)
+    return list(ordered.values())
+
+
+def _definitions_checksum(schemas, relationships, metrics, dimensions, filters) -> str:
+    definitions = {
+        "format_version": SNAPSHOT_FORMAT_VERSION,
+        "schemas": {name: dict(schema) for name, schema in schemas.items()},
+        "relationships": [[r.left, r.right, r.how, expr_digest(r.on)] for r in relationships],
+        "metrics": [[m.name, m.grain, list(m.dependencies), expr_digest(m.expression)] for m in metrics],
+        "dimensions": [[d.name, expr_digest(d.expression)] for d in dimensions],
+        "filters": [[f.name, expr_digest(f.expression)] for f in filters],
+    }
+    return hashlib.sha256(json.dumps(definitions, sort_keys=True).encode()).hexdigest()
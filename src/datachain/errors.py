@@ -1,7 +1,7 @@
 from dataclasses import dataclass
 from typing_extensions import Literal
 
-ErrorStage = Literal["validate_structure", "resolve", "plan", "execute"]
+ErrorStage = Literal["validate_structure", "resolve", "plan", "execute", "reload"]
 ErrorCode = Literal[
     "no_dimensions_or_metrics",
     "no_common_table",
@@ -9,6 +9,11 @@ ErrorCode = Literal[
     "metric_not_found",
     "filter_not_found",
     "metric_filter_not_found",
+    "table_not_found",
+    "invalid_definition",
+    "execution_failed",
+    "invalid_cursor",
+    "cursor_expired",
 ]
 
 @dataclass(frozen=True)
@@ -19,3 +24,7 @@ class DataChainError(Exception):
     message: str
     hint: str | None = None
     details: dict | None = None
+
+
+class SnapshotError(Exception):
+    """Raised when a model snapshot is corrupt, stale or written by an incompatible version"""
@@ -0,0 +1,9 @@
+from .executor import QueryExecutor, ExecutionResult
+from .result_cache import ResultCache, CachedResult
+from .hooks import HookRegistry, StageEvent, STAGES
+from .query_log import QueryLog, QueryLogEntry, LatencyHistogram
+from .prefetch import Prefetcher, PrefetchStats, suggest_followups
+from .pagination import CursorStore, PageResult
+from .downsample import Downsample, lttb_indices, minmax_indices
+from .profile import ProfileResult, ResultProfile, ColumnProfile
+from .encoding import encode_columnar, encode_result, decode_columnar
\ No newline at end of file
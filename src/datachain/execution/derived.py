@@ -0,0 +1,62 @@
+import ibis.expr.operations as ops
+import pyarrow as pa
+import pyarrow.compute as pc
+from ..data_model import Metric
+
+# Derived metrics that are pure arithmetic over their dependencies can be evaluated on
+# already aggregated columns instead of in the warehouse.
+
+_ARITHMETIC = {
+    ops.Add: pc.add,
+    ops.Subtract: pc.subtract,
+    ops.Multiply: pc.multiply,
+    ops.Divide: pc.divide,
+}
+
+
+def is_client_derivable(metric: Metric) -> bool:
+    """True if the resolved metric is arithmetic over its dependencies and literals only."""
+    if not metric.dependencies or metric._cached_expr is None:
+        return False
+    dependencies = {dep._cached_expr.op() for dep in metric.dependencies if dep._cached_expr is not None}
+    return _is_arithmetic(metric._cached_expr.op(), dependencies)
+
+
+def compute_derived(metric: Metric, columns: dict[str, pa.ChunkedArray]) -> pa.ChunkedArray:
+    """Evaluate a client derivable metric over columns holding its dependencies' aggregates."""
+    dependencies = {dep._cached_expr.op(): dep.name for dep in metric.dependencies}
+    node = metric._cached_expr.op()
+    result = _evaluate(node, dependencies, columns)
+    return pc.cast(result, node.dtype.to_pyarrow(), safe=False)
+
+
+def _is_arithmetic(node: ops.Node, dependencies: set[ops.Node]) -> bool:
+    if node in dependencies or isinstance(node, ops.Literal):
+        return True
+    if type(node) in _ARITHMETIC:
+        return _is_arithmetic(node.left, dependencies) and _is_arithmetic(node.right, dependencies)
+    if isinstance(node, (ops.Negate, ops.Cast)):
+        return _is_arithmetic(node.arg, dependencies)
+    return False
+
+
+def _evaluate(node: ops.Node, dependencies: dict[ops.Node, str], columns: dict[str, pa.ChunkedArray]):
+    if node in dependencies:
+        column = columns[dependencies[node]]
+        # Arrow decimal arithmetic widens precision until it overflows, so evaluate in floating point
+        return pc.cast(column, pa.float64()) if pa.types.is_decimal(column.type) else column
+    if isinstance(node, ops.Literal):
+        return pa.scalar(node.value, type=node.dtype.to_pyarrow())
+    if isinstance(node, ops.Negate):
+        return pc.negate(_evaluate(node.arg, dependencies, columns))
+    if isinstance(node, ops.Cast):
+        return pc.cast(_evaluate(node.arg, dependencies, columns), node.to.to_pyarrow())
+
+    left = _evaluate(node.left, dependencies, columns)
+    right = _evaluate(node.right, dependencies, columns)
+    if isinstance(node, ops.Divide):
+        # SQL division of integers is true division, and a zero denominator gives NULL
+        # as in the generated SQL (see null_on_zero_division) rather than inf or NaN
+        left, right = pc.cast(left, pa.float64()), pc.cast(right, pa.float64())
+        right = pc.if_else(pc.equal(right, 0), pa.scalar(None, pa.float64()), right)
+    return _ARITHMETIC[type(node)](left, right)
@@ -0,0 +1,144 @@
+from dataclasses import dataclass
+from typing import Literal
+import ibis
+import ibis.expr.types as ir
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Chart-bound results only need a few points per pixel column. Min/max bucketing keeps the
+# extremes of each x bucket and can run in the database as a bucketed window query; LTTB
+# (Largest Triangle Three Buckets) keeps the visually most significant point per bucket and
+# runs on the fetched result with NumPy.
+
+DownsampleMethod = Literal["minmax", "lttb"]
+
+_BUCKET = "__datachain_bucket"
+_LOWEST = "__datachain_lowest"
+_HIGHEST = "__datachain_highest"
+
+
+@dataclass(frozen=True)
+class Downsample:
+    """
+    Reduce each series of a result to about `points` points along `x`.
+    Series are told apart by the `series` columns; None means every dimension other than x.
+    """
+    x: str
+    y: str
+    points: int
+    method: DownsampleMethod = "minmax"
+    series: list[str] | None = None
+
+
+def minmax_expression(expr: ir.Table, x: str, y: str, points: int, series: list[str]) -> ir.Table:
+    """
+    Wrap a query so the database returns only the lowest and highest y of each of points // 2
+    equal-width x buckets per series, in x order.
+    """
+    buckets = max(1, points // 2)
+    expr = expr.filter(expr[x].notnull(), expr[y].notnull())
+    position = _numeric(expr[x])
+    window = ibis.window(group_by=series) if series else ibis.window()
+    low, high = position.min().over(window), position.max().over(window)
+    bucket = ((position - low) * buckets / (high - low).nullif(0)).floor().fill_null(0)
+    expr = expr.mutate(**{_BUCKET: ibis.least(bucket, buckets - 1)})
+
+    in_bucket = series + [_BUCKET]
+    expr = expr.mutate(**{
+        _LOWEST: ibis.row_number().over(group_by=in_bucket, order_by=[expr[y], expr[x]]),
+        _HIGHEST: ibis.row_number().over(group_by=in_bucket, order_by=[expr[y].desc(), expr[x]]),
+    })
+    expr = expr.filter((expr[_LOWEST] == 0) | (expr[_HIGHEST] == 0))
+    return expr.drop(_BUCKET, _LOWEST, _HIGHEST).order_by(series + [x])
+
+
+def downsample_table(table: pa.Table, x: str, y: str, points: int, method: DownsampleMethod, series: list[str]) -> pa.Table:
+    """Downsample an in-memory result; each series keeps about `points` rows, in x order."""
+    table = table.filter(pc.and_(pc.is_valid(table[x]), pc.is_valid(table[y])))
+    table = table.sort_by([(column, "ascending") for column in series + [x]])
+    if table.num_rows <= points:
+        return table
+
+    xs = _to_float(table[x])
+    ys = _to_float(table[y])
+    select = lttb_indices if method == "lttb" else minmax_indices
+    kept = [start + select(xs[start:end], ys[start:end], points) for start, end in _series_bounds(table, series)]
+    return table.take(pa.array(np.concatenate(kept)))
+
+
+def minmax_indices(x: np.ndarray, y: np.ndarray, points: int) -> np.ndarray:
+    """Positions of the lowest and highest y in each of points // 2 equal-width buckets of sorted x."""
+    if len(x) <= points:
+        return np.arange(len(x))
+    buckets = max(1, points // 2)
+    span = x[-1] - x[0]
+    bucket = np.zeros(len(x), dtype=np.int64) if span == 0 else np.minimum(((x - x[0]) * buckets / span).astype(np.int64), buckets - 1)
+    # Sort by bucket then y: the first and last row of each bucket run are its minimum and maximum
+    order = np.lexsort((y, bucket))
+    starts = np.flatnonzero(np.r_[True, np.diff(bucket[order]) != 0])
+    ends = np.r_[starts[1:], len(order)] - 1
+    return np.unique(np.concatenate([order[starts], order[ends]]))
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, points: int) -> np.ndarray:
+    """
+    Positions kept by Largest Triangle Three Buckets; the first and last points are always kept.
+    Each bucket's choice depends on the point kept in the bucket before it, so the buckets are
+    walked in a Python loop. The loop runs `points` times with vectorised work per bucket, so
+    its cost grows with the requested points (a chart's width), not with the result size.
+    """
+    size = len(x)
+    if points >= size or points < 3:
+        return np.arange(size)
+
+    # The points between the first and last are split into points - 2 buckets of near equal size
+    edges = np.linspace(1, size - 1, points - 1).astype(np.int64)
+    counts = np.diff(edges)
+    # Each bucket is weighed against the average of the next one; the last against the final point
+    next_x = np.append((np.add.reduceat(x[:-1], edges[:-1]) / counts)[1:], x[-1])
+    next_y = np.append((np.add.reduceat(y[:-1], edges[:-1]) / counts)[1:], y[-1])
+    kept = np.empty(points, dtype=np.int64)
+    kept[0], kept[-1] = 0, size - 1
+    anchor = 0
+    for i in range(points - 2):
+        start, end = edges[i], edges[i + 1]
+        # Twice the area of the triangle (anchor, candidate, next bucket average) for every candidate
+        area = np.abs(
+            (x[anchor] - next_x[i]) * (y[start:end] - y[anchor]) - (x[anchor] - x[start:end]) * (next_y[i] - y[anchor])
+        )
+        anchor = start + int(np.argmax(area))
+        kept[i + 1] = anchor
+    return kept
+
+
+def _numeric(column: ir.Column) -> ir.NumericValue:
+    dtype = column.type()
+    if dtype.is_date():
+        return column.cast("timestamp").epoch_seconds()
+    if dtype.is_timestamp():
+        return column.epoch_seconds()
+    return column
+
+
+def _to_float(column: pa.ChunkedArray) -> np.ndarray:
+    if pa.types.is_date32(column.type):
+        column = column.cast(pa.int32())
+    elif pa.types.is_temporal(column.type):
+        column = column.cast(pa.int64())
+    elif pa.types.is_decimal(column.type):
+        column = column.cast(pa.float64())
+    return column.to_numpy().astype(np.float64)
+
+
+def _series_bounds(table: pa.Table, series: list[str]) -> list[tuple[int, int]]:
+    """Row ranges of each series in a table sorted by its series columns."""
+    if not series:
+        return [(0, table.num_rows)]
+    changed = np.zeros(table.num_rows, dtype=bool)
+    changed[0] = True
+    for column in series:
+        codes = pc.fill_null(table[column].combine_chunks().dictionary_encode().indices, -1).to_numpy()
+        changed[1:] |= codes[1:] != codes[:-1]
+    starts = np.flatnonzero(changed)
+    return list(zip(starts.tolist(), np.r_[starts[1:], table.num_rows].tolist()))
@@ -0,0 +1,190 @@
+import json
+from dataclasses import dataclass
+from typing import Any
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Row-oriented JSON repeats every column name on every row. The columnar encoding below names
+# each column once, stores repeated values once in a per-column dictionary with integer codes,
+# rounds floating point values and marks anything cut short, so tool responses stay small.
+#
+#   {"columns": ["region", "revenue"], "types": ["string", "float"], "rows": 3,
+#    "data": [{"values": ["north", "south"], "codes": [0, 1, 0]}, [10.5, 5.25, 50.0]],
+#    "truncated": {"rows": 97}}
+#
+# Columns are prepared with Arrow compute kernels. encode_result also writes numeric arrays
+# to JSON text in Arrow, since formatting floats one by one dominates json.dumps.
+
+TRUNCATION_MARKER = "…"
+
+
+@dataclass(frozen=True)
+class _Plain:
+    values: pa.Array  # finite numbers, booleans or strings
+
+
+@dataclass(frozen=True)
+class _Dictionary:
+    values: pa.Array
+    codes: pa.Array
+
+
+@dataclass(frozen=True)
+class _EncodedColumn:
+    kind: str
+    data: _Plain | _Dictionary
+    shortened: bool = False
+
+
+def encode_columnar(
+    table: pa.Table,
+    max_rows: int | None = None,
+    float_digits: int = 2,
+    max_string_length: int | None = 80,
+) -> dict[str, Any]:
+    """
+    Encode a result column by column. Rows beyond max_rows are dropped and counted under
+    "truncated"; strings longer than max_string_length end in TRUNCATION_MARKER.
+    """
+    table, columns, truncated = _encode_table(table, max_rows, float_digits, max_string_length)
+    data = []
+    for column in columns:
+        if isinstance(column.data, _Dictionary):
+            data.append({"values": column.data.values.to_pylist(), "codes": column.data.codes.to_pylist()})
+        else:
+            data.append(column.data.values.to_pylist())
+    return _payload(table, columns, data, truncated)
+
+
+def encode_result(table: pa.Table, **options) -> str:
+    """encode_columnar serialised as compact JSON."""
+    table, columns, truncated = _encode_table(table, **options)
+    data = []
+    for column in columns:
+        if isinstance(column.data, _Dictionary):
+            data.append(f'{{"values":{_json_array(column.data.values)},"codes":{_json_array(column.data.codes)}}}')
+        else:
+            data.append(_json_array(column.data.values))
+    # The data is spliced in as pre-rendered JSON through a placeholder
+    text = json.dumps(_payload(table, columns, 0, truncated), separators=(",", ":"), ensure_ascii=False)
+    return text.replace('"data":0', f'"data":[{",".join(data)}]', 1)
+
+
+def decode_columnar(payload: dict[str, Any]) -> pa.Table:
+    """Rebuild a table from encode_columnar output; dates and times come back as ISO strings."""
+    columns = {}
+    for name, encoded in zip(payload["columns"], payload["data"]):
+        if isinstance(encoded, dict):
+            codes = pa.array(encoded["codes"], pa.int32())
+            columns[name] = pa.DictionaryArray.from_arrays(codes, pa.array(encoded["values"])).dictionary_decode()
+        else:
+            columns[name] = pa.array(encoded)
+    return pa.table(columns)
+
+
+def _payload(table: pa.Table, columns: list[_EncodedColumn], data: Any, truncated: dict[str, Any]) -> dict[str, Any]:
+    payload = {
+        "columns": table.column_names,
+        "types": [column.kind for column in columns],
+        "rows": table.num_rows,
+        "data": data,
+    }
+    if truncated:
+        payload["truncated"] = truncated
+    return payload
+
+
+def _encode_table(
+    table: pa.Table,
+    max_rows: int | None = None,
+    float_digits: int = 2,
+    max_string_length: int | None = 80,
+) -> tuple[pa.Table, list[_EncodedColumn], dict[str, Any]]:
+    truncated: dict[str, Any] = {}
+    if max_rows is not None and table.num_rows > max_rows:
+        truncated["rows"] = table.num_rows - max_rows
+        table = table.slice(0, max_rows)
+
+    columns = [_encode_column(table[name].combine_chunks(), float_digits, max_string_length) for name in table.column_names]
+    shortened = [name for name, column in zip(table.column_names, columns) if column.shortened]
+    if shortened:
+        truncated["strings"] = shortened
+    return table, columns, truncated
+
+
+def _encode_column(column: pa.Array, float_digits: int, max_string_length: int | None) -> _EncodedColumn:
+    dtype = column.type
+    if pa.types.is_dictionary(dtype):
+        column = column.dictionary_decode()
+        dtype = column.type
+
+    if pa.types.is_boolean(dtype):
+        return _EncodedColumn("boolean", _Plain(column))
+    if pa.types.is_integer(dtype):
+        return _EncodedColumn("integer", _Plain(column))
+    if pa.types.is_floating(dtype) or pa.types.is_decimal(dtype):
+        values = pc.round(column.cast(pa.float64()), float_digits)
+        # JSON has no NaN or infinity, so they are sent as null
+        values = pc.if_else(pc.is_finite(values), values, pa.scalar(None, pa.float64()))
+        return _EncodedColumn("float", _Plain(values))
+    if pa.types.is_date(dtype) or pa.types.is_timestamp(dtype):
+        return _encode_temporal(column)
+    if pa.types.is_string(dtype) or pa.types.is_large_string(dtype):
+        return _encode_strings(column.cast(pa.string()), max_string_length)
+    return _EncodedColumn(str(dtype), _dictionary_or_plain(column.cast(pa.string())))
+
+
+def _encode_temporal(column: pa.Array) -> _EncodedColumn:
+    # Results are grouped on time dimensions, so values repeat and only the distinct ones are formatted
+    encoded = column.dictionary_encode()
+    distinct = encoded.dictionary
+    if pa.types.is_date(distinct.type):
+        kind, fmt = "date", "%Y-%m-%d"
+        distinct = distinct.cast(pa.timestamp("s"))
+    else:
+        # Timestamps that all fall on midnight (truncated to a day or coarser) are written as dates
+        is_date = pc.all(pc.equal(pc.floor_temporal(distinct, unit="day"), distinct)).as_py() is not False
+        kind, fmt = ("date", "%Y-%m-%d") if is_date else ("timestamp", "%Y-%m-%dT%H:%M:%S")
+        # Second precision; Arrow would otherwise print the fractional seconds of the column's unit
+        distinct = distinct.cast(pa.timestamp("s", distinct.type.tz), safe=False)
+    formatted = pc.strftime(distinct, fmt)
+    if _pays_off(formatted, column):
+        return _EncodedColumn(kind, _Dictionary(formatted, encoded.indices))
+    return _EncodedColumn(kind, _Plain(pc.take(formatted, encoded.indices)))
+
+
+def _encode_strings(column: pa.Array, max_string_length: int | None) -> _EncodedColumn:
+    shortened = False
+    if max_string_length is not None:
+        too_long = pc.greater(pc.utf8_length(column), max_string_length)
+        if pc.any(too_long).as_py():
+            shortened = True
+            cut = pc.binary_join_element_wise(
+                pc.utf8_slice_codeunits(column, 0, max_string_length - 1), TRUNCATION_MARKER, ""
+            )
+            column = pc.if_else(too_long, cut, column)
+    return _EncodedColumn("string", _dictionary_or_plain(column), shortened)
+
+
+def _dictionary_or_plain(column: pa.Array) -> _Plain | _Dictionary:
+    encoded = column.dictionary_encode()
+    if _pays_off(encoded.dictionary, column):
+        return _Dictionary(encoded.dictionary, encoded.indices)
+    return _Plain(column)
+
+
+def _pays_off(distinct: pa.Array, column: pa.Array) -> bool:
+    """A dictionary only pays off when values repeat."""
+    return 0 < len(distinct) * 2 <= len(column) - column.null_count
+
+
+def _json_array(values: pa.Array) -> str:
+    """Render an Arrow array as a JSON array; numbers are formatted and joined by Arrow kernels."""
+    if pa.types.is_string(values.type) or pa.types.is_boolean(values.type):
+        return json.dumps(values.to_pylist(), separators=(",", ":"), ensure_ascii=False)
+    if len(values) == 0:
+        return "[]"
+    # Arrow formats floats with the shortest round-tripping representation, which is valid JSON
+    text = pc.fill_null(values.cast(pa.large_string()), "null")
+    as_list = pa.LargeListArray.from_arrays(pa.array([0, len(text)], pa.int64()), text)
+    return "[" + pc.binary_join(as_list, pa.scalar(",", pa.large_string()))[0].as_py() + "]"
@@ -0,0 +1,467 @@
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field, replace
+from typing import Callable, Literal
+import ibis.expr.types as ir
+import pyarrow as pa
+from ..biquery import BIQuery
+from ..biquery.fingerprint import fingerprint_biquery, fingerprint_dimension, fingerprint_metric
+from ..biquery.validator import validate_biquery
+from ..data_connection import DataConnection
+from ..data_model import DataModel, SemanticModel, Metric, ModelRegistry, ModelVersion
+from ..errors import DataChainError
+from ..planner import generate_logical_plan
+from ..resolver import ResolvedQuery, resolve_query
+from .derived import is_client_derivable, compute_derived
+from .rollup import rollup_function, roll_up
+from .ibis_builder import build_ibis_expression
+from .result_cache import ResultCache, CachedResult
+from .hooks import HookRegistry
+from .query_log import QueryLog
+from .prefetch import Prefetcher
+from .pagination import CursorStore, PageResult
+from .downsample import Downsample, minmax_expression, downsample_table
+from .profile import ProfileResult, profile_expression, profile_table, read_profile
+
+ResultSource = Literal["database", "cache", "derived", "rollup"]
+
+
+@dataclass()
+class ExecutionResult:
+    success: bool
+    result: pa.Table | None
+    errors: list[DataChainError] = field(default_factory=list)
+    source: ResultSource = "database"
+
+
+@dataclass(frozen=True)
+class _CacheKeys:
+    fingerprint: str
+    grain_key: str
+    dimensions: dict[str, str]
+    metrics: dict[str, str]
+
+
+class QueryExecutor:
+    """
+    Runs BIQueries end to end against a connection.
+    With a ResultCache, identical queries are served from the cache and derived metrics are
+    computed client-side from cached base aggregates, only querying the database for missing bases.
+    Hooks registered on `hooks` are notified around each pipeline stage, and a QueryLog
+    records the fingerprint, timings and outcome of every query. A Prefetcher runs likely
+    follow-up queries on its own connections while the executor is idle.
+    execute_paginated materializes a result once and serves it page by page through `cursors`,
+    execute_downsampled reduces chart-bound series to a target number of points, and
+    execute_profiled summarises a result in the engine instead of returning its rows.
+    With a ModelRegistry (see from_registry) every query runs against the ModelVersion
+    that was live when it started, so hot reloads never mix models within a query.
+    """
+    def __init__(
+        self,
+        data_model: DataModel,
+        semantic_model: SemanticModel,
+        connection: DataConnection,
+        cache: ResultCache | None = None,
+        hooks: HookRegistry | None = None,
+        query_log: QueryLog | None = None,
+        prefetcher: Prefetcher | None = None,
+        cursors: CursorStore | None = None,
+        registry: ModelRegistry | None = None,
+    ):
+        self._models = ModelVersion(version=0, data_model=data_model, semantic_model=semantic_model)
+        self.registry = registry
+        self._pinned = threading.local()
+        self.connection = connection
+        self.cache = cache
+        self.hooks = hooks or HookRegistry()
+        self.query_log = query_log
+        if query_log is not None:
+            query_log.attach(self.hooks)
+        self.prefetcher = prefetcher
+        if prefetcher is not None:
+            prefetcher.bind(self)
+        self.cursors = cursors or CursorStore()
+
+    @classmethod
+    def from_registry(cls, registry: ModelRegistry, connection: DataConnection, **options) -> "QueryExecutor":
+        """An executor serving the registry's live models, picking up every successful reload."""
+        current = registry.current
+        return cls(current.data_model, current.semantic_model, connection, registry=registry, **options)
+
+    @property
+    def models(self) -> ModelVersion:
+        """The models of the query running on this thread, otherwise the live ones."""
+        pinned = getattr(self._pinned, "models", None)
+        if pinned is not None:
+            return pinned
+        return self.registry.current if self.registry is not None else self._models
+
+    @property
+    def data_model(self) -> DataModel:
+        return self.models.data_model
+
+    @property
+    def semantic_model(self) -> SemanticModel:
+        return self.models.semantic_model
+
+    @contextmanager
+    def _pin_models(self):
+        if getattr(self._pinned, "models", None) is not None:
+            yield
+            return
+        self._pinned.models = self.models
+        try:
+            yield
+        finally:
+            self._pinned.models = None
+
+    def execute(self, biquery: BIQuery) -> ExecutionResult:
+        with self._pin_models():
+            return self._execute_foreground(biquery)
+
+    def _execute_foreground(
+        self,
+        biquery: BIQuery,
+        fingerprint: str | None = None,
+        transform: Callable[[ir.Table], ir.Table] | None = None,
+        log_as: str | None = None,
+    ) -> ExecutionResult:
+        """
+        Run a query the user waits for, holding back prefetch workers meanwhile. Only plain
+        results are followed up; a transformed result is not the query's result.
+        """
+        if self.prefetcher is None:
+            return self._execute_logged(biquery, transform, fingerprint, log_as)
+
+        self.prefetcher.foreground_started()
+        start = time.perf_counter()
+        result = None
+        try:
+            result = self._execute_logged(biquery, transform, fingerprint, log_as)
+            return result
+        finally:
+            self.prefetcher.foreground_finished(
+                biquery, result, (time.perf_counter() - start) * 1000, follow_up=transform is None,
+            )
+
+    def execute_paginated(self, biquery: BIQuery, page_size: int) -> PageResult:
+        """Run the query once and return its first page with a cursor for the rest."""
+        result = self.execute(biquery)
+        if not result.success:
+            return PageResult(success=False, result=None, errors=result.errors)
+        return self.cursors.open(result.result, page_size)
+
+    def fetch_page(self, cursor: str) -> PageResult:
+        """The next page of a paginated result, without touching the database."""
+        return self.cursors.fetch(cursor)
+
+    def execute_downsampled(self, biquery: BIQuery, downsample: Downsample) -> ExecutionResult:
+        """
+        Run a query and reduce every series to about `downsample.points` points. Min/max bucketing
+        is pushed into the database unless the full result is already cached; LTTB and cached
+        results are reduced in-process. Downsampled results are not stored in the cache.
+        """
+        with self._pin_models():
+            series = downsample.series
+            if series is None:
+                series = [d for d in biquery.dimensions if d != downsample.x]
+
+            fingerprint = self._cached_fingerprint(biquery)
+            if downsample.method == "minmax" and not self._is_cached(fingerprint):
+                def transform(expr: ir.Table) -> ir.Table:
+                    return minmax_expression(expr, downsample.x, downsample.y, downsample.points, series)
+                return self._execute_foreground(biquery, fingerprint, transform, log_as="minmax")
+
+            result = self._execute_foreground(biquery, fingerprint)
+            if not result.success:
+                return result
+            table = downsample_table(result.result, downsample.x, downsample.y, downsample.points, downsample.method, series)
+            return replace(result, result=table)
+
+    def execute_profiled(self, biquery: BIQuery, top_k: int = 5) -> ProfileResult:
+        """
+        Profile the result (row count, per-column nulls, min/max/mean, metric totals and top-k
+        categorical values) with one query over the result expression, returning no rows.
+        A result already in the cache is profiled in-process instead.
+        """
+        with self._pin_models():
+            fingerprint = self._cached_fingerprint(biquery)
+            if self._is_cached(fingerprint):
+                result = self._execute_foreground(biquery, fingerprint)
+                if not result.success:
+                    return ProfileResult(success=False, profile=None, errors=result.errors)
+                return ProfileResult(success=True, profile=profile_table(result.result, biquery.metrics, top_k), source=result.source)
+
+            def transform(expr: ir.Table) -> ir.Table:
+                return profile_expression(expr, biquery.metrics, top_k)
+
+            result = self._execute_foreground(biquery, fingerprint, transform, log_as="profile")
+            if not result.success:
+                return ProfileResult(success=False, profile=None, errors=result.errors)
+            return ProfileResult(success=True, profile=read_profile(result.result, top_k))
+
+    def _cached_fingerprint(self, biquery: BIQuery) -> str | None:
+        """The query's fingerprint when there is a cache to look it up in, so callers compute it once."""
+        return self._fingerprint(biquery) if self.cache is not None else None
+
+    def _is_cached(self, fingerprint: str | None) -> bool:
+        return fingerprint is not None and fingerprint in self.cache
+
+    def _fingerprint(self, biquery: BIQuery) -> str:
+        return fingerprint_biquery(biquery, self.semantic_model, self.data_model)
+
+    def _execute_logged(
+        self,
+        biquery: BIQuery,
+        transform: Callable[[ir.Table], ir.Table] | None = None,
+        fingerprint: str | None = None,
+        log_as: str | None = None,
+    ) -> ExecutionResult:
+        """
+        Run and record a query. Transformed queries are logged under "<log_as>:<fingerprint>",
+        so their timings are kept apart from the plain query's.
+        """
+        if self.query_log is None:
+            return self._execute(biquery, transform, fingerprint)
+
+        self.query_log.start()
+        result = None
+        try:
+            if fingerprint is None:
+                fingerprint = self._fingerprint(biquery)
+            result = self._execute(biquery, transform, fingerprint)
+            return result
+        finally:
+            key = f"{log_as}:{fingerprint}" if log_as is not None and fingerprint is not None else fingerprint
+            self.query_log.finish(key, biquery, result, error_code=None if result is not None else "exception")
+
+    def _execute(
+        self,
+        biquery: BIQuery,
+        transform: Callable[[ir.Table], ir.Table] | None = None,
+        fingerprint: str | None = None,
+    ) -> ExecutionResult:
+        """
+        Run the pipeline; a transform rewrites the query expression and bypasses the cache.
+        The query's fingerprint is computed when needed unless the caller already has it.
+        """
+        errors = self.hooks.run("validate_biquery", validate_biquery, biquery=biquery)
+        if errors:
+            return ExecutionResult(success=False, result=None, errors=errors)
+
+        biquery = replace(biquery, orderby=[(col, direction.lower()) for col, direction in biquery.orderby])
+        resolution = self.hooks.run(
+            "resolve_query", resolve_query,
+            biquery=biquery, semantic_model=self.semantic_model, data_model=self.data_model,
+        )
+        if not resolution.success:
+            return ExecutionResult(success=False, result=None, errors=resolution.errors)
+        resolved = resolution.resolved_query
+
+        if self.cache is None or transform is not None:
+            return self._execute_in_database(resolved, transform)
+
+        keys = self._cache_keys(biquery, resolved, fingerprint)
+        cached = self.cache.get(keys.fingerprint)
+        if cached is not None:
+            # The fingerprint ignores column order, so the cached table may list them differently
+            columns = dict.fromkeys([d.name for d in resolved.dimensions] + [m.name for m in resolved.metrics])
+            return ExecutionResult(success=True, result=cached.table.select(list(columns)), source="cache")
+
+        table = self._execute_from_cache(biquery, resolved, keys)
+        if table is not None:
+            result = ExecutionResult(success=True, result=table, source="derived")
+        elif (table := self._roll_up_from_cache(resolved, keys)) is not None:
+            result = ExecutionResult(success=True, result=table, source="rollup")
+        else:
+            result = self._execute_in_database(resolved)
+
+        if result.success:
+            self._store(keys, result.result, complete=resolved.limit is None and not resolved.offset)
+        return result
+
+    def _execute_in_database(self, resolved: ResolvedQuery, transform: Callable[[ir.Table], ir.Table] | None = None) -> ExecutionResult:
+        planning = self.hooks.run("generate_logical_plan", generate_logical_plan, query=resolved, data_model=self.data_model)
+        if not planning.success:
+            return ExecutionResult(success=False, result=None, errors=planning.errors)
+
+        expr = self.hooks.run("build_ibis_expression", build_ibis_expression, logical_plan=planning.logical_plan, query=resolved)
+        if transform is not None:
+            expr = transform(expr)
+        try:
+            # The connection compiles as part of executing, so SQL is only rendered separately when observed
+            if self.hooks.observes("compile"):
+                self.hooks.run("compile", self.connection.compile, query=expr)
+            table = self.hooks.run("execute", self.connection.to_pyarrow, query=expr)
+        except Exception as e:
+            return ExecutionResult(success=False, result=None, errors=[DataChainError(
+                stage="execute",
+                code="execution_failed",
+                message=f"The query failed to execute: {e}",
+            )])
+        return ExecutionResult(success=True, result=table)
+
+    def _cache_keys(self, biquery: BIQuery, resolved: ResolvedQuery, fingerprint: str | None = None) -> _CacheKeys:
+        grain = BIQuery(filters=biquery.filters, metric_filters=biquery.metric_filters)
+        return _CacheKeys(
+            fingerprint=fingerprint or self._fingerprint(biquery),
+            grain_key=self._fingerprint(grain),
+            dimensions={d.name: fingerprint_dimension(d, self.data_model) for d in resolved.dimensions},
+            metrics={m.name: self._metric_digest(m) for m in resolved.metrics},
+        )
+
+    def _metric_digest(self, metric: Metric) -> str:
+        return fingerprint_metric(metric, self.data_model, self.semantic_model)
+
+    def _store(self, keys: _CacheKeys, table: pa.Table, complete: bool):
+        self.cache.put(CachedResult(
+            fingerprint=keys.fingerprint,
+            grain_key=keys.grain_key,
+            dimensions=keys.dimensions,
+            metrics=keys.metrics,
+            table=table,
+            complete=complete,
+        ))
+
+    def _execute_from_cache(self, biquery: BIQuery, resolved: ResolvedQuery, keys: _CacheKeys) -> pa.Table | None:
+        """Assemble the result from cached bases, derived metrics and a database query for missing bases."""
+        if not resolved.metrics:
+            return None
+        entries = [e for e in self.cache.candidates(keys.grain_key) if e.dimensions == keys.dimensions]
+        if not entries:
+            return None
+
+        tables: dict[str, pa.Table] = {}
+        column_source: dict[str, str] = {}  # metric name -> key in tables
+        derived: list[Metric] = []
+        missing: list[Metric] = []
+        planned: set[str] = set()
+
+        def plan(metric: Metric):
+            if metric.name in planned:
+                return
+            planned.add(metric.name)
+            digest = self._metric_digest(metric)
+            entry = next((e for e in entries if e.metrics.get(metric.name) == digest), None)
+            if entry is not None:
+                tables[entry.fingerprint] = entry.table
+                column_source[metric.name] = entry.fingerprint
+            elif is_client_derivable(metric):
+                for dep in metric.dependencies:
+                    plan(dep)
+                derived.append(metric)
+            else:
+                missing.append(metric)
+
+        for metric in resolved.metrics:
+            plan(metric)
+        if not tables:
+            return None
+
+        dimensions = [d.name for d in resolved.dimensions]
+        if missing:
+            fetched = self._fetch_bases(biquery, resolved, missing)
+            if fetched is None:
+                return None
+            tables["missing"] = fetched
+            column_source.update({m.name: "missing" for m in missing})
+
+        aligned = {key: _sort_by_dimensions(table, dimensions) for key, table in tables.items()}
+        base = next(iter(aligned.values()))
+        for table in aligned.values():
+            if table.num_rows != base.num_rows or any(not table[d].equals(base[d]) for d in dimensions):
+                return None
+
+        columns = {d: base[d] for d in dimensions}
+        for name, key in column_source.items():
+            columns[name] = aligned[key][name]
+        for metric in derived:
+            columns[metric.name] = compute_derived(metric, columns)
+
+        table = pa.table({name: columns[name] for name in dimensions + [m.name for m in resolved.metrics]})
+        return apply_ordering(table, resolved)
+
+    def _roll_up_from_cache(self, resolved: ResolvedQuery, keys: _CacheKeys) -> pa.Table | None:
+        """
+        Re-aggregate a cached result at a finer grain (a superset of the query's dimensions,
+        under the same filters) when every requested metric is additive or derived from additive ones.
+        """
+        if not resolved.metrics or resolved.metric_filters:
+            return None
+
+        def covers(entry: CachedResult) -> bool:
+            return len(entry.dimensions) > len(keys.dimensions) and all(
+                entry.dimensions.get(name) == digest for name, digest in keys.dimensions.items()
+            )
+
+        for entry in self.cache.candidates(keys.grain_key):
+            if not covers(entry):
+                continue
+
+            aggregations: dict[str, str] = {}
+            derived: list[Metric] = []
+
+            def plan(metric: Metric) -> bool:
+                if metric.name in aggregations or metric.name in {m.name for m in derived}:
+                    return True
+                function = rollup_function(metric)
+                if function is not None and entry.metrics.get(metric.name) == self._metric_digest(metric):
+                    aggregations[metric.name] = function
+                    return True
+                if is_client_derivable(metric) and all(plan(dep) for dep in metric.dependencies):
+                    derived.append(metric)
+                    return True
+                return False
+
+            if not all(plan(metric) for metric in resolved.metrics):
+                continue
+
+            dimensions = [d.name for d in resolved.dimensions]
+            rolled = roll_up(entry.table, dimensions, aggregations)
+            columns = {name: rolled[name] for name in rolled.column_names}
+            for metric in derived:
+                columns[metric.name] = compute_derived(metric, columns)
+
+            table = pa.table({name: columns[name] for name in dimensions + [m.name for m in resolved.metrics]})
+            return apply_ordering(table, resolved)
+
+        return None
+
+    def _fetch_bases(self, biquery: BIQuery, resolved: ResolvedQuery, missing: list[Metric]) -> pa.Table | None:
+        """Query only the missing base metrics at the requested grain, caching them for later reuse."""
+        bases = ResolvedQuery(
+            dimensions=resolved.dimensions,
+            metrics=missing,
+            filters=resolved.filters,
+            metric_filters=resolved.metric_filters,
+        )
+        result = self._execute_in_database(bases)
+        if not result.success:
+            return None
+
+        bases_query = BIQuery(
+            dimensions=biquery.dimensions,
+            metrics=[m.name for m in missing],
+            filters=biquery.filters,
+            metric_filters=biquery.metric_filters,
+        )
+        self._store(self._cache_keys(bases_query, bases), result.result, complete=True)
+        return result.result
+
+
+def _sort_by_dimensions(table: pa.Table, dimensions: list[str]) -> pa.Table:
+    if not dimensions:
+        return table
+    return table.sort_by([(d, "ascending") for d in dimensions])
+
+
+def apply_ordering(table: pa.Table, query: ResolvedQuery) -> pa.Table:
+    """Apply the order by, offset and limit of a query to an in-memory result."""
+    if query.orderby:
+        table = table.sort_by([
+            (col.name, "descending" if direction == "desc" else "ascending") for col, direction in query.orderby
+        ])
+    if query.offset or query.limit is not None:
+        table = table.slice(query.offset or 0, query.limit)
+    return table
@@ -0,0 +1,106 @@
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Literal, get_args
+
+Stage = Literal[
+    "validate_biquery",
+    "resolve_query",
+    "generate_logical_plan",
+    "build_ibis_expression",
+    "compile",
+    "execute",
+]
+STAGES: tuple[Stage, ...] = get_args(Stage)
+
+
+@dataclass
+class StageEvent:
+    """
+    One run of a pipeline stage. Before hooks see the inputs; after hooks get the same
+    object back with the output (or the exception the stage raised) and its duration.
+    """
+    stage: Stage
+    inputs: dict[str, Any]
+    output: Any = None
+    error: BaseException | None = None
+    start: float = 0.0  # time.perf_counter() when the stage started
+    duration_ms: float | None = None
+    # Scratch space for hooks to carry state from before to after, e.g. a profiler
+    state: dict[str, Any] = field(default_factory=dict)
+
+
+Hook = Callable[[StageEvent], None]
+
+
+class HookRegistry:
+    """
+    Callables subscribed to before/after events of the execution pipeline stages.
+    Stages without hooks call straight through, so an empty registry costs one lookup per stage.
+    """
+    def __init__(self):
+        self._before: dict[Stage, tuple[Hook, ...]] = {stage: () for stage in STAGES}
+        self._after: dict[Stage, tuple[Hook, ...]] = {stage: () for stage in STAGES}
+        self._observed: frozenset[Stage] = frozenset()
+        self._lock = threading.Lock()
+
+    def before(self, stage: Stage, hook: Hook | None = None):
+        """Subscribe a hook to run before the stage; usable as a decorator."""
+        return self._subscribe(self._before, stage, hook)
+
+    def after(self, stage: Stage, hook: Hook | None = None):
+        """Subscribe a hook to run after the stage, also when it raised; usable as a decorator."""
+        return self._subscribe(self._after, stage, hook)
+
+    def remove(self, stage: Stage, hook: Hook):
+        with self._lock:
+            self._before[stage] = tuple(h for h in self._before[stage] if h is not hook)
+            self._after[stage] = tuple(h for h in self._after[stage] if h is not hook)
+            self._update_observed()
+
+    def clear(self):
+        with self._lock:
+            for stage in STAGES:
+                self._before[stage] = ()
+                self._after[stage] = ()
+            self._update_observed()
+
+    def observes(self, stage: Stage) -> bool:
+        return stage in self._observed
+
+    def run(self, stage: Stage, func: Callable[..., Any], **inputs: Any) -> Any:
+        """Call func(**inputs) as the given stage, notifying the stage's hooks around it."""
+        if stage not in self._observed:
+            return func(**inputs)
+
+        before, after = self._before[stage], self._after[stage]
+        event = StageEvent(stage=stage, inputs=inputs)
+        for hook in before:
+            hook(event)
+        event.start = time.perf_counter()
+        try:
+            event.output = func(**inputs)
+            return event.output
+        except BaseException as e:
+            event.error = e
+            raise
+        finally:
+            event.duration_ms = (time.perf_counter() - event.start) * 1000
+            for hook in after:
+                hook(event)
+
+    def _subscribe(self, hooks: dict[Stage, tuple[Hook, ...]], stage: Stage, hook: Hook | None):
+        if stage not in hooks:
+            raise ValueError(f"Unknown stage '{stage}', expected one of {', '.join(STAGES)}")
+
+        def decorator(hook: Hook) -> Hook:
+            with self._lock:
+                # Tuples are swapped rather than mutated so runs in other threads see a consistent list
+                hooks[stage] = hooks[stage] + (hook,)
+                self._update_observed()
+            return hook
+
+        return decorator if hook is None else decorator(hook)
+
+    def _update_observed(self):
+        self._observed = frozenset(stage for stage in STAGES if self._before[stage] or self._after[stage])
@@ -1,32 +1,67 @@
+import ibis
+import ibis.expr.operations as ops
 import ibis.expr.types as ir
-from datachain.planner import LogicalPlan
-from resolver import ResolvedQuery
+from ..planner import LogicalPlan
+from ..resolver import ResolvedQuery
 
-def build_ibis_expression(logical_plan: LogicalPlan, query: ResolvedQuery) -> ir.Expr:
+def build_ibis_expression(logical_plan: LogicalPlan, query: ResolvedQuery) -> ir.Table:
     """Build an Ibis expression from the logical plan and the resolved query."""
     # Start with the base table
     expr = logical_plan.base_table.ibis()
 
-    # Apply joins
+    # Apply joins, each relationship brings its left (one) side onto the base (many) side
     for join in logical_plan.joins:
-        right_expr = join.right.ibis()
-        if join.left == logical_plan.base_table:
-            left_expr = expr
-        else:
-            left_expr = join.left.ibis()
-        
+        left = join.left
         # All joins are left joins
-        expr = left_expr.join(right_expr, on=join.on(), how="left")
+        expr = expr.join(
+            left.ibis(),
+            join.on(join.left, join.right),
+            how="left",
+            rname=f"{{name}}__{left.name}",
+        )
 
-    # Apply filters, metrics, and dimensions from the query
-    # This part is simplified and would need to be expanded to handle all aspects of the query
     for filter in query.filters:
         expr = expr.filter(filter._cached_expr)
-    
-    for metric in query.metrics:
-        expr = expr.mutate(**{metric.name: metric._cached_expr})
-    
-    for dimension in query.dimensions:
-        expr = expr.mutate(**{dimension.name: dimension._cached_expr})
-
-    return expr
\ No newline at end of file
+
+    dimensions = {dimension.name: dimension._cached_expr for dimension in query.dimensions}
+    metrics = {metric.name: null_on_zero_division(metric._cached_expr) for metric in query.metrics}
+
+    if not metrics:
+        expr = expr.select(**dimensions).distinct()
+    else:
+        expr = expr.aggregate(
+            by=[dimension.name(name) for name, dimension in dimensions.items()],
+            having=[null_on_zero_division(metric_filter._cached_expr) for metric_filter in query.metric_filters],
+            **metrics,
+        )
+
+    if query.distinct:
+        expr = expr.distinct()
+
+    if query.orderby:
+        expr = expr.order_by([
+            ibis.desc(col.name) if direction == "desc" else ibis.asc(col.name)
+            for col, direction in query.orderby
+        ])
+
+    if query.limit is not None or query.offset:
+        expr = expr.limit(query.limit, offset=query.offset or 0)
+
+    return expr
+
+
+def null_on_zero_division(expr: ir.Value) -> ir.Value:
+    """
+    Divide by NULLIF(denominator, 0) so a division by zero is NULL on every backend
+    (DuckDB would return inf and most warehouses raise), as it is when computed client-side.
+    """
+    if not expr.op().find(ops.Divide):
+        return expr
+
+    def guard(node: ops.Node, kwargs: dict | None) -> ops.Node:
+        if isinstance(node, ops.Divide):
+            args = kwargs or dict(zip(node.__argnames__, node.__args__))
+            return ops.Divide(args["left"], ops.NullIf(args["right"], 0))
+        return node.__recreate__(kwargs) if kwargs else node
+
+    return expr.op().replace(guard).to_expr()
@@ -0,0 +1,127 @@
+import base64
+import binascii
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable
+import pyarrow as pa
+from ..errors import DataChainError
+
+
+@dataclass()
+class PageResult:
+    success: bool
+    result: pa.Table | None
+    errors: list[DataChainError] = field(default_factory=list)
+    cursor: str | None = None  # pass to fetch_page for the next page, None on the last page
+    offset: int = 0
+    total_rows: int | None = None
+
+
+@dataclass
+class _Handle:
+    table: pa.Table
+    page_size: int
+    expires_at: float
+
+
+class CursorStore:
+    """
+    Server-side handles on materialized results. A result is kept once as an Arrow table and
+    every page is a zero-copy slice of it, so paging never re-runs the query. Cursors are opaque
+    tokens naming a handle and an offset; handles not read for `ttl_seconds` expire, and the
+    least recently used handles are evicted beyond `max_handles`.
+    """
+    def __init__(self, ttl_seconds: float = 300.0, max_handles: int = 128, clock: Callable[[], float] = time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self.max_handles = max_handles
+        self._clock = clock
+        self._handles: OrderedDict[str, _Handle] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._handles)
+
+    def open(self, table: pa.Table, page_size: int) -> PageResult:
+        """Keep the table and return its first page."""
+        if page_size < 1:
+            raise ValueError("page_size must be at least 1")
+        handle_id = secrets.token_urlsafe(12)
+        with self._lock:
+            self._expire()
+            # One contiguous chunk per column keeps each slice O(page) regardless of how the result arrived
+            self._handles[handle_id] = _Handle(table.combine_chunks(), page_size, self._clock() + self.ttl_seconds)
+            while len(self._handles) > self.max_handles:
+                self._handles.popitem(last=False)
+            return self._page(handle_id, 0)
+
+    def fetch(self, cursor: str) -> PageResult:
+        """The page a cursor points at, or an error if the cursor is malformed or expired."""
+        decoded = _decode(cursor)
+        if decoded is None:
+            return _cursor_error("invalid_cursor", "The cursor is not one returned by this tool.")
+        handle_id, offset = decoded
+        with self._lock:
+            self._expire()
+            if handle_id not in self._handles:
+                return _cursor_error(
+                    "cursor_expired",
+                    "The result behind this cursor has expired.",
+                    hint="Run the query again to get a new cursor.",
+                )
+            return self._page(handle_id, offset)
+
+    def close(self, cursor: str):
+        """Release the result behind a cursor before it expires."""
+        decoded = _decode(cursor)
+        if decoded is not None:
+            with self._lock:
+                self._handles.pop(decoded[0], None)
+
+    def _page(self, handle_id: str, offset: int) -> PageResult:
+        handle = self._handles[handle_id]
+        handle.expires_at = self._clock() + self.ttl_seconds
+        self._handles.move_to_end(handle_id)
+
+        total = handle.table.num_rows
+        next_offset = offset + handle.page_size
+        if next_offset >= total:
+            cursor = None
+            if offset == 0:
+                # A single page result hands out no cursor, so nothing can read the handle again
+                del self._handles[handle_id]
+            # Otherwise the last page stays fetchable for retries until the handle expires or is evicted
+        else:
+            cursor = _encode(handle_id, next_offset)
+        return PageResult(
+            success=True,
+            result=handle.table.slice(offset, handle.page_size),
+            cursor=cursor,
+            offset=offset,
+            total_rows=total,
+        )
+
+    def _expire(self):
+        now = self._clock()
+        expired = [handle_id for handle_id, handle in self._handles.items() if handle.expires_at <= now]
+        for handle_id in expired:
+            del self._handles[handle_id]
+
+
+def _encode(handle_id: str, offset: int) -> str:
+    return base64.urlsafe_b64encode(f"{handle_id}:{offset}".encode()).decode()
+
+
+def _decode(cursor: str) -> tuple[str, int] | None:
+    try:
+        handle_id, offset = base64.urlsafe_b64decode(cursor.encode()).decode().rsplit(":", 1)
+        offset = int(offset)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        return None
+    return (handle_id, offset) if offset >= 0 else None
+
+
+def _cursor_error(code: str, message: str, hint: str | None = None) -> PageResult:
+    return PageResult(success=False, result=None, errors=[DataChainError(stage="execute", code=code, message=message, hint=hint)])
@@ -0,0 +1,259 @@
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, replace
+from typing import TYPE_CHECKING
+from ..biquery import BIQuery
+from ..biquery.fingerprint import canonical_key, fingerprint_biquery
+from ..data_connection import DataConnection
+from ..data_model import DataModel, SemanticModel
+
+if TYPE_CHECKING:
+    from .executor import QueryExecutor, ExecutionResult
+
+
+@dataclass()
+class PrefetchStats:
+    enqueued: int = 0
+    executed: int = 0
+    failed: int = 0
+    skipped: int = 0  # already cached, or dropped by a budget
+    dropped: int = 0  # pushed out of the queue by newer follow-ups
+
+
+def suggest_followups(
+    biquery: BIQuery,
+    semantic_model: SemanticModel,
+    data_model: DataModel,
+    time_dimensions: list[str],
+    drill_dimensions: dict[str, list[str]],
+) -> list[BIQuery]:
+    """
+    Likely next questions after a query, most likely first: the same question over time
+    (adding a time dimension) and drilling one level down a dimension hierarchy.
+    Follow-ups are unordered and unlimited so their cached results are complete and
+    can serve any ordering, limit or coarser grain the agent asks for next.
+    """
+    base = replace(biquery, orderby=[], limit=None, offset=None)
+    followups: list[BIQuery] = []
+
+    if not any(d in time_dimensions for d in biquery.dimensions):
+        tables = _tables_in_query(biquery, semantic_model, data_model)
+        # Prefer time dimensions on tables the query already touches, they add no joins
+        candidates = sorted(time_dimensions, key=lambda d: not (_dimension_tables(d, semantic_model, data_model) & tables))
+        if candidates:
+            followups.append(replace(base, dimensions=biquery.dimensions + [candidates[0]]))
+
+    for dimension in biquery.dimensions:
+        for child in drill_dimensions.get(dimension, []):
+            if child not in biquery.dimensions:
+                followups.append(replace(base, dimensions=biquery.dimensions + [child]))
+                break
+    return followups
+
+
+def detect_time_dimensions(semantic_model: SemanticModel, data_model: DataModel) -> list[str]:
+    """Dimensions whose expression is a date or timestamp."""
+    names = []
+    for name, dimension in semantic_model._dimensions.items():
+        try:
+            if dimension.resolve(data_model).type().is_temporal():
+                names.append(name)
+        except Exception:
+            continue
+    return names
+
+
+class Prefetcher:
+    """
+    Speculatively runs likely follow-up queries on spare connections and stores their results
+    in the executor's ResultCache. Follow-ups never compete with foreground queries: workers
+    only start a follow-up while no foreground query is running, the queue is small and
+    newest first, and queries that were slow or large are not followed up at all.
+    The foreground thread only hands over the finished query; suggesting its follow-ups and
+    checking the cache for them happens on the workers.
+    A follow-up that is already running is not cancelled when a foreground query starts. It
+    runs on its own connection, so at most one follow-up per connection overlaps with the
+    foreground query; keep follow-ups cheap with max_source_ms and max_source_rows.
+    """
+    def __init__(
+        self,
+        connections: list[DataConnection],
+        max_followups: int = 2,
+        max_pending: int = 8,
+        max_source_ms: float = 2000.0,
+        max_source_rows: int = 10_000,
+        time_dimensions: list[str] | None = None,
+        drill_dimensions: dict[str, list[str]] | None = None,
+    ):
+        if not connections:
+            raise ValueError("The prefetcher needs at least one connection of its own")
+        self.connections = connections
+        self.max_followups = max_followups
+        self.max_source_ms = max_source_ms
+        self.max_source_rows = max_source_rows
+        self.time_dimensions = time_dimensions
+        self.drill_dimensions = drill_dimensions or {}
+        self.stats = PrefetchStats()
+        self._sources: deque[BIQuery] = deque(maxlen=max_pending)  # finished queries to suggest follow-ups for
+        self._pending: deque[BIQuery] = deque(maxlen=max_pending)
+        self._queued: set[tuple] = set()
+        self._suggesting = 0
+        self._foreground = 0
+        self._closed = False
+        self._condition = threading.Condition()
+        self._executors: list["QueryExecutor"] = []
+        self._workers: list[threading.Thread] = []
+
+    def bind(self, executor: "QueryExecutor"):
+        """Start one worker per connection, each running follow-ups with the executor's models and cache."""
+        from .executor import QueryExecutor
+
+        if executor.cache is None:
+            raise ValueError("Prefetching needs a ResultCache to store results in")
+        if self._workers:
+            raise RuntimeError("The prefetcher is already bound to an executor")
+        if self.time_dimensions is None:
+            self.time_dimensions = detect_time_dimensions(executor.semantic_model, executor.data_model)
+
+        for i, connection in enumerate(self.connections):
+            background = QueryExecutor(
+                executor.data_model, executor.semantic_model, connection, cache=executor.cache, registry=executor.registry,
+            )
+            worker = threading.Thread(target=self._work, args=(background,), name=f"datachain-prefetch-{i}", daemon=True)
+            self._executors.append(background)
+            self._workers.append(worker)
+            worker.start()
+
+    def foreground_started(self):
+        with self._condition:
+            self._foreground += 1
+
+    def foreground_finished(
+        self, biquery: BIQuery, result: "ExecutionResult | None", elapsed_ms: float, follow_up: bool = True,
+    ):
+        """
+        Mark a foreground query done and hand it to the workers if it is within budget.
+        follow_up=False only releases the workers, e.g. after a downsampled or profiled query.
+        """
+        with self._condition:
+            self._foreground -= 1
+            if follow_up and result is not None and result.success and self._within_budget(result, elapsed_ms):
+                self._sources.append(biquery)
+            self._condition.notify_all()
+
+    def pending(self) -> int:
+        with self._condition:
+            return len(self._pending)
+
+    def wait_idle(self, timeout: float | None = None) -> bool:
+        """Block until no follow-ups are queued or running, mostly for tests and benchmarks."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while self._sources or self._suggesting or self._pending or self._queued:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._sources.clear()
+            self._pending.clear()
+            self._queued.clear()
+            self._condition.notify_all()
+        for worker in self._workers:
+            worker.join()
+
+    def _within_budget(self, result: "ExecutionResult", elapsed_ms: float) -> bool:
+        # Follow-ups add dimensions, so they cost at least as much as the query and return more rows
+        if elapsed_ms > self.max_source_ms or result.result.num_rows > self.max_source_rows:
+            self.stats.skipped += 1
+            return False
+        return True
+
+    def _suggest(self, executor: "QueryExecutor", biquery: BIQuery) -> list[BIQuery]:
+        """Follow-ups of a finished query that are not cached yet; runs on a worker, outside the lock."""
+        followups = suggest_followups(
+            biquery, executor.semantic_model, executor.data_model, self.time_dimensions, self.drill_dimensions,
+        )
+        uncached = []
+        for followup in followups[:self.max_followups]:
+            if fingerprint_biquery(followup, executor.semantic_model, executor.data_model) in executor.cache:
+                with self._condition:
+                    self.stats.skipped += 1
+            else:
+                uncached.append(followup)
+        return uncached
+
+    def _enqueue(self, followups: list[BIQuery]):
+        for followup in followups:
+            key = canonical_key(followup)
+            if key in self._queued:
+                continue
+            if len(self._pending) == self._pending.maxlen:
+                self._queued.discard(canonical_key(self._pending.pop()))
+                self.stats.dropped += 1
+            # Newest first: the latest question is the best predictor of the next one
+            self._pending.appendleft(followup)
+            self._queued.add(key)
+            self.stats.enqueued += 1
+
+    def _work(self, executor: "QueryExecutor"):
+        while True:
+            with self._condition:
+                while not self._closed and (self._foreground or not (self._sources or self._pending)):
+                    self._condition.wait()
+                if self._closed:
+                    return
+                source = self._sources.pop() if self._sources else None
+                if source is not None:
+                    self._suggesting += 1
+                else:
+                    biquery = self._pending.popleft()
+
+            if source is not None:
+                try:
+                    followups = self._suggest(executor, source)
+                except Exception:
+                    followups = []
+                with self._condition:
+                    self._suggesting -= 1
+                    if not self._closed:
+                        self._enqueue(followups)
+                    self._condition.notify_all()
+                continue
+
+            try:
+                result = executor.execute(biquery)
+                succeeded = result.success
+            except Exception:
+                succeeded = False
+
+            with self._condition:
+                self._queued.discard(canonical_key(biquery))
+                if succeeded:
+                    self.stats.executed += 1
+                else:
+                    self.stats.failed += 1
+                self._condition.notify_all()
+
+
+def _tables_in_query(biquery: BIQuery, semantic_model: SemanticModel, data_model: DataModel) -> set[str]:
+    tables = set()
+    for name in biquery.dimensions:
+        tables |= _dimension_tables(name, semantic_model, data_model)
+    for name in biquery.metrics:
+        metric = semantic_model.get_metric(name)
+        if metric is not None:
+            tables.add(metric.grain)
+    return tables
+
+
+def _dimension_tables(name: str, semantic_model: SemanticModel, data_model: DataModel) -> set[str]:
+    dimension = semantic_model.get_dimension(name)
+    if dimension is None:
+        return set()
+    return {relation.name for relation in dimension.resolve(data_model).op().relations}
@@ -0,0 +1,147 @@
+from dataclasses import dataclass, field, asdict
+from typing import Any
+import ibis
+import ibis.expr.datatypes as dt
+import ibis.expr.types as ir
+import pyarrow as pa
+import pyarrow.compute as pc
+from ..errors import DataChainError
+
+# A profile summarises a result so an agent can reason about it without reading the rows.
+# It is computed as a single extra query over the result expression: one aggregate for the
+# statistics, which also counts boolean values, cross joined with a top-k aggregate per string
+# column. Every part reads the result expression, which ibis emits as one CTE; DuckDB
+# materializes it, so the underlying query runs once. Ranking all string columns in a single
+# unpivoted GROUP BY measured slower than the separate ones. The returned row names each
+# column and its type, so it can be read without the result's schema.
+
+
+@dataclass
+class ColumnProfile:
+    name: str
+    dtype: str
+    null_count: int
+    min: Any = None
+    max: Any = None
+    mean: float | None = None  # numeric columns only
+    total: float | None = None  # metrics only
+    top_values: list[tuple[Any, int]] = field(default_factory=list)  # categorical columns only
+
+
+@dataclass
+class ResultProfile:
+    row_count: int
+    columns: dict[str, ColumnProfile]
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"row_count": self.row_count, "columns": {name: asdict(c) for name, c in self.columns.items()}}
+
+
+@dataclass()
+class ProfileResult:
+    success: bool
+    profile: ResultProfile | None
+    errors: list[DataChainError] = field(default_factory=list)
+    source: str = "database"  # see ResultSource
+
+
+def _is_numeric(dtype: dt.DataType) -> bool:
+    return dtype.is_numeric() and not dtype.is_boolean()
+
+
+def _is_categorical(dtype: dt.DataType) -> bool:
+    return dtype.is_string() or dtype.is_boolean()
+
+
+def profile_expression(expr: ir.Table, metrics: list[str], top_k: int = 5) -> ir.Table:
+    """Wrap a query expression into a single row query computing its profile, see read_profile."""
+    aggregates: dict[str, ir.Scalar] = {"row_count": expr.count()}
+    strings: dict[str, int] = {}
+    for i, (name, dtype) in enumerate(expr.schema().items()):
+        column = expr[name]
+        aggregates[f"c{i}_name"] = ibis.literal(name)
+        aggregates[f"c{i}_dtype"] = ibis.literal(str(dtype))
+        aggregates[f"c{i}_nulls"] = column.isnull().sum()
+        if _is_numeric(dtype) or dtype.is_temporal() or dtype.is_string():
+            aggregates[f"c{i}_min"] = column.min()
+            aggregates[f"c{i}_max"] = column.max()
+        if _is_numeric(dtype):
+            aggregates[f"c{i}_mean"] = column.mean()
+            if name in metrics:
+                aggregates[f"c{i}_total"] = column.sum()
+        if dtype.is_boolean():
+            # Two values at most, so their counts come from the same pass
+            aggregates[f"c{i}_true"] = column.ifelse(1, 0).sum()
+            aggregates[f"c{i}_false"] = (~column).ifelse(1, 0).sum()
+        elif dtype.is_string():
+            strings[name] = i
+    profile = expr.aggregate(**aggregates)
+
+    if top_k > 0:
+        for name, i in strings.items():
+            counts = expr.group_by(value=expr[name]).aggregate(count=expr.count())
+            counts = counts.order_by([counts["count"].desc(), counts["value"]]).limit(top_k)
+            top = counts.aggregate(**{
+                f"c{i}_top_values": counts["value"].collect(order_by=[counts["count"].desc(), counts["value"]], include_null=True),
+                f"c{i}_top_counts": counts["count"].collect(order_by=[counts["count"].desc(), counts["value"]]),
+            })
+            profile = profile.cross_join(top)
+    return profile
+
+
+def read_profile(row: pa.Table, top_k: int = 5) -> ResultProfile:
+    """Turn the single row returned by a profile_expression query into a ResultProfile."""
+    values = row.to_pylist()[0]
+    columns = {}
+    i = 0
+    while f"c{i}_name" in values:
+        name = values[f"c{i}_name"]
+        if f"c{i}_true" in values:
+            top = _boolean_top_values(values[f"c{i}_true"], values[f"c{i}_false"], values[f"c{i}_nulls"], top_k)
+        else:
+            top = zip(values.get(f"c{i}_top_values") or [], values.get(f"c{i}_top_counts") or [])
+        columns[name] = ColumnProfile(
+            name=name,
+            dtype=values[f"c{i}_dtype"],
+            null_count=int(values[f"c{i}_nulls"] or 0),
+            min=values.get(f"c{i}_min"),
+            max=values.get(f"c{i}_max"),
+            mean=_float(values.get(f"c{i}_mean")),
+            total=_float(values.get(f"c{i}_total")),
+            top_values=list(top),
+        )
+        i += 1
+    return ResultProfile(row_count=values["row_count"], columns=columns)
+
+
+def _boolean_top_values(true: int | None, false: int | None, nulls: int | None, top_k: int) -> list[tuple[Any, int]]:
+    # Ordered like the other top values: most frequent first, then by value with null last
+    counts = [(value, count) for value, count in ((False, false), (True, true), (None, nulls)) if count]
+    return sorted(counts, key=lambda item: -item[1])[:top_k]
+
+
+def profile_table(table: pa.Table, metrics: list[str], top_k: int = 5) -> ResultProfile:
+    """The same profile computed in-process over an Arrow result, e.g. one served from the cache."""
+    columns = {}
+    for name in table.column_names:
+        column = table[name]
+        dtype = dt.dtype(column.type)
+        profile = ColumnProfile(name=name, dtype=str(dtype), null_count=column.null_count)
+        if (_is_numeric(dtype) or dtype.is_temporal() or dtype.is_string()) and len(column) > profile.null_count:
+            bounds = pc.min_max(column)
+            profile.min, profile.max = bounds["min"].as_py(), bounds["max"].as_py()
+        if _is_numeric(dtype):
+            profile.mean = _float(pc.mean(column).as_py())
+            if name in metrics:
+                profile.total = _float(pc.sum(column).as_py())
+        if _is_categorical(dtype) and top_k > 0:
+            counts = pc.value_counts(column).flatten()
+            order = pc.sort_indices(pa.table({"count": counts[1], "value": counts[0]}), [("count", "descending"), ("value", "ascending")])
+            values, frequencies = pc.take(counts[0], order).to_pylist(), pc.take(counts[1], order).to_pylist()
+            profile.top_values = list(zip(values, frequencies))[:top_k]
+        columns[name] = profile
+    return ResultProfile(row_count=table.num_rows, columns=columns)
+
+
+def _float(value: Any) -> float | None:
+    return None if value is None else float(value)
@@ -0,0 +1,195 @@
+import bisect
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field, asdict
+from logging.handlers import RotatingFileHandler
+from typing import Any
+from ..biquery import BIQuery
+from .hooks import HookRegistry, StageEvent, STAGES
+
+# Upper bounds of the latency buckets in milliseconds, roughly logarithmic; the last bucket is unbounded
+LATENCY_BUCKETS_MS: tuple[float, ...] = (
+    1, 2, 5, 10, 20, 50, 100, 200, 500, 1_000, 2_000, 5_000, 10_000, 30_000, 60_000,
+)
+
+
+@dataclass
+class QueryLogEntry:
+    fingerprint: str
+    total_ms: float
+    stage_ms: dict[str, float] = field(default_factory=dict)
+    sql_hash: str | None = None  # only with QueryLog(hash_sql=True) and when SQL was compiled
+    rows: int | None = None
+    source: str | None = None  # see ResultSource
+    cache_hit: bool = False  # served whole from the cache; derived and rolled up results are told by source
+    error_code: str | None = None
+    timestamp: float = field(default_factory=time.time)
+
+
+class LatencyHistogram:
+    """Fixed bucket latency histogram; percentiles are reported as the upper bound of their bucket."""
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.min_ms = float("inf")
+        self.max_ms = 0.0
+
+    def observe(self, ms: float):
+        self.counts[bisect.bisect_left(self.buckets, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.min_ms = min(self.min_ms, ms)
+        self.max_ms = max(self.max_ms, ms)
+
+    @property
+    def mean_ms(self) -> float:
+        return self.total_ms / self.count if self.count else 0.0
+
+    def percentile(self, p: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = max(1, round(p / 100 * self.count))
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                # The overflow bucket has no upper bound, the largest observation is the best estimate
+                return min(self.buckets[i], self.max_ms) if i < len(self.buckets) else self.max_ms
+        return self.max_ms
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean_ms": self.mean_ms,
+            "min_ms": self.min_ms if self.count else 0.0,
+            "max_ms": self.max_ms,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "buckets": {
+                (f"<={bound:g}" if i < len(self.buckets) else f">{self.buckets[-1]:g}"): count
+                for i, (bound, count) in enumerate(zip(self.buckets + (float("inf"),), self.counts))
+                if count
+            },
+        }
+
+
+class QueryLog:
+    """
+    Records every query run by the QueryExecutors it is attached to: fingerprint, compiled SQL hash,
+    stage timings, rows, cache use and error code. Recent entries and per-fingerprint latency
+    histograms are kept in memory; queries slower than slow_query_ms are appended as JSON lines
+    to a size-rotated slow query file.
+    """
+    def __init__(
+        self,
+        slow_query_ms: float = 1000.0,
+        slow_query_path: str | None = None,
+        max_bytes: int = 10 * 1024 * 1024,
+        backup_count: int = 5,
+        max_entries: int = 1000,
+        max_fingerprints: int = 10_000,
+        hash_sql: bool = False,
+    ):
+        self.slow_query_ms = slow_query_ms
+        self.max_fingerprints = max_fingerprints
+        # Hashing needs the SQL, which the connection only renders separately when the compile stage
+        # is observed, so every query executed from the database is compiled twice
+        self.hash_sql = hash_sql
+        self.entries: deque[QueryLogEntry] = deque(maxlen=max_entries)
+        self._histograms: OrderedDict[str, LatencyHistogram] = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+        self._slow_log: logging.Logger | None = None
+        if slow_query_path is not None:
+            self._slow_log = logging.getLogger(f"{__name__}.slow.{id(self)}")
+            self._slow_log.propagate = False
+            self._slow_log.setLevel(logging.INFO)
+            handler = RotatingFileHandler(slow_query_path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self._slow_log.addHandler(handler)
+
+    def attach(self, hooks: HookRegistry):
+        """Collect stage timings (and the compiled SQL) from an executor's hooks."""
+        for stage in STAGES:
+            if stage != "compile" or self.hash_sql:
+                hooks.after(stage, self._on_stage)
+
+    def start(self):
+        """Begin recording the stages of a query on the current thread."""
+        self._local.current = QueryLogEntry(fingerprint="", total_ms=0.0)
+        self._local.start = time.perf_counter()
+
+    def finish(
+        self, fingerprint: str | None, biquery: BIQuery, result: Any | None = None, error_code: str | None = None
+    ) -> QueryLogEntry:
+        """
+        Complete the query started on this thread with its ExecutionResult (or an error code) and record it.
+        The fingerprint is None when the query could not be fingerprinted; it is then logged as "".
+        """
+        entry: QueryLogEntry | None = getattr(self._local, "current", None)
+        start: float | None = getattr(self._local, "start", None)
+        self._local.current = self._local.start = None
+        if entry is None:
+            entry = QueryLogEntry(fingerprint="", total_ms=0.0)
+        if start is not None:
+            entry.total_ms = (time.perf_counter() - start) * 1000
+        entry.fingerprint = fingerprint or ""
+        if result is not None:
+            entry.source = result.source
+            entry.cache_hit = result.source == "cache"
+            if result.result is not None:
+                entry.rows = result.result.num_rows
+            if result.errors and error_code is None:
+                error_code = result.errors[0].code
+        entry.error_code = error_code
+        self.record(entry, biquery)
+        return entry
+
+    def record(self, entry: QueryLogEntry, biquery: BIQuery | None = None):
+        with self._lock:
+            self.entries.append(entry)
+            histogram = self._histograms.get(entry.fingerprint)
+            if histogram is None:
+                histogram = self._histograms[entry.fingerprint] = LatencyHistogram()
+                while len(self._histograms) > self.max_fingerprints:
+                    self._histograms.popitem(last=False)
+            else:
+                self._histograms.move_to_end(entry.fingerprint)
+            histogram.observe(entry.total_ms)
+
+        if self._slow_log is not None and entry.total_ms >= self.slow_query_ms:
+            payload = asdict(entry) | {"query": asdict(biquery) if biquery is not None else None}
+            self._slow_log.info(json.dumps(payload, default=str))
+
+    def histogram(self, fingerprint: str) -> LatencyHistogram | None:
+        return self._histograms.get(fingerprint)
+
+    def summary(self, top: int | None = None) -> list[dict[str, Any]]:
+        """Per-fingerprint latency statistics, the fingerprints costing the most total time first."""
+        with self._lock:
+            rows = [{"fingerprint": fp} | h.to_dict() for fp, h in self._histograms.items()]
+        rows.sort(key=lambda row: row["mean_ms"] * row["count"], reverse=True)
+        return rows[:top] if top is not None else rows
+
+    def close(self):
+        if self._slow_log is not None:
+            for handler in list(self._slow_log.handlers):
+                handler.close()
+                self._slow_log.removeHandler(handler)
+
+    def _on_stage(self, event: StageEvent):
+        entry: QueryLogEntry | None = getattr(self._local, "current", None)
+        if entry is None:
+            return
+        # Stages can run more than once per query, e.g. when missing bases are fetched for derived metrics
+        entry.stage_ms[event.stage] = entry.stage_ms.get(event.stage, 0.0) + event.duration_ms
+        if event.stage == "compile" and event.output is not None:
+            entry.sql_hash = hashlib.sha256(event.output.encode()).hexdigest()
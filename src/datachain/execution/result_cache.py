@@ -0,0 +1,72 @@
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+import pyarrow as pa
+
+
+@dataclass(frozen=True)
+class CachedResult:
+    """
+    A query result together with what is needed to reuse it for other queries.
+    grain_key identifies the filters the result was computed under, dimensions and
+    metrics map each column name to the digest of its definition.
+    """
+    fingerprint: str
+    grain_key: str
+    dimensions: dict[str, str]
+    metrics: dict[str, str]
+    table: pa.Table
+    complete: bool  # False when a limit or offset truncated the rows
+
+
+@dataclass()
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+
+class ResultCache:
+    """Bounded LRU cache of query results, shared by the execution layer."""
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self.stats = CacheStats()
+        self._entries: OrderedDict[str, CachedResult] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, fingerprint: str) -> bool:
+        """Membership test that neither counts as a hit or miss nor refreshes recency."""
+        return fingerprint in self._entries
+
+    def get(self, fingerprint: str) -> CachedResult | None:
+        with self._lock:
+            entry = self._entries.get(fingerprint)
+            if entry is None:
+                self.stats.misses += 1
+                return None
+            self._entries.move_to_end(fingerprint)
+            self.stats.hits += 1
+            return entry
+
+    def put(self, entry: CachedResult):
+        with self._lock:
+            self._entries[entry.fingerprint] = entry
+            self._entries.move_to_end(entry.fingerprint)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    def candidates(self, grain_key: str) -> list[CachedResult]:
+        """Complete results computed under the same filters, most recently used first."""
+        with self._lock:
+            return [
+                entry for entry in reversed(self._entries.values())
+                if entry.grain_key == grain_key and entry.complete
+            ]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
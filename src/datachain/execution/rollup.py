@@ -0,0 +1,34 @@
+import ibis.expr.operations as ops
+import pyarrow as pa
+from ..data_model import Metric
+
+# Re-aggregation function for each additive reduction: partial sums and counts add up,
+# partial minima and maxima take the min/max again. Anything else (AVG, COUNT DISTINCT,
+# MEDIAN, ...) cannot be rolled up from a finer grain.
+
+_ROLLUPS = {
+    ops.Sum: "sum",
+    ops.Count: "sum",
+    ops.CountStar: "sum",
+    ops.Min: "min",
+    ops.Max: "max",
+}
+
+
+def rollup_function(metric: Metric) -> str | None:
+    """The Arrow aggregation that rolls the metric up to a coarser grain, None if it is not additive."""
+    if metric._cached_expr is None:
+        return None
+    return _ROLLUPS.get(type(metric._cached_expr.op()))
+
+
+def roll_up(table: pa.Table, dimensions: list[str], aggregations: dict[str, str]) -> pa.Table:
+    """Re-aggregate a finer grained result to the given dimensions with a vectorized group by."""
+    grouped = table.group_by(dimensions, use_threads=False).aggregate(
+        [(column, function) for column, function in aggregations.items()]
+    )
+    # Arrow names aggregates '<column>_<function>' and appends the keys; restore the query's layout
+    return pa.table(
+        {d: grouped[d] for d in dimensions}
+        | {column: grouped[f"{column}_{function}"].cast(table.schema.field(column).type) for column, function in aggregations.items()}
+    )
@@ -1 +1,2 @@
-from logical_plan import LogicalPlan, PlanningResult
\ No newline at end of file
+from .logical_plan import LogicalPlan, PlanningResult
+from .planner import generate_logical_plan
\ No newline at end of file
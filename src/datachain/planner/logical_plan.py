@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from datachain.data_model import TableModel, Relationship
+from ..data_model import TableModel, Relationship
 from ..errors import DataChainError
 
 @dataclass()
@@ -1,6 +1,6 @@
 from .logical_plan import LogicalPlan, PlanningResult
-from datachain.data_model import DataModel, TableModel, Relationship
-from datachain.resolver import ResolvedQuery
+from ..data_model import DataModel, TableModel, Relationship
+from ..resolver import ResolvedQuery
 from ..errors import DataChainError
 
 def generate_logical_plan(query: ResolvedQuery, data_model: DataModel) -> PlanningResult:
@@ -25,11 +25,13 @@ def generate_logical_plan(query: ResolvedQuery, data_model: DataModel) -> Planni
         ))
         return PlanningResult(success=False, logical_plan=None, errors=errors)
     
-    relationships = [find_join_path_to_base_table(base_table, table, graph) for table in tables if table != base_table]
+    # Paths run from each table towards the base table; reversed they give the order to join in
+    paths = [find_join_path_to_base_table(base_table, table, graph) for table in tables if table != base_table]
     joins = []
-    for rel in relationships:
-        if rel not in joins:
-            joins.append(rel)
+    for path in paths:
+        for rel in reversed(path):
+            if rel not in joins:
+                joins.append(rel)
     
     logical_plan = LogicalPlan(base_table=base_table, joins=joins)
     return PlanningResult(success=True, logical_plan=logical_plan, errors=errors)
@@ -52,8 +54,8 @@ def get_tables_in_query(
     for obj in objects:
         expr = obj._cached_expr # resolve should have been called during resolution, so _cached_expr should be populated
 
-        for relation in expr.relations:
-            table_name = relation.get_name()
+        for relation in expr.op().relations:
+            table_name = relation.name
             table_model = data_model.get_table(table_name)
 
             if table_model is not None:
@@ -84,7 +86,7 @@ def bfs_distances(start: TableModel, graph: dict[TableModel, list[Relationship]]
         current = queue.pop(0)
         current_distance = visited[current]
 
-        for neighbor in graph.get(current, []):
+        for neighbor in graph.get(current.name, []):
             if neighbor.right not in visited:
                 visited[neighbor.right] = current_distance + 1
                 queue.append(neighbor.right)
@@ -101,7 +103,7 @@ def find_join_path_to_base_table(base_table: TableModel, table,  graph: dict[Tab
     
     visited.add(table)
 
-    for rel in graph.get(table, []):
+    for rel in graph.get(table.name, []):
         if rel.right in visited:
             continue
         
@@ -0,0 +1,92 @@
+import copy
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from .models import BIQuery, SemanticModel, SQLQuery
+from .types import QueryContext, PlanCacheStats
+from .tracing import Tracer
+
+
+# Filters are a conjunction, so their order does not change the query
+_UNORDERED_FIELDS = ("measure_filters", "kpi_filters", "dimension_filters", "filter_refs")
+
+
+def canonical_query_key(bi_query: BIQuery) -> str:
+    """
+    A canonical JSON form of the query: filters are sorted (as are IN list values) while
+    dimensions, measures, kpis and order bys keep their order since it shapes the result.
+    """
+    data = bi_query.model_dump(mode="json")
+    for name in _UNORDERED_FIELDS:
+        items = data[name]
+        for item in items:
+            if isinstance(item, dict) and isinstance(item.get("value"), list):
+                item["value"] = sorted(item["value"], key=str)
+        data[name] = sorted(items, key=lambda item: json.dumps(item, sort_keys=True))
+    return json.dumps(data, sort_keys=True, separators=(",", ":"))
+
+
+def semantic_model_version(semantic_model: SemanticModel) -> str:
+    """Content hash of the semantic model and its populated grain columns; any edit yields a new version"""
+    digest = hashlib.sha256(semantic_model.model_dump_json().encode())
+    digest.update(json.dumps(sorted(semantic_model.populated_time_grains)).encode())
+    return digest.hexdigest()
+
+
+@dataclass(frozen=True)
+class PlannedQuery:
+    """A cached plan. It owns its SQLQuery and context (stored without a tracer); hand out copies"""
+    sql_query: SQLQuery
+    sql: str | None
+    context: QueryContext
+
+    @classmethod
+    def detached(cls, sql_query: SQLQuery, sql: str | None, context: QueryContext) -> "PlannedQuery":
+        return cls(sql_query.model_copy(deep=True), sql, copy_context(context, tracer=None))
+
+    def copy(self, tracer: Tracer) -> tuple[SQLQuery, QueryContext]:
+        return self.sql_query.model_copy(deep=True), copy_context(self.context, tracer)
+
+
+def copy_context(context: QueryContext, tracer: Tracer | None) -> QueryContext:
+    """Deep copy of a context with another tracer, spans belong to the run that recorded them"""
+    return replace(copy.deepcopy(replace(context, tracer=None)), tracer=tracer)
+
+
+class PlanCache:
+    """
+    Bounded LRU cache from (canonical BIQuery, semantic model version) to the planned
+    and compiled query. Entries are immutable snapshots; every hit gets its own copy.
+    """
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self.stats = PlanCacheStats()
+        self._entries: OrderedDict[tuple[str, str], PlannedQuery] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: tuple[str, str]) -> PlannedQuery | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return entry
+
+    def put(self, key: tuple[str, str], entry: PlannedQuery):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
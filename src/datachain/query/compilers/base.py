@@ -1,8 +1,26 @@
+from dataclasses import dataclass, field
+from typing import Any
 from ..models import SQLQuery
 
+
+@dataclass(frozen=True)
+class ParameterizedSQL:
+    """
+    SQL with positional placeholders and the values to bind to them, in order.
+    temp_tables holds the values of large IN lists, which the SQL reads from a
+    single 'value' column of a table with that name.
+    """
+    sql: str
+    params: list[Any] = field(default_factory=list)
+    temp_tables: dict[str, list[Any]] = field(default_factory=dict)
+
+
 class BaseSQLCompiler():
     """
     Abstract implementation of what a SQLCompiler needs to implement
     """
-    def compile(query: SQLQuery) -> str:
+    def compile(self, query: SQLQuery) -> str:
+        raise NotImplementedError()
+
+    def compile_parameterized(self, query: SQLQuery) -> ParameterizedSQL:
         raise NotImplementedError()
\ No newline at end of file
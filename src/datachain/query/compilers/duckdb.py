@@ -1,4 +1,8 @@
-from .base import BaseSQLCompiler
+import math
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from .base import BaseSQLCompiler, ParameterizedSQL
 from ..models import SQLQuery
 from ..models import (
     SelectItem,
@@ -21,204 +25,358 @@ from ..models import (
 )
 
 
+def render_literal(v) -> str:
+    """
+    Render a scalar as a SQL literal, escaping quotes in strings. NaN and infinities
+    are cast from strings, since a bare nan or inf would be read as a column name
+    """
+    if v is None:
+        return 'NULL'
+    if isinstance(v, bool):
+        return 'TRUE' if v else 'FALSE'
+    if isinstance(v, str):
+        escaped = v.replace("'", "''")
+        return f"'{escaped}'"
+    if isinstance(v, float) and not math.isfinite(v):
+        return f"'{v}'::DOUBLE"
+    return str(v)
+
+
+def quote_identifier(name: str) -> str:
+    """Double quote identifiers that are not plain words, e.g. the planner's 'Sales region' aliases"""
+    if name.isidentifier():
+        return name
+    escaped = name.replace('"', '""')
+    return f'"{escaped}"'
+
+
+def _identifier(table: str, column: str) -> str:
+    return f"{quote_identifier(table)}.{quote_identifier(column)}"
+
+
+@dataclass
+class _WindowLayer:
+    """
+    Window functions of a query, evaluated once in a projection over the CTE.
+    Each distinct window is declared once in a WINDOW clause and each distinct window
+    function (e.g. a LAG shared by ABSOLUTE and PERCENTAGE changes) is projected once.
+    """
+    windows: dict[str, str] = field(default_factory=dict)  # window definition -> name
+    projections: dict[str, str] = field(default_factory=dict)  # window function -> column
+
+    def window(self, definition: str) -> str:
+        if definition not in self.windows:
+            self.windows[definition] = f"w{len(self.windows)}"
+        return self.windows[definition]
+
+    def project(self, function: str) -> str:
+        if function not in self.projections:
+            self.projections[function] = f"__window_{len(self.projections)}"
+        return f"cte.{self.projections[function]}"
+
+
+@dataclass
+class _Bindings:
+    """Values collected while compiling in parameterized mode"""
+    params: list = field(default_factory=list)
+    temp_tables: dict[str, list] = field(default_factory=dict)
+
+
+def _enum_value(v) -> str:
+    return v.value if hasattr(v, 'value') else str(v)
+
+
 class DuckDbCompiler(BaseSQLCompiler):
-    @staticmethod
-    def compile(query: SQLQuery) -> str:
-        
-        def render_identifier(table: str, column: str) -> str:
-            return f"{table}.{column}"
-
-        def render_metric(expr) -> str:
-            if isinstance(expr, QueryColumn):
-                return render_identifier(expr.table, expr.name)
-            if isinstance(expr, TimeGrainedQueryColumn):
-                # Use date_trunc style for time grain where appropriate
-                return f"{expr.time_grain}({render_identifier(expr.table, expr.name)})"
-            if isinstance(expr, SQLMeasure):
-                agg = expr.aggregation.value if hasattr(expr.aggregation, 'value') else str(expr.aggregation)
-                return f"{agg}({render_identifier(expr.table, expr.column)})"
-            if isinstance(expr, BinaryMetric):
-                left = render_metric(expr.left)
-                op = expr.arithmetic.value
-                right = render_metric(expr.right)
-                return f"({left} {op} {right})"
-            if isinstance(expr, WindowSpec):
-                field = expr.field
-                partition = ''
-                order = ''
-                if expr.partition_by:
-                    parts = [render_metric(p) for p in expr.partition_by]
-                    partition = 'PARTITION BY ' + ', '.join(parts)
-                if expr.order_by:
-                    parts = []
-                    for o in expr.order_by:
-                        if isinstance(o, OrderBy):
-                            parts.append(f"{render_metric(o.column)} {o.sorting.value}")
-                        else:
-                            parts.append(render_metric(o))
-                    order = 'ORDER BY ' + ', '.join(parts)
-
-                over = ' '.join([s for s in (partition, order) if s])
-
-                # Support simple change and moving average windows
-                w = expr.window
-                if isinstance(w, SQLChangeWindow):
-                    # ABSOLUTE: field - lag(field, period)
-                    # PERCENTAGE: (field - lag(field, period)) / NULLIF(lag(field, period),0) * 100
-                    lag = f"LAG({field}, {w.period}) OVER ({over})"
-                    if w.mode == 'ABSOLUTE':
-                        return f"({field} - {lag})"
-                    return f"(({field} - {lag}) / NULLIF({lag},0) * 100)"
-                if isinstance(w, SQLMovingAverageWindow):
-                    # Simple moving average using window frame of preceding (period-1) rows
-                    return f"AVG({field}) OVER ({over} ROWS BETWEEN {w.period-1} PRECEDING AND CURRENT ROW)"
-
-                return f"{field} OVER ({over})"
-
-            # Fallback
-            return str(expr)
-
-        def render_value(v):
-            if v is None:
-                return 'NULL'
-            if isinstance(v, str):
-                return f"'{v}'"
-            if isinstance(v, list):
-                items = ', '.join(render_value(x) for x in v)
-                return f"({items})"
-            return str(v)
-
-        def render_pred(pred) -> str:
-            if pred is None:
-                return ''
-            if isinstance(pred, Comparison):
-                comp = pred.comparator.value if hasattr(pred.comparator, 'value') else str(pred.comparator)
-                if comp in ('IS NULL', 'IS NOT NULL'):
-                    return f"{render_identifier(pred.table, pred.column)} {comp}"
-                if comp in ('IN', 'NOT IN'):
-                    return f"{render_identifier(pred.table, pred.column)} {comp} {render_value(pred.value)}"
-                return f"{render_identifier(pred.table, pred.column)} {comp} {render_value(pred.value)}"
-            if isinstance(pred, ColumnComparison):
-                comp = pred.comparator.value if hasattr(pred.comparator, 'value') else str(pred.comparator)
-                return f"{pred.left} {comp} {pred.right}"
-            if isinstance(pred, And):
-                parts = [render_pred(p) for p in pred.predicates]
-                return '(' + ' AND '.join(parts) + ')'
-            if isinstance(pred, Or):
-                parts = [render_pred(p) for p in pred.predicates]
-                return '(' + ' OR '.join(parts) + ')'
-            if isinstance(pred, Not):
-                return f"NOT ({render_pred(pred.predicate)})"
+    """
+    Compiles SQLQuery ASTs into DuckDB SQL.
 
-            return str(pred)
+    A compiler is meant to be created once and reused: nodes are rendered through
+    per-type dispatch tables, and metric expressions (which never carry parameters)
+    are memoized by structure in a bounded LRU, so a measure repeated in SELECT,
+    HAVING and ORDER BY, or across queries, is rendered once. The memo is guarded by a
+    lock, so one compiler can be shared by threads.
 
-        def render_join(j: Join) -> str:
-            conditions = []
-            for l, r in zip(j.left_keys, j.right_keys):
-                conditions.append(f"{j.left_table}.{l} = {j.right_table}.{r}")
-            on = ' AND '.join(conditions)
-            return f"LEFT JOIN {j.right_table} ON {on}"
+    In parameterized mode, IN / NOT IN lists longer than in_list_threshold are not
+    inlined: their values are returned as temporary tables and matched with a subquery,
+    which DuckDB plans as a semi (or anti) join. None disables this.
+    """
+    def __init__(self, max_memo_entries: int = 4096, in_list_threshold: int | None = 1000):
+        self.max_memo_entries = max_memo_entries
+        self.in_list_threshold = in_list_threshold
+        self._memo: OrderedDict[tuple, str] = OrderedDict()
+        self._memo_lock = threading.Lock()
+        self._metric_renderers = {
+            QueryColumn: self._render_column,
+            TimeGrainedQueryColumn: self._render_time_grained_column,
+            SQLMeasure: self._render_measure,
+            BinaryMetric: self._render_binary_metric,
+            WindowSpec: self._render_window,
+        }
+        # Structural memo keys; window specs are rare and not memoized
+        self._metric_keys = {
+            QueryColumn: lambda e: (QueryColumn, e.table, e.name),
+            TimeGrainedQueryColumn: lambda e: (TimeGrainedQueryColumn, e.time_grain, e.table, e.name),
+            SQLMeasure: lambda e: (SQLMeasure, e.table, e.column, e.aggregation),
+            BinaryMetric: self._binary_metric_key,
+        }
+        self._predicate_renderers = {
+            Comparison: self._render_comparison,
+            ColumnComparison: self._render_column_comparison,
+            And: lambda p, bindings: '(' + ' AND '.join(self._render_pred(x, bindings) for x in p.predicates) + ')',
+            Or: lambda p, bindings: '(' + ' OR '.join(self._render_pred(x, bindings) for x in p.predicates) + ')',
+            Not: lambda p, bindings: f"NOT ({self._render_pred(p.predicate, bindings)})",
+        }
 
-        def render_group_by(group_by: list[GroupBy]) -> str:
-            if not group_by:
-                return ''
-            parts = []
-            for g in group_by:
-                if isinstance(g.column, TimeGrainedQueryColumn):
-                    parts.append(render_metric(g.column))
-                else:
-                    parts.append(render_identifier(g.table, g.column.name if hasattr(g.column, 'name') else g.column))
-            return 'GROUP BY ' + ', '.join(parts)
+    def __reduce__(self):
+        # The dispatch tables hold lambdas; rebuild them from the settings when unpickling
+        return (DuckDbCompiler, (self.max_memo_entries, self.in_list_threshold))
 
-        def render_order_by(order_by: list[OrderBy]) -> str:
-            if not order_by:
-                return ''
-            parts = []
-            for o in order_by:
-                col = o.column
-                if isinstance(col, (QueryColumn, TimeGrainedQueryColumn, SQLMeasure, BinaryMetric, WindowSpec)):
-                    parts.append(f"{render_metric(col)} {o.sorting.value}")
-                else:
-                    parts.append(f"{col} {o.sorting.value}")
-            return 'ORDER BY ' + ', '.join(parts)
+    def compile(self, query: SQLQuery) -> str:
+        return self._compile_query(query, bindings=None)
+
+    def compile_parameterized(self, query: SQLQuery) -> ParameterizedSQL:
+        """
+        Compile with $n placeholders in place of filter values so that queries of the
+        same shape share one SQL skeleton (and one prepared statement).
+        """
+        bindings = _Bindings()
+        sql = self._compile_query(query, bindings=bindings)
+        return ParameterizedSQL(sql=sql, params=bindings.params, temp_tables=bindings.temp_tables)
+
+    def render_expression(self, expr) -> str:
+        """Render a single column or metric expression"""
+        return self._render_metric(expr)
+
+    def clear_memo(self):
+        with self._memo_lock:
+            self._memo.clear()
+
+    # Metrics
+
+    def _metric_key(self, expr) -> tuple | None:
+        key_fn = self._metric_keys.get(type(expr))
+        if key_fn is None:
+            return None
+        return key_fn(expr)
+
+    def _binary_metric_key(self, expr: BinaryMetric) -> tuple | None:
+        left = self._metric_key(expr.left)
+        right = self._metric_key(expr.right)
+        if left is None or right is None:
+            return None
+        return (BinaryMetric, left, expr.arithmetic, right)
+
+    def _render_metric(self, expr) -> str:
+        key = self._metric_key(expr)
+        if key is not None:
+            with self._memo_lock:
+                sql = self._memo.get(key)
+                if sql is not None:
+                    self._memo.move_to_end(key)
+                    return sql
+
+        renderer = self._metric_renderers.get(type(expr))
+        sql = renderer(expr) if renderer is not None else str(expr)
+
+        if key is not None:
+            with self._memo_lock:
+                self._memo[key] = sql
+                while len(self._memo) > self.max_memo_entries:
+                    self._memo.popitem(last=False)
+        return sql
+
+    def _render_column(self, expr: QueryColumn) -> str:
+        return _identifier(expr.table, expr.name)
 
-        def render_select_columns(cols: list[SelectItem]) -> str:
+    def _render_time_grained_column(self, expr: TimeGrainedQueryColumn) -> str:
+        return f"{expr.time_grain}({_identifier(expr.table, expr.name)})"
+
+    def _render_measure(self, expr: SQLMeasure) -> str:
+        return f"{_enum_value(expr.aggregation)}({_identifier(expr.table, expr.column)})"
+
+    def _render_binary_metric(self, expr: BinaryMetric) -> str:
+        return f"({self._render_metric(expr.left)} {expr.arithmetic.value} {self._render_metric(expr.right)})"
+
+    def _render_window_definition(self, expr: WindowSpec) -> str:
+        partition = ''
+        order = ''
+        if expr.partition_by:
+            partition = 'PARTITION BY ' + ', '.join(self._render_metric(p) for p in expr.partition_by)
+        if expr.order_by:
             parts = []
-            for c in cols:
-                expr = c.expression
-                sql = render_metric(expr)
-                if c.alias:
-                    parts.append(f"{sql} AS {c.alias}")
+            for o in expr.order_by:
+                if isinstance(o, OrderBy):
+                    parts.append(f"{self._render_metric(o.column)} {o.sorting.value}")
                 else:
-                    parts.append(sql)
-            return ', '.join(parts)
-
-        # Internal compile that can produce either a subquery body or full WITH-wrapped query
-        def _compile(q: SQLQuery, as_subquery: bool = False) -> str:
-            select_clause = 'SELECT ' + (render_select_columns(q.columns) if q.columns else '*')
-            # FROM
-            if isinstance(q.from_, SQLQuery):
-                # compile inner as subquery for CTE
-                inner = _compile(q.from_, as_subquery=True)
-                from_clause = f"FROM ({inner}) AS cte"
+                    parts.append(self._render_metric(o))
+            order = 'ORDER BY ' + ', '.join(parts)
+        return ' '.join([s for s in (partition, order) if s])
+
+    def _render_window(self, expr: WindowSpec) -> str:
+        """Inline rendering, for window specs outside of a CTE query"""
+        field = quote_identifier(expr.field)
+        over = self._render_window_definition(expr)
+
+        # Support simple change and moving average windows
+        w = expr.window
+        if isinstance(w, SQLChangeWindow):
+            # ABSOLUTE: field - lag(field, period)
+            # PERCENTAGE: (field - lag(field, period)) / NULLIF(lag(field, period),0) * 100
+            lag = f"LAG({field}, {w.period}) OVER ({over})"
+            if w.mode == 'ABSOLUTE':
+                return f"({field} - {lag})"
+            return f"(({field} - {lag}) / NULLIF({lag},0) * 100)"
+        if isinstance(w, SQLMovingAverageWindow):
+            # Simple moving average using window frame of preceding (period-1) rows
+            return f"AVG({field}) OVER ({over} ROWS BETWEEN {w.period-1} PRECEDING AND CURRENT ROW)"
+
+        return f"{field} OVER ({over})"
+
+    def _render_window_reference(self, expr: WindowSpec, layer: _WindowLayer) -> str:
+        """Register the window functions of the spec on the layer and reference their projections"""
+        field = quote_identifier(expr.field)
+        name = layer.window(self._render_window_definition(expr))
+
+        w = expr.window
+        if isinstance(w, SQLChangeWindow):
+            lag = layer.project(f"LAG({field}, {w.period}) OVER {name}")
+            if w.mode == 'ABSOLUTE':
+                return f"(cte.{field} - {lag})"
+            return f"((cte.{field} - {lag}) / NULLIF({lag},0) * 100)"
+        if isinstance(w, SQLMovingAverageWindow):
+            return layer.project(f"AVG({field}) OVER ({name} ROWS BETWEEN {w.period-1} PRECEDING AND CURRENT ROW)")
+
+        return layer.project(f"{field} OVER {name}")
+
+    # Predicates
+
+    def _render_value(self, v, bindings: _Bindings | None) -> str:
+        if isinstance(v, list):
+            items = ', '.join(self._render_value(x, bindings) for x in v)
+            return f"({items})"
+        if bindings is not None:
+            bindings.params.append(v)
+            return f"${len(bindings.params)}"
+        return render_literal(v)
+
+    def _render_pred(self, pred, bindings: _Bindings | None) -> str:
+        if pred is None:
+            return ''
+        renderer = self._predicate_renderers.get(type(pred))
+        if renderer is None:
+            return str(pred)
+        return renderer(pred, bindings)
+
+    def _render_comparison(self, pred: Comparison, bindings: _Bindings | None) -> str:
+        comp = _enum_value(pred.comparator)
+        if comp in ('IS NULL', 'IS NOT NULL'):
+            return f"{_identifier(pred.table, pred.column)} {comp}"
+        if comp in ('IN', 'NOT IN') and self._is_large_list(pred.value, bindings):
+            name = f"__datachain_in_list_{len(bindings.temp_tables)}"
+            bindings.temp_tables[name] = pred.value
+            return f"{_identifier(pred.table, pred.column)} {comp} (SELECT value FROM {name})"
+        return f"{_identifier(pred.table, pred.column)} {comp} {self._render_value(pred.value, bindings)}"
+
+    def _is_large_list(self, value, bindings: _Bindings | None) -> bool:
+        return (
+            bindings is not None
+            and self.in_list_threshold is not None
+            and isinstance(value, list)
+            and len(value) > self.in_list_threshold
+        )
+
+    def _render_column_comparison(self, pred: ColumnComparison, bindings: _Bindings | None) -> str:
+        return f"{pred.left} {_enum_value(pred.comparator)} {pred.right}"
+
+    # Clauses
+
+    def _render_join(self, j: Join) -> str:
+        on = ' AND '.join(f"{_identifier(j.left_table, l)} = {_identifier(j.right_table, r)}" for l, r in zip(j.left_keys, j.right_keys))
+        return f"LEFT JOIN {quote_identifier(j.right_table)} ON {on}"
+
+    def _render_group_by(self, group_by: list[GroupBy]) -> str:
+        parts = []
+        for g in group_by:
+            if isinstance(g.column, TimeGrainedQueryColumn):
+                parts.append(self._render_metric(g.column))
+            else:
+                parts.append(_identifier(g.table, g.column.name if hasattr(g.column, 'name') else g.column))
+        return 'GROUP BY ' + ', '.join(parts)
+
+    def _render_order_by(self, order_by: list[OrderBy]) -> str:
+        parts = []
+        for o in order_by:
+            col = o.column
+            if type(col) in self._metric_renderers:
+                parts.append(f"{self._render_metric(col)} {o.sorting.value}")
             else:
-                from_clause = f"FROM {q.from_}"
+                parts.append(f"{col} {o.sorting.value}")
+        return 'ORDER BY ' + ', '.join(parts)
 
-            join_clause = ''
-            if q.joins:
-                join_clause = ' ' + ' '.join(render_join(j) for j in q.joins)
+    def _render_select_columns(self, cols: list[SelectItem], layer: _WindowLayer | None = None) -> str:
+        parts = []
+        for c in cols:
+            if layer is not None and isinstance(c.expression, WindowSpec):
+                sql = self._render_window_reference(c.expression, layer)
+            else:
+                sql = self._render_metric(c.expression)
+            parts.append(f"{sql} AS {quote_identifier(c.alias)}" if c.alias else sql)
+        return ', '.join(parts)
 
-            where_clause = ''
-            if q.filters:
-                where_clause = 'WHERE ' + render_pred(q.filters)
+    def _render_having(self, having, bindings: _Bindings | None) -> str:
+        if isinstance(having, HavingComparison):
+            return f"HAVING {self._render_metric(having.metric)} {having.comparator.value} {self._render_value(having.value, bindings)}"
+        return 'HAVING ' + self._render_pred(having, bindings)
 
-            group_clause = render_group_by(q.group_by) if getattr(q, 'group_by', None) else ''
+    # Queries
+
+    def _compile_body(self, q: SQLQuery, bindings: _Bindings | None) -> str:
+        parts = ['SELECT ' + (self._render_select_columns(q.columns) if q.columns else '*')]
+        if isinstance(q.from_, SQLQuery):
+            parts.append(f"FROM ({self._compile_body(q.from_, bindings)}) AS cte")
+        else:
+            parts.append(f"FROM {quote_identifier(q.from_)}")
+        if q.joins:
+            parts.append(' ' + ' '.join(self._render_join(j) for j in q.joins))
+        if q.filters:
+            parts.append('WHERE ' + self._render_pred(q.filters, bindings))
+        if q.group_by:
+            parts.append(self._render_group_by(q.group_by))
+        if q.having:
+            parts.append(self._render_having(q.having, bindings))
+        if q.order_by:
+            parts.append(self._render_order_by(q.order_by))
+        if q.limit is not None:
+            parts.append(f"LIMIT {q.limit}")
+        if q.offset is not None:
+            parts.append(f"OFFSET {q.offset}")
+        return '\n'.join(parts)
+
+    def _compile_query(self, query: SQLQuery, bindings: _Bindings | None) -> str:
+        if not isinstance(query.from_, SQLQuery):
+            return self._compile_body(query, bindings)
+
+        # A nested top-level query is rendered as a CTE. Window functions are evaluated in a
+        # projection over it, so shared windows and lagged values are computed once
+        inner = self._compile_body(query.from_, bindings)
+        layer = _WindowLayer()
+        select_clause = 'SELECT ' + (self._render_select_columns(query.columns, layer) if query.columns else '*')
+
+        if layer.projections:
+            projections = ', '.join(f"{function} AS {column}" for function, column in layer.projections.items())
+            windows = ', '.join(f"{name} AS ({definition})" for definition, name in layer.windows.items())
+            parts = [
+                "WITH cte AS (", inner, "),",
+                "windowed AS (", f"SELECT *, {projections}", "FROM cte", f"WINDOW {windows}", ")",
+                select_clause,
+                'FROM windowed AS cte',
+            ]
+        else:
+            parts = ["WITH cte AS (", inner, ")", select_clause, 'FROM cte']
+
+        if query.order_by:
+            parts.append(self._render_order_by(query.order_by))
+        if query.limit is not None:
+            parts.append(f"LIMIT {query.limit}")
+        return '\n'.join(parts)
 
-            having_clause = ''
-            if q.having:
-                if isinstance(q.having, HavingComparison):
-                    having_clause = 'HAVING ' + f"{render_metric(q.having.metric)} {q.having.comparator.value} {render_value(q.having.value)}"
-                else:
-                    having_clause = 'HAVING ' + render_pred(q.having)
-
-            order_clause = render_order_by(q.order_by) if getattr(q, 'order_by', None) else ''
-
-            limit_clause = f"LIMIT {q.limit}" if getattr(q, 'limit', None) is not None else ''
-            offset_clause = f"OFFSET {q.offset}" if getattr(q, 'offset', None) is not None else ''
-
-            parts = [select_clause, from_clause]
-            if join_clause:
-                parts.append(join_clause)
-            if where_clause:
-                parts.append(where_clause)
-            if group_clause:
-                parts.append(group_clause)
-            if having_clause:
-                parts.append(having_clause)
-            if order_clause:
-                parts.append(order_clause)
-            if limit_clause:
-                parts.append(limit_clause)
-            if offset_clause:
-                parts.append(offset_clause)
-
-            body = '\n'.join(parts)
-            return body
-
-        # If top-level from_ is SQLQuery we should render as CTE
-        if isinstance(query.from_, SQLQuery):
-            inner = _compile(query.from_, as_subquery=True)
-            outer_select = 'SELECT ' + (render_select_columns(query.columns) if query.columns else '*')
-            outer_from = 'FROM cte'
-            outer_order = render_order_by(query.order_by) if getattr(query, 'order_by', None) else ''
-            outer_limit = f"LIMIT {query.limit}" if getattr(query, 'limit', None) is not None else ''
-
-            body_parts = [f"WITH cte AS (", inner, ")", outer_select, outer_from]
-            if outer_order:
-                body_parts.append(outer_order)
-            if outer_limit:
-                body_parts.append(outer_limit)
-
-            return '\n'.join(body_parts)
-
-        return _compile(query)
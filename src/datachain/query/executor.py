@@ -0,0 +1,90 @@
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+import pyarrow as pa
+from .models import SQLQuery
+from .compilers.base import ParameterizedSQL
+from .compilers.duckdb import DuckDbCompiler, render_literal
+from .tracing import Tracer
+
+
+@dataclass
+class StatementCacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+
+class DuckDbExecutor():
+    """
+    Executes SQLQuery ASTs on a DuckDB connection.
+    Queries are compiled in parameterized mode and each distinct SQL skeleton is
+    PREPAREd once, so repeated query shapes skip parsing, binding and planning.
+    Large IN lists are registered as Arrow tables for the duration of the query;
+    statements reading them are not cached, since a prepared statement stays bound
+    to the table that was registered when it was prepared.
+    """
+    def __init__(self, con: Any, max_statements: int = 256, compiler: DuckDbCompiler | None = None):
+        self.con = con
+        self.max_statements = max_statements
+        self.compiler = compiler or DuckDbCompiler()
+        self.stats = StatementCacheStats()
+        self._statements: OrderedDict[str, str] = OrderedDict()  # sql skeleton -> statement name
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def execute(self, query: SQLQuery, tracer: Tracer | None = None) -> pa.Table:
+        if tracer is None:
+            return self.execute_sql(self.compiler.compile_parameterized(query))
+
+        with tracer.span("compile"):
+            compiled = self.compiler.compile_parameterized(query)
+        return self.execute_sql(compiled, tracer)
+
+    def execute_sql(self, compiled: ParameterizedSQL, tracer: Tracer | None = None) -> pa.Table:
+        if tracer is None:
+            return self._execute_sql(compiled)
+
+        with tracer.span("execute") as span:
+            hits = self.stats.hits
+            table = self._execute_sql(compiled)
+            span.attributes["rows"] = table.num_rows
+            span.attributes["prepared_statement_hit"] = self.stats.hits > hits
+        return table
+
+    def _execute_sql(self, compiled: ParameterizedSQL) -> pa.Table:
+        with self._lock:
+            # Temp tables must exist before the statement referencing them is planned
+            for table, values in compiled.temp_tables.items():
+                self.con.register(table, pa.table({"value": values}))
+            try:
+                if compiled.temp_tables:
+                    return self.con.execute(compiled.sql, compiled.params).to_arrow_table()
+                name = self._prepare(compiled.sql)
+                # EXECUTE cannot take bound parameters itself, so the values are passed as literals
+                args = ', '.join(render_literal(p) for p in compiled.params)
+                statement = f"EXECUTE {name}({args})" if args else f"EXECUTE {name}"
+                return self.con.execute(statement).to_arrow_table()
+            finally:
+                for table in compiled.temp_tables:
+                    self.con.unregister(table)
+
+    def _prepare(self, sql: str) -> str:
+        name = self._statements.get(sql)
+        if name is not None:
+            self._statements.move_to_end(sql)
+            self.stats.hits += 1
+            return name
+
+        self.stats.misses += 1
+        name = f"datachain_stmt_{self._next_id}"
+        self._next_id += 1
+        self.con.execute(f"PREPARE {name} AS {sql}")
+        self._statements[sql] = name
+
+        while len(self._statements) > self.max_statements:
+            _, evicted = self._statements.popitem(last=False)
+            self.con.execute(f"DEALLOCATE {evicted}")
+            self.stats.evictions += 1
+        return name
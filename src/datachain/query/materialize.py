@@ -0,0 +1,34 @@
+from typing import Any
+from .models import SemanticModel, TimeGrainedQueryColumn
+from .compilers.duckdb import DuckDbCompiler, quote_identifier
+
+
+def materialize_time_grains(con: Any, semantic_model: SemanticModel, compiler: DuckDbCompiler | None = None) -> dict[str, list[str]]:
+    """
+    Add and populate the precomputed time grain columns declared on the semantic model
+    in a DuckDB database. The columns are filled with the same expression the compiler
+    emits for a TimeGrainedQueryColumn, so grouping on them gives identical results.
+    The filled columns are marked populated on the semantic model, and only then do queries
+    group on them. Rows added afterwards have no grain until this is run again.
+    Returns the materialized columns by table. Re-running refreshes the values.
+    """
+    compiler = compiler or DuckDbCompiler()
+    materialized: dict[str, list[str]] = {}
+
+    for table in semantic_model.tables:
+        assignments = []
+        for column in table.columns:
+            for grain, target in (column.time_grains or {}).items():
+                expression = compiler.render_expression(
+                    TimeGrainedQueryColumn(time_grain=grain, table=table.name, name=column.name)
+                )
+                # Every supported grain is an integer date part
+                con.execute(f"ALTER TABLE {quote_identifier(table.name)} ADD COLUMN IF NOT EXISTS {quote_identifier(target)} BIGINT")
+                assignments.append(f"{quote_identifier(target)} = {expression}")
+                materialized.setdefault(table.name, []).append(target)
+
+        if assignments:
+            con.execute(f"UPDATE {quote_identifier(table.name)} SET {', '.join(assignments)}")
+            semantic_model.mark_time_grains_populated(table.name, materialized[table.name])
+
+    return materialized
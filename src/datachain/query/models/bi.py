@@ -253,9 +253,9 @@ class ResolvedBIQuery(BaseModel):
     dimension_filters: list[ResolvedBIFilter] = Field(
         default_factory=list,
     )
-    order_by: list[BIOrderBy] = Field(
+    order_by: list[Union[ResolvedOrderByDimension, ResolvedOrderByMeasure]] = Field(
         default_factory=list,
     )
-    limit: Optional[list[Union[ResolvedOrderByDimension, ResolvedOrderByMeasure]]] = Field(
+    limit: Optional[int] = Field(
         None,
     )
@@ -1,8 +1,9 @@
-from pydantic import BaseModel, model_validator, ValidationError
+from pydantic import BaseModel, PrivateAttr, model_validator, ValidationError
 from enum import Enum
-from typing import Optional, Union, Literal
+from typing import Optional, Union, Literal, Mapping
+from types import MappingProxyType
 from collections import defaultdict
-from .enums import Aggregation, Comparator, Arithmetic
+from .enums import Aggregation, Comparator, Arithmetic, TimeGrain
 
 # Enums
 
@@ -23,6 +24,15 @@ class SemanticColumn(BaseModel):
     name: str
     type: DataType
     description: str
+    # Precomputed grain columns on the same table, e.g. {TimeGrain.MONTH: "date_id_month"}.
+    # Time grained queries group on these instead of evaluating the grain per row
+    time_grains: Optional[dict[TimeGrain, str]] = None
+
+    @model_validator(mode='after')
+    def validate_time_grains(self):
+        if self.time_grains and self.type != DataType.DATE:
+            raise ValueError(f"time_grains can only be declared on DATE columns, '{self.name}' is {self.type.value}")
+        return self
 
 
 class Table(BaseModel):
@@ -87,12 +97,47 @@ class Filter(BaseModel):
     description: str
 
 
+def find_join_path(table: str, common_table: str, graph: dict, visited=None) -> list[tuple[str, str]] | None:
+    """
+    DFS to find the path from table to common_table.
+    Returns list of join tuples [(A,B), (B,C), ...] or None if no path.
+    """
+    if visited is None:
+        visited = set()
+
+    if table == common_table:
+        return []
+
+    visited.add(table)
+
+    for neighbor in graph.get(table, []):
+        if neighbor in visited:
+            continue
+
+        path = find_join_path(neighbor, common_table, graph, visited)
+
+        if path is not None:
+            return [(table, neighbor)] + path
+
+    return None
+
+
 class SemanticModel(BaseModel):
     tables: list[Table]
     kpis: Optional[list[KPI]] = None
     filters: Optional[list[Filter]] = None
     relationships: Optional[list[Relationship]] = None
 
+    # Lookups derived from the relationships, built on first use and never handed out mutable.
+    # Assigning a field clears them; call clear_caches after mutating nested objects in place.
+    # Either bumps version, which caches keyed on the model (e.g. the orchestrator's plans) check
+    _revision: int = PrivateAttr(default=0)
+    # (table, column) pairs of declared time grain columns known to be populated
+    _populated_time_grains: frozenset[tuple[str, str]] = PrivateAttr(default_factory=frozenset)
+    _relationship_index: dict[tuple[str, str], tuple[Relationship, ...]] | None = PrivateAttr(default=None)
+    _relationship_graphs: dict[bool, dict[str, tuple[str, ...]]] = PrivateAttr(default_factory=dict)
+    _join_paths: dict[tuple[str, str], tuple[tuple[str, str], ...] | None] = PrivateAttr(default_factory=dict)
+
     @model_validator(mode='after')
     def validate_relationships(self):
 
@@ -241,10 +286,81 @@ class SemanticModel(BaseModel):
     def get_filter(self, name) -> Filter:
         return self._get_entity("filters", name)
 
-    def get_relationship_graph(self, directed: bool = True) -> dict[str, list[str]] | None:
+    def get_time_grain_column(self, table: str, column: str, time_grain: TimeGrain) -> str | None:
+        """
+        The precomputed column holding the grain of table.column, None unless it is declared
+        and marked populated (see mark_time_grains_populated)
+        """
+        for t in self.tables:
+            if t.name != table:
+                continue
+            for c in t.columns:
+                if c.name == column and c.time_grains:
+                    target = c.time_grains.get(time_grain)
+                    return target if (table, target) in self._populated_time_grains else None
+        return None
+
+    @property
+    def populated_time_grains(self) -> frozenset[tuple[str, str]]:
+        return self._populated_time_grains
+
+    def mark_time_grains_populated(self, table: str, columns: list[str]):
+        """
+        Let queries group on these declared grain columns. materialize_time_grains marks what it
+        fills; call this directly when the columns are kept up to date elsewhere, e.g. by the load.
+        """
+        self._populated_time_grains = self._populated_time_grains | {(table, column) for column in columns}
+        self.clear_caches()
+
+    @property
+    def version(self) -> int:
+        """Changes whenever a field is assigned or clear_caches is called"""
+        return self._revision
+
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if name in type(self).model_fields:
+            self.clear_caches()
+
+    def clear_caches(self):
+        # Fresh containers, a copy made with model_copy may still share the old ones
+        self._revision += 1
+        self._relationship_index = None
+        self._relationship_graphs = {}
+        self._join_paths = {}
+
+    def model_copy(self, *, update=None, deep: bool = False) -> "SemanticModel":
+        copy = super().model_copy(update=update, deep=deep)
+        copy.clear_caches()
+        return copy
+
+    def get_relationships(self, incoming: str, outgoing: str) -> tuple[Relationship, ...]:
+        """Every relationship joining incoming to outgoing, looked up in an index keyed by the table pair"""
+        if self._relationship_index is None:
+            index = defaultdict(list)
+            for relationship in self.relationships or []:
+                index[(relationship.incoming, relationship.outgoing)].append(relationship)
+            self._relationship_index = {key: tuple(relationships) for key, relationships in index.items()}
+        return self._relationship_index.get((incoming, outgoing), ())
+
+    def get_join_path(self, table: str, common_table: str) -> list[tuple[str, str]] | None:
+        """The (cached) join edges leading from table to common_table, None if it is unreachable"""
+        key = (table, common_table)
+        if key not in self._join_paths:
+            graph = self.get_relationship_graph()
+            path = find_join_path(table, common_table, graph) if graph else None
+            self._join_paths[key] = tuple(path) if path is not None else None
+        path = self._join_paths[key]
+        return list(path) if path is not None else None
+
+    def get_relationship_graph(self, directed: bool = True) -> Mapping[str, tuple[str, ...]] | None:
+        """Adjacency of the tables, read-only since it is cached"""
         if self.relationships is None:
             return None
-        
+
+        if directed in self._relationship_graphs:
+            return MappingProxyType(self._relationship_graphs[directed])
+
         graph = defaultdict(list)
 
         # First initialize all tables in the graph
@@ -256,6 +372,8 @@ class SemanticModel(BaseModel):
             graph[relationship.incoming].append(relationship.outgoing)
             if not directed:
                 graph[relationship.outgoing].append(relationship.incoming)
-        
-        return graph
+
+        graph = {table: tuple(neighbors) for table, neighbors in graph.items()}
+        self._relationship_graphs[directed] = graph
+        return MappingProxyType(graph)
 
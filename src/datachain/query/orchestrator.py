@@ -1,50 +1,167 @@
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
 from .models import BIQuery, SemanticModel, ResolvedBIQuery, SQLQuery
 from .validator import QueryValidator
 from .planner import QueryPlanner
 from .resolver import QueryResolver
-from .types import QueryContext, QueryResult
+from .compilers.base import BaseSQLCompiler
+from .compilers.duckdb import DuckDbCompiler
+from .cache import PlanCache, PlannedQuery, canonical_query_key, semantic_model_version
+from .tracing import Tracer, SpanExporter, TraceLevel
+from .types import QueryContext, QueryResult, BatchResult, WorkerStats
 
 
 class QueryOrchestrator():
-    def __init__(self, semantic_model: SemanticModel):
-        self.semantic_model = semantic_model
+    """
+    Validates, resolves, plans and compiles BIQueries.
+    Successful plans are cached by canonical query and semantic model version, so a
+    repeated query skips the whole pipeline. max_cached_plans=0 disables caching.
+    With trace_level 'summary' every run is traced as a 'query' span with one child span
+    per stage, handed to the exporters once it ends; 'debug' also records every stage
+    message. The default, 'off', records nothing.
+    """
+    def __init__(
+        self,
+        semantic_model: SemanticModel,
+        compiler: BaseSQLCompiler | None = None,
+        max_cached_plans: int = 512,
+        exporters: list[SpanExporter] | None = None,
+        trace_level: TraceLevel = "off",
+    ):
         self.validator = QueryValidator()
         self.resolver = QueryResolver()
         self.planner = QueryPlanner()
+        self.compiler = compiler or DuckDbCompiler()
+        self.cache = PlanCache(max_cached_plans) if max_cached_plans > 0 else None
+        self.exporters = exporters or []
+        self.trace_level = trace_level
+        self.set_semantic_model(semantic_model)
+
+    def set_semantic_model(self, semantic_model: SemanticModel):
+        """Swap the semantic model; cached plans of other versions are no longer used"""
+        self.semantic_model = semantic_model
+        self._model_version = None
+        self._model_revision = None
+
+    def _semantic_model_version(self) -> str:
+        """
+        Content hash of the model, only recomputed when the model's version counter moves:
+        on field assignment or clear_caches, which in-place edits of nested objects must call.
+        """
+        if self._model_version is None or self._model_revision != self.semantic_model.version:
+            self._model_version = semantic_model_version(self.semantic_model)
+            self._model_revision = self.semantic_model.version
+        return self._model_version
 
     def run(self, bi_query: BIQuery) -> QueryResult:
-        ctx = QueryContext()
+        ctx = QueryContext(tracer=Tracer(self.exporters, self.trace_level))
+        with ctx.tracer.span("query") as span:
+            result = self._run(bi_query, ctx) if self.cache is None else self._run_cached(bi_query, ctx)
+            span.attributes["cache_hit"] = result.context.cache_hit
+            if result.errors:
+                span.attributes["error_stage"] = result.errors[0].stage
+        return result
+
+    def run_many(self, bi_queries: list[BIQuery], max_workers: int | None = None, chunksize: int | None = None) -> BatchResult:
+        """
+        Run a batch of queries on a process pool. Each worker receives the semantic model
+        and compiler once, when it starts, and then only chunks of queries.
+        Exporters are not shared with the workers; the spans stay on each result's context.
+        """
+        start = time.perf_counter()
+        max_workers = max_workers or os.cpu_count() or 1
+        chunksize = chunksize or max(1, math.ceil(len(bi_queries) / (max_workers * 4)))
+        chunks = [bi_queries[i:i + chunksize] for i in range(0, len(bi_queries), chunksize)]
+
+        results: list[QueryResult] = []
+        workers: dict[int, WorkerStats] = {}
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_worker,
+            initargs=(self.semantic_model, self.compiler, self.cache.max_entries if self.cache else 0, self.trace_level),
+        ) as pool:
+            # map yields in submission order, which keeps results in input order
+            for pid, busy_seconds, chunk_results in pool.map(_run_chunk, chunks):
+                stats = workers.setdefault(pid, WorkerStats(pid=pid))
+                stats.queries += len(chunk_results)
+                stats.busy_seconds += busy_seconds
+                results.extend(chunk_results)
+
+        return BatchResult(results=results, workers=list(workers.values()), wall_seconds=time.perf_counter() - start)
+
+    def _run_cached(self, bi_query: BIQuery, ctx: QueryContext) -> QueryResult:
+        key = (canonical_query_key(bi_query), self._semantic_model_version())
+        cached = self.cache.get(key)
+        if cached is not None:
+            sql_query, hit = cached.copy(ctx.tracer)
+            hit.cache_hit = True
+            hit.cache_stats = replace(self.cache.stats)
+            return QueryResult(sql_query, [], hit, cached.sql)
 
-        struct_errors = self.validator.validate_structure(bi_query, ctx)
+        result = self._run(bi_query, ctx)
+        if not result.errors:
+            self.cache.put(key, PlannedQuery.detached(result.sql_query, result.sql, result.context))
+        result.context.cache_stats = replace(self.cache.stats)
+        return result
+
+    def _run(self, bi_query: BIQuery, ctx: QueryContext) -> QueryResult:
+        tracer = ctx.tracer
+
+        with tracer.span("validate_structure"):
+            struct_errors = self.validator.validate_structure(bi_query, ctx)
         if struct_errors:
             return QueryResult(
                 None, struct_errors, ctx
             )
-        
-        ref_errors = self.validator.validate_references(bi_query, self.semantic_model, ctx)
+
+        with tracer.span("validate_references"):
+            ref_errors = self.validator.validate_references(bi_query, self.semantic_model, ctx)
         if ref_errors:
             return QueryResult(
                 None, ref_errors, ctx
             )
-        
+
         # ctx is updated with all tables in the query
-        resolved_query = self.resolver.resolve(bi_query, ctx)
+        with tracer.span("resolve") as span:
+            resolved_query = self.resolver.resolve(bi_query, self.semantic_model, ctx)
+            span.attributes["tables"] = sorted(ctx.tables)
 
-        join_path_errors = self.validator.validate_join_path(resolved_query, self.semantic_model, ctx)
+        with tracer.span("validate_join_path") as span:
+            join_path_errors = self.validator.validate_join_path(self.semantic_model, ctx)
+            span.attributes["common_table"] = ctx.common_table
         if join_path_errors:
             return QueryResult(
                 None, join_path_errors, ctx
             )
-        
-        self.planner.analyse_context(ctx, self.semantic_model)
-        sql_query = self.planner.plan(resolved_query, ctx)
 
-        return QueryResult(sql_query, [], ctx)
- 
+        with tracer.span("plan") as span:
+            self.planner.analyse_context(resolved_query, ctx, self.semantic_model)
+            sql_query = self.planner.plan(resolved_query, ctx, self.semantic_model)
+            span.attributes["joins"] = len(ctx.joins)
+            span.attributes["requires_cte"] = ctx.requires_cte
+
+        with tracer.span("compile"):
+            sql = self.compiler.compile(sql_query)
+
+        return QueryResult(sql_query, [], ctx, sql)
+
 
+# Process pool workers each hold one orchestrator, built once by the pool initializer
 
+_worker_orchestrator: QueryOrchestrator | None = None
 
-        
 
+def _init_worker(semantic_model: SemanticModel, compiler: BaseSQLCompiler, max_cached_plans: int, trace_level: TraceLevel):
+    global _worker_orchestrator
+    _worker_orchestrator = QueryOrchestrator(
+        semantic_model, compiler=compiler, max_cached_plans=max_cached_plans, trace_level=trace_level
+    )
 
 
+def _run_chunk(bi_queries: list[BIQuery]) -> tuple[int, float, list[QueryResult]]:
+    start = time.perf_counter()
+    results = [_worker_orchestrator.run(q) for q in bi_queries]
+    return os.getpid(), time.perf_counter() - start, results
@@ -46,70 +46,43 @@ class QueryPlanner():
         # We need this for instances where we want a measure and a window of that measure in the final query
         ctx.unique_measures = set(resolved_bi_query.measures)
 
-        ctx.trace.append("Checking if CTE is required due to window functions")
+        ctx.tracer.event("Checking if CTE is required due to window functions")
         for m in resolved_bi_query.measures:
             if m.window:
                 ctx.requires_cte = True
-                ctx.trace.append("CTE required because at least one measure has a window function")
+                ctx.tracer.event("CTE required because at least one measure has a window function")
                 ctx.window_measures.append(m)
                 # Now for the window we also need to link it to a unique measure
                 # Now we can select from this measure for the window
                 ctx.window_measure_map[m.name] = [u_m for u_m in ctx.unique_measures if m == u_m][0].name
              
 
-        ctx.trace.append("Resolving join paths for tables")
+        ctx.tracer.event("Resolving join paths for tables")
         if len(ctx.tables) <= 1:
-            ctx.trace.append("Single table; no joins required")
+            ctx.tracer.event("Single table; no joins required")
             return
 
         graph = semantic_model.get_relationship_graph()
         if not graph:
-            ctx.trace.append("No relationship graph defined; cannot determine joins")
+            ctx.tracer.event("No relationship graph defined; cannot determine joins")
             return
 
         for table in ctx.tables:
             if table == ctx.common_table:
                 continue
 
-            ctx.trace.append(f"Finding join path from table '{table}' to common table '{ctx.common_table}'")
-            path = self._find_join_path_to_common_table(table, ctx.common_table, graph)
+            ctx.tracer.event("Finding join path from table '%s' to common table '%s'", table, ctx.common_table)
+            path = semantic_model.get_join_path(table, ctx.common_table)
             if path is None:
-                ctx.trace.append(f"No join path found from '{table}' to '{ctx.common_table}'; may require subquery")
+                ctx.tracer.event("No join path found from '%s' to '%s'; may require subquery", table, ctx.common_table)
                 ctx.requires_cte = True
                 continue
 
             for edge in path:
                 if edge not in ctx.joins:
                     ctx.joins.append(edge)
-                    ctx.trace.append(f"Added join: {edge[0]} -> {edge[1]}")
+                    ctx.tracer.event("Added join: %s -> %s", edge[0], edge[1])
     
-    def _find_join_path_to_common_table(self, table: str, common_table: str, graph: dict, visited=None) -> list[tuple[str, str]]:
-        """
-        DFS to find the path from table to common_table.
-        Returns list of join tuples [(A,B), (B,C), ...] or None if no path.
-        """
-
-        if visited is None:
-            visited = set()
-
-        if table == common_table:
-            return []
-
-        visited.add(table)
-
-        for neighbor in graph.get(table, []):
-            if neighbor in visited:
-                continue
-
-            path = self._find_join_path_to_common_table(
-                neighbor, common_table, graph, visited
-            )
-
-            if path is not None:
-                return [(table, neighbor)] + path
-
-        return None
-
     def plan(
         self,
         resolved_query: ResolvedBIQuery,
@@ -123,7 +96,7 @@ class QueryPlanner():
           - Final query selects from CTE and applies windows, ordering + limit
         """
 
-        ctx.trace.append("planning SQL query")
+        ctx.tracer.event("planning SQL query")
             
         # Base Query
         dimension_columns = [
@@ -137,7 +110,7 @@ class QueryPlanner():
         time_grained_dimensions = [
             SelectItem(
                 alias=f"{d.time_grain}({d.table} {d.column})",
-                expression=TimeGrainedQueryColumn(time_grain=d.time_grain, table=d.table, name=d.column),
+                expression=map_time_grained_column(d, semantic_model),
             )
             for d in resolved_query.time_grained_dimensions
         ]
@@ -167,7 +140,7 @@ class QueryPlanner():
         ] + [
             GroupBy(
                 table=d.table,
-                column=TimeGrainedQueryColumn(time_grain=d.time_grain, table=d.table, name=d.column),
+                column=map_time_grained_column(d, semantic_model),
             )
             for d in resolved_query.time_grained_dimensions
         ] or None
@@ -191,7 +164,7 @@ class QueryPlanner():
 
         # CASE 1: CTE REQUIRED
         if ctx.requires_cte:
-            ctx.trace.append("building CTE for aggregations and window functions")
+            ctx.tracer.event("building CTE for aggregations and window functions")
 
             cte_query = SQLQuery(
                 from_=ctx.common_table,
@@ -205,7 +178,7 @@ class QueryPlanner():
                 offset=None,
             )
 
-            ctx.trace.append("building outer query selecting from CTE")
+            ctx.tracer.event("building outer query selecting from CTE")
 
             outer_columns = [
                 SelectItem(
@@ -248,7 +221,7 @@ class QueryPlanner():
         # ============================
         # CASE 2: NO CTE REQUIRED
         # ============================
-        ctx.trace.append("building single-stage query (no CTE)")
+        ctx.tracer.event("building single-stage query (no CTE)")
 
         return SQLQuery(
             from_=ctx.common_table,
@@ -262,6 +235,13 @@ class QueryPlanner():
             offset=None,
         )
 
+def map_time_grained_column(d: ResolvedBIDimensionTimeGrain, semantic_model: SemanticModel) -> QueryColumn | TimeGrainedQueryColumn:
+    """Use the materialized grain column when the model declares one, otherwise compute the grain"""
+    materialized = semantic_model.get_time_grain_column(d.table, d.column, d.time_grain)
+    if materialized is not None:
+        return QueryColumn(table=d.table, name=materialized)
+    return TimeGrainedQueryColumn(time_grain=d.time_grain, table=d.table, name=d.column)
+
 def map_window_measures(ctx: QueryContext, dimensions: list[ResolvedBIDimension], time_grain_dimensions: list[ResolvedBIDimensionTimeGrain]) -> list[WindowSpec]:
     """Maps any bi measures with a window to a list of window specifications"""
     if not ctx.window_measures:
@@ -322,21 +302,17 @@ def map_having_filters(filters: list[ResolvedBIMeasureFilter]) -> HavingPredicat
 def map_joins(ctx: QueryContext, semantic_model: SemanticModel) -> list[Join]:
     joins: list[Join] = []
 
+    # Each edge (table, neighbor) points towards the common table, so walking them in
+    # reverse the neighbor is already in the query and the table is joined in
     for left, right in reversed(ctx.joins):
-        #TODO this is inefficient 
-        #Create a ds on the semantic model
-        for rel in semantic_model.relationships:
-            if (
-                rel.incoming == left
-                and rel.outgoing == right
-            ):
-                joins.append(
-                    Join(
-                        left_table=left,
-                        right_table=right,
-                        left_keys=rel.keys_incoming,
-                        right_keys=rel.keys_outgoing
-                    )
+        for rel in semantic_model.get_relationships(left, right):
+            joins.append(
+                Join(
+                    left_table=right,
+                    right_table=left,
+                    left_keys=rel.keys_outgoing,
+                    right_keys=rel.keys_incoming
                 )
+            )
 
-    return joins
\ No newline at end of file
+    return joins
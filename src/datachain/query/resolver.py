@@ -2,7 +2,8 @@ from .models import (
     BIQuery, BIDimension, ResolvedBIQuery, BIMeasure, BIFilter, 
     ResolvedBIMeasureFilter, ResolvedBIFilter,
     SemanticModel, SemanticComparison, SemanticKPIComparison,
-    BIOrderBy, ResolvedOrderByDimension, ResolvedOrderByMeasure
+    BIOrderBy, ResolvedOrderByDimension, ResolvedOrderByMeasure,
+    ResolvedBIDimension, ResolvedBIDimensionTimeGrain,
 )
 from .types import QueryContext
 
@@ -12,7 +13,7 @@ class QueryResolver:
         Fully resolves a BIQuery into a ResolvedBIQuery.
         Updates the context with all tables referenced and tracks diagnostics.
         """
-        ctx.trace.append("Resolving BIQuery into ResolvedBIQuery")
+        ctx.tracer.event("Resolving BIQuery into ResolvedBIQuery")
         
         # Resolve KPIs into measures
         resolved_measures = list(bi_query.measures)
@@ -34,7 +35,7 @@ class QueryResolver:
         # Resolve dimensions in time grained and raw
         time_grained_dimensions, dimensions = self._resolve_dimension_by_time_grain(bi_query.dimensions)
         # Resolve order by
-        resolved_order_bys = [self._resolve_order_by(order_by, bi_query) for order_by in bi_query.order_by]
+        resolved_order_bys = [self._resolve_order_by(order_by, bi_query, semantic_model, ctx) for order_by in bi_query.order_by]
 
         # Update context with tables from dimensions
         for dim in bi_query.dimensions:
@@ -58,7 +59,7 @@ class QueryResolver:
 
     def _resolve_kpi(self, name: str, semantic_model: SemanticModel, ctx: QueryContext) -> BIMeasure:
         kpi = semantic_model.get_kpi(name)
-        ctx.trace.append(f"Resolved KPI '{name}' to measure: {kpi.expression.table}.{kpi.expression.column}")
+        ctx.tracer.event("Resolved KPI '%s' to measure: %s.%s", name, kpi.expression.table, kpi.expression.column)
         return BIMeasure(
             name=kpi.name,
             table=kpi.expression.table,
@@ -70,7 +71,7 @@ class QueryResolver:
         resolved = {"dimension_filters": [], "measure_filters": []}
         for name in names:
             semantic_filter = semantic_model.get_filter(name)
-            ctx.trace.append(f"Resolving semantic filter '{name}'")
+            ctx.tracer.event("Resolving semantic filter '%s'", name)
             pred = semantic_filter.predicate
 
             if isinstance(pred, SemanticComparison):
@@ -96,7 +97,7 @@ class QueryResolver:
     def _resolve_measure_filter(self, mes_filter: BIFilter, resolved_measures: list[BIMeasure], ctx: QueryContext) -> ResolvedBIMeasureFilter:
         # Assumes validation has already confirmed existence
         measure = next((m for m in resolved_measures if m.name == mes_filter.field), None)
-        ctx.trace.append(f"Resolved measure filter on '{mes_filter.field}'")
+        ctx.tracer.event("Resolved measure filter on '%s'", mes_filter.field)
         return ResolvedBIMeasureFilter(
             measure=measure,
             comparator=mes_filter.comparator,
@@ -104,7 +105,7 @@ class QueryResolver:
         )
 
     def _resolve_dimension_filter(self, dim_filter: BIFilter, ctx: QueryContext) -> ResolvedBIFilter:
-        ctx.trace.append(f"Resolved dimension filter on '{dim_filter.table}.{dim_filter.column}'")
+        ctx.tracer.event("Resolved dimension filter on '%s.%s'", dim_filter.table, dim_filter.column)
         return ResolvedBIFilter(
             table=dim_filter.table,
             column=dim_filter.column,
@@ -112,7 +113,7 @@ class QueryResolver:
             value=dim_filter.value
         )
     
-    def _resolve_order_by(self, order_by: BIOrderBy, bi_query: BIQuery) -> ResolvedOrderByMeasure | ResolvedOrderByDimension:
+    def _resolve_order_by(self, order_by: BIOrderBy, bi_query: BIQuery, semantic_model: SemanticModel, ctx: QueryContext) -> ResolvedOrderByMeasure | ResolvedOrderByDimension:
         if "." in order_by.field:
             table, column = order_by.field.split(".")
             return ResolvedOrderByDimension(
@@ -122,7 +123,7 @@ class QueryResolver:
             )
         
         elif order_by.field.startswith("kpi"):
-            measure = self._resolve_kpi(order_by.field)
+            measure = self._resolve_kpi(order_by.field, semantic_model, ctx)
         
         else:
             measure = next(m for m in bi_query.measures if m.name == order_by.field)
@@ -139,8 +140,8 @@ class QueryResolver:
 
         for d in dimensions:
             if d.time_grain is None:
-                raw.append(d)
+                raw.append(ResolvedBIDimension(table=d.table, column=d.column))
             else:
-                time_grained.append(d)
+                time_grained.append(ResolvedBIDimensionTimeGrain(time_grain=d.time_grain, table=d.table, column=d.column))
 
         return time_grained, raw
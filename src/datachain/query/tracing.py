@@ -0,0 +1,200 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, IO, Literal, Protocol
+
+# off: nothing is recorded. summary: timed spans and their attributes.
+# debug: spans plus every message, formatted only at this level
+TraceLevel = Literal["off", "summary", "debug"]
+
+
+@dataclass
+class Span:
+    """A timed stage of query processing, with its messages and nested stages"""
+    name: str
+    start: float  # time.monotonic()
+    end: float | None = None
+    attributes: dict[str, Any] = field(default_factory=dict)
+    events: list[str] = field(default_factory=list)
+    children: list["Span"] = field(default_factory=list)
+
+    @property
+    def duration_ms(self) -> float | None:
+        if self.end is None:
+            return None
+        return (self.end - self.start) * 1000
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "start": self.start,
+            "end": self.end,
+            "duration_ms": self.duration_ms,
+            "attributes": self.attributes,
+            "events": self.events,
+            "children": [child.to_dict() for child in self.children],
+        }
+
+
+class SpanExporter(Protocol):
+    """Receives every root span once it has ended"""
+    def export(self, span: Span) -> None:
+        ...
+
+
+class InMemoryExporter:
+    def __init__(self):
+        self.spans: list[Span] = []
+
+    def export(self, span: Span) -> None:
+        self.spans.append(span)
+
+    def clear(self):
+        self.spans.clear()
+
+
+class JsonLinesExporter:
+    """Writes each root span as one JSON object per line to a file path or an open text stream"""
+    def __init__(self, target: str | IO[str]):
+        self._stream = open(target, "a", encoding="utf-8") if isinstance(target, str) else target
+        self._owns_stream = isinstance(target, str)
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock:
+            self._stream.write(line + "\n")
+            self._stream.flush()
+
+    def close(self):
+        if self._owns_stream:
+            self._stream.close()
+
+
+class _DiscardedAttributes(dict):
+    """Always empty: writes through any of the dict methods are dropped"""
+    def __setitem__(self, key, value):
+        pass
+
+    def __delitem__(self, key):
+        pass
+
+    def __ior__(self, other):
+        return self
+
+    def update(self, *args, **kwargs):
+        pass
+
+    def setdefault(self, key, default=None):
+        return default
+
+
+class _NoopSpan:
+    """
+    The span handed to every caller while tracing is off. It is shared, so it keeps
+    nothing: attributes are dropped and its fields and message lists cannot be changed.
+    """
+    __slots__ = ()
+    name = "disabled"
+    start = 0.0
+    end = None
+    duration_ms = None
+    attributes = _DiscardedAttributes()
+    events = ()
+    children = ()
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "start": self.start,
+            "end": None,
+            "duration_ms": None,
+            "attributes": {},
+            "events": [],
+            "children": [],
+        }
+
+
+class _DisabledSpan:
+    """Stands in for span() when tracing is off, so call sites need no level checks"""
+    span = _NoopSpan()
+
+    def __enter__(self) -> Span:
+        return self.span
+
+    def __exit__(self, *exc) -> bool:
+        return False
+
+
+_DISABLED_SPAN = _DisabledSpan()
+
+
+class Tracer:
+    """
+    Records the spans of one query. Messages logged with event() are attached to the
+    innermost open span (or kept at the top level when none is open).
+    Messages take logging style arguments and are only formatted at debug level.
+    Tracing is off unless a level is given, as timing every stage has a measurable cost.
+    """
+    def __init__(self, exporters: list[SpanExporter] | None = None, level: TraceLevel = "off"):
+        self.exporters = exporters or []
+        self.level = level
+        self.debug_enabled = level == "debug"
+        self.spans: list[Span] = []
+        self.events: list[str] = []
+        self._stack: list[Span] = []
+
+    def span(self, name: str, **attributes):
+        if self.level == "off":
+            return _DISABLED_SPAN
+        return self._span(name, attributes)
+
+    @contextmanager
+    def _span(self, name: str, attributes: dict):
+        span = Span(name=name, start=time.monotonic(), attributes=attributes)
+        if self._stack:
+            self._stack[-1].children.append(span)
+        else:
+            self.spans.append(span)
+        self._stack.append(span)
+        try:
+            yield span
+        finally:
+            span.end = time.monotonic()
+            self._stack.pop()
+            if not self._stack:
+                for exporter in self.exporters:
+                    exporter.export(span)
+
+    def event(self, message: str, *args):
+        if not self.debug_enabled:
+            return
+        if args:
+            message = message % args
+        if self._stack:
+            self._stack[-1].events.append(message)
+        else:
+            self.events.append(message)
+
+    def set_attribute(self, key: str, value: Any):
+        if self._stack:
+            self._stack[-1].attributes[key] = value
+
+    def lines(self) -> list[str]:
+        """Text view of the trace, one line per span and message, indented by nesting"""
+        lines = list(self.events)
+
+        def visit(span: Span, depth: int):
+            indent = "  " * depth
+            duration = f" {span.duration_ms:.2f}ms" if span.duration_ms is not None else ""
+            attributes = "".join(f" {k}={v}" for k, v in span.attributes.items())
+            lines.append(f"{indent}[{span.name}{duration}]{attributes}")
+            lines.extend(f"{indent}  {event}" for event in span.events)
+            for child in span.children:
+                visit(child, depth + 1)
+
+        for span in self.spans:
+            visit(span, 0)
+        return lines
@@ -1,6 +1,14 @@
 from dataclasses import dataclass, field
 from typing import Optional, Any
 from .models import SQLQuery
+from .tracing import Tracer
+
+@dataclass
+class PlanCacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
 
 @dataclass
 class QueryContext:
@@ -17,7 +25,16 @@ class QueryContext:
 
     # Diagnostics
     warnings: list[str] = field(default_factory=list)
-    trace: list[str] = field(default_factory=list)
+    tracer: Tracer = field(default_factory=Tracer)
+
+    # Orchestrator plan cache
+    cache_hit: bool = False
+    cache_stats: Optional[PlanCacheStats] = None
+
+    @property
+    def trace(self) -> list[str]:
+        """Text view of the tracer's spans and messages"""
+        return self.tracer.lines()
 
 
 @dataclass
@@ -32,3 +49,23 @@ class QueryResult:
     sql_query: SQLQuery | None
     errors: list[QueryError] | None
     context: QueryContext
+    sql: str | None = None
+
+
+@dataclass
+class WorkerStats:
+    pid: int
+    queries: int = 0
+    busy_seconds: float = 0.0
+
+    @property
+    def queries_per_second(self) -> float:
+        return self.queries / self.busy_seconds if self.busy_seconds else 0.0
+
+
+@dataclass
+class BatchResult:
+    """Results of QueryOrchestrator.run_many, in input order, with throughput per worker process"""
+    results: list[QueryResult]
+    workers: list[WorkerStats]
+    wall_seconds: float
@@ -6,10 +6,10 @@ from .types import QueryContext, QueryError
 class QueryValidator():
     @staticmethod
     def validate_structure(bi_query: BIQuery, ctx: QueryContext) -> list[QueryError]:
-        """Validates the basic structure of the biquery and updates the ctx trace"""
+        """Validates the basic structure of the biquery and records it on the ctx tracer"""
         errors: list[QueryError] = []
         
-        ctx.trace.append("validating structure of bi query")
+        ctx.tracer.event("validating structure of bi query")
 
         # Must select something
         if not any([bi_query.dimensions, bi_query.measures, bi_query.kpi_refs]):
@@ -27,14 +27,14 @@ class QueryValidator():
         """
         Validates that all references in a BIQuery exist in the semantic model,
         including dimensions, measures, filters, KPIs, and ensures time-grain dimensions
-        are of type DATE. Updates ctx.trace along the way.
+        are of type DATE. Records each check on the ctx tracer.
         """
         errors: list[QueryError] = []
-        ctx.trace.append("Validating semantic references against the semantic model")
+        ctx.tracer.event("Validating semantic references against the semantic model")
 
         # 1️⃣ KPI references
         for kpi_name in bi_query.kpi_refs:
-            ctx.trace.append(f"Checking KPI reference: {kpi_name}")
+            ctx.tracer.event("Checking KPI reference: %s", kpi_name)
             if semantic_model.get_kpi(kpi_name) is None:
                 errors.append(QueryError(
                     stage="reference_validation",
@@ -43,7 +43,7 @@ class QueryValidator():
 
         # 2️⃣ Filter references
         for filter_name in bi_query.filter_refs:
-            ctx.trace.append(f"Checking filter reference: {filter_name}")
+            ctx.tracer.event("Checking filter reference: %s", filter_name)
             if semantic_model.get_filter(filter_name) is None:
                 errors.append(QueryError(
                     stage="reference_validation",
@@ -52,7 +52,7 @@ class QueryValidator():
 
         # 3️⃣ Dimensions
         for dim in bi_query.dimensions:
-            ctx.trace.append(f"Checking dimension: {dim.ref}")
+            ctx.tracer.event("Checking dimension: %s", dim.ref)
             if not semantic_model.field_exists(dim.table, dim.column):
                 errors.append(QueryError(
                     stage="reference_validation",
@@ -67,7 +67,7 @@ class QueryValidator():
 
         # 4️⃣ Measures
         for measure in bi_query.measures:
-            ctx.trace.append(f"Checking measure: {measure.name} ({measure.table}.{measure.column})")
+            ctx.tracer.event("Checking measure: %s (%s.%s)", measure.name, measure.table, measure.column)
             if not semantic_model.field_exists(measure.table, measure.column):
                 errors.append(QueryError(
                     stage="reference_validation",
@@ -76,7 +76,7 @@ class QueryValidator():
 
         # 5️⃣ Dimension filters
         for f in bi_query.dimension_filters:
-            ctx.trace.append(f"Checking dimension filter field: {f.field}")
+            ctx.tracer.event("Checking dimension filter field: %s", f.field)
             if not f.table or not f.column:
                 errors.append(QueryError(
                     stage="reference_validation",
@@ -96,12 +96,12 @@ class QueryValidator():
         """Validates the resolved query join path and updates the context with joins and common table"""
         errors: list[QueryError] = []
 
-        ctx.trace.append("Validating join path")
+        ctx.tracer.event("Validating join path")
 
         # Build the relationship graph
         graph = semantic_model.get_relationship_graph()
         if not graph:
-            ctx.trace.append("No relationship graph defined")
+            ctx.tracer.event("No relationship graph defined")
             if len(ctx.tables) > 1:
                 errors.append(QueryError(
                     stage="join_path_validation",
@@ -110,14 +110,15 @@ class QueryValidator():
                 ))
             elif ctx.tables:
                 ctx.common_table = next(iter(ctx.tables))
-                ctx.trace.append(f"Single table in query, setting common_table to {ctx.common_table}")
+                ctx.tracer.event("Single table in query, setting common_table to %s", ctx.common_table)
             return errors
 
-        ctx.trace.append(f"Relationship graph loaded with tables: {list(graph.keys())}")
+        if ctx.tracer.debug_enabled:
+            ctx.tracer.event("Relationship graph loaded with tables: %s", list(graph.keys()))
         
         # BFS from each table in the query to all reachable tables
         reachability = {table: bfs_distances(table, graph) for table in ctx.tables}
-        ctx.trace.append(f"Computed reachability for tables: {reachability}")
+        ctx.tracer.event("Computed reachability for tables: %s", reachability)
 
         # Find intersection of reachable nodes → common tables
         common = set.intersection(*[set(dist.keys()) for dist in reachability.values()])
@@ -128,12 +129,12 @@ class QueryValidator():
                 msg="The set of tables in the query do not have a common table",
                 details="The data model does not support this combination of tables"
             ))
-            ctx.trace.append("No common table found among query tables")
+            ctx.tracer.event("No common table found among query tables")
             return errors
 
         if len(common) == 1:
             ctx.common_table = common.pop()
-            ctx.trace.append(f"Single common table found: {ctx.common_table}")
+            ctx.tracer.event("Single common table found: %s", ctx.common_table)
             return errors
 
         # Pick the common table that minimizes total distance from all query tables
@@ -141,7 +142,7 @@ class QueryValidator():
             common,
             key=lambda t: sum(reachability[src][t] for src in ctx.tables)
         )
-        ctx.trace.append(f"Multiple common tables found, selected {ctx.common_table} as optimal common table")
+        ctx.tracer.event("Multiple common tables found, selected %s as optimal common table", ctx.common_table)
 
         return errors
 
@@ -0,0 +1,144 @@
+import ibis
+import pytest
+from src.datachain.data_connection import DataConnection
+from src.datachain.data_model import ModelBuilder, ColumnType
+
+
+class CountingConnection(DataConnection):
+    """Records how many queries reach the database"""
+    def __init__(self, conn):
+        super().__init__(conn)
+        self.queries = 0
+
+    def to_pyarrow(self, query):
+        self.queries += 1
+        return super().to_pyarrow(query)
+
+
+@pytest.fixture
+def connection() -> CountingConnection:
+    con = ibis.duckdb.connect()
+    con.raw_sql("CREATE TABLE users AS SELECT * FROM (VALUES (1, 'ann', 'north'), (2, 'bob', 'south'), (3, 'cid', 'north')) t(id, name, region)")
+    con.raw_sql(
+        "CREATE TABLE orders AS SELECT * FROM (VALUES "
+        "(1, 1, 10.0, 4.0, '2024-01-05'::TIMESTAMP), (2, 1, 20.0, 5.0, '2024-02-05'::TIMESTAMP), "
+        "(3, 2, 5.0, 1.0, '2024-01-10'::TIMESTAMP), (4, 3, 50.0, 30.0, '2024-02-11'::TIMESTAMP)"
+        ") t(id, user_id, amount, cost, ordered_at)"
+    )
+    return CountingConnection(con)
+
+
+def build_model() -> ModelBuilder:
+    builder = ModelBuilder()
+
+    @builder.table(name="users")
+    def users() -> dict[str, ColumnType]:
+        return {"id": "int32", "name": "string", "region": "string"}
+
+    @builder.table(name="orders")
+    def orders() -> dict[str, ColumnType]:
+        return {"id": "int32", "user_id": "int32", "amount": "decimal(3, 1)", "cost": "decimal(3, 1)", "ordered_at": "timestamp"}
+
+    @builder.relationship(left=users, right=orders, how="left")
+    def user_orders_relationship(left, right):
+        return left["id"] == right["user_id"]
+
+    @builder.metric(name="revenue", grain="orders")
+    def revenue_metric(dm, sm):
+        return dm["orders"]["amount"].sum()
+
+    @builder.metric(name="cost", grain="orders")
+    def cost_metric(dm, sm):
+        return dm["orders"]["cost"].sum()
+
+    @builder.metric(name="order_count", grain="orders")
+    def order_count_metric(dm, sm):
+        return dm["orders"]["id"].count()
+
+    @builder.metric(name="margin_pct", grain="orders", dependencies=[revenue_metric, cost_metric])
+    def margin_pct_metric(dm, sm):
+        revenue = sm.get_metric("revenue").resolve(dm, sm)
+        cost = sm.get_metric("cost").resolve(dm, sm)
+        return (revenue - cost) / revenue * 100
+
+    @builder.dimension(name="region")
+    def region_dimension(dm):
+        return dm["users"]["region"]
+
+    @builder.dimension(name="month")
+    def month_dimension(dm):
+        return dm["orders"]["ordered_at"].truncate("M")
+
+    @builder.filter(name="large_orders")
+    def large_orders_filter(dm, sm):
+        return dm["orders"]["amount"] > 6
+
+    return builder
+
+
+def build_threshold_model(threshold: float = 100.0, extra_table: bool = False) -> ModelBuilder:
+    """
+    A users/orders model without data; the high_value_orders threshold and an optional
+    refunds table vary its definitions
+    """
+    builder = ModelBuilder()
+
+    @builder.table(name="users")
+    def users() -> dict[str, ColumnType]:
+        return {
+            "id": "int64",
+            "name": "string",
+        }
+
+    @builder.table(name="orders")
+    def orders() -> dict[str, ColumnType]:
+        return {
+            "id": "int64",
+            "user_id": "int64",
+            "amount": "float64",
+        }
+
+    if extra_table:
+        @builder.table(name="refunds")
+        def refunds() -> dict[str, ColumnType]:
+            return {
+                "order_id": "int64",
+                "amount": "float64",
+            }
+
+    @builder.relationship(left=users, right=orders, how="left")
+    def user_orders_relationship(left, right):
+        return left["id"] == right["user_id"]
+
+    @builder.metric(name="total_order_amount", grain="orders")
+    def total_order_amount_metric(dm, sm):
+        return dm["orders"]["amount"].sum()
+
+    @builder.metric(name="avg_order_amount", grain="orders", dependencies=[total_order_amount_metric])
+    def avg_order_amount_metric(dm, sm):
+        return sm.get_metric("total_order_amount").resolve(dm, sm) / dm["orders"]["id"].count()
+
+    @builder.dimension(name="user_name")
+    def user_name_dimension(dm):
+        return dm["users"]["name"]
+
+    @builder.filter(name="high_value_orders")
+    def high_value_orders_filter(dm, sm):
+        return dm["orders"]["amount"] > threshold
+
+    return builder
+
+
+class RecordingPrefetcher:
+    """Stands in for a Prefetcher and records the foreground queries it is told about"""
+    def __init__(self):
+        self.calls = []
+
+    def bind(self, executor):
+        pass
+
+    def foreground_started(self):
+        self.calls.append("started")
+
+    def foreground_finished(self, biquery, result, elapsed_ms, follow_up=True):
+        self.calls.append(("finished", follow_up))
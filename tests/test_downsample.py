@@ -0,0 +1,97 @@
+import ibis
+import numpy as np
+import pyarrow.compute as pc
+import pytest
+from src.datachain.biquery import BIQuery
+from src.datachain.data_connection import DataConnection
+from src.datachain.data_model import ModelBuilder
+from src.datachain.execution import QueryExecutor, QueryLog, ResultCache, Downsample, lttb_indices, minmax_indices
+from .conftest import RecordingPrefetcher
+
+
+@pytest.fixture
+def executor() -> QueryExecutor:
+    con = ibis.duckdb.connect()
+    con.raw_sql(
+        "CREATE TABLE readings AS SELECT TIMESTAMP '2024-01-01' + to_minutes(i) AS ts, "
+        "CASE WHEN i % 2 = 0 THEN 'a' ELSE 'b' END AS sensor, sin(i / 100.0) * (i % 7) AS value "
+        "FROM range(20000) t(i)"
+    )
+    builder = ModelBuilder()
+
+    @builder.table(name="readings")
+    def readings():
+        return {"ts": "timestamp", "sensor": "string", "value": "float64"}
+
+    builder.dimension(name="minute")(lambda dm: dm["readings"]["ts"])
+    builder.dimension(name="sensor")(lambda dm: dm["readings"]["sensor"])
+    builder.metric(name="total", grain="readings")(lambda dm, sm: dm["readings"]["value"].sum())
+    return QueryExecutor(builder.data_model, builder.semantic_model, DataConnection(con), cache=ResultCache())
+
+
+QUERY = BIQuery(dimensions=["minute", "sensor"], metrics=["total"])
+
+
+def _extremes(table, sensor):
+    values = table.filter(pc.equal(table["sensor"], sensor))["total"]
+    return pc.min(values).as_py(), pc.max(values).as_py()
+
+
+def test_minmax_is_pushed_into_sql_and_keeps_extremes(executor):
+    downsampled = executor.execute_downsampled(QUERY, Downsample(x="minute", y="total", points=100))
+    full = executor.execute(QUERY)
+
+    assert downsampled.success and downsampled.source == "database"
+    assert full.source == "database"  # the downsampled result was not cached as the full one
+    for sensor in ("a", "b"):
+        rows = downsampled.result.filter(pc.equal(downsampled.result["sensor"], sensor))
+        assert 50 <= rows.num_rows <= 100
+        assert rows["minute"].to_pylist() == sorted(rows["minute"].to_pylist())
+        assert _extremes(downsampled.result, sensor) == _extremes(full.result, sensor)
+
+
+def test_minmax_queries_hold_back_prefetching_and_are_logged_apart(executor):
+    prefetcher, log = RecordingPrefetcher(), QueryLog()
+    executor = QueryExecutor(
+        executor.data_model, executor.semantic_model, executor.connection,
+        cache=ResultCache(), query_log=log, prefetcher=prefetcher,
+    )
+
+    executor.execute_downsampled(QUERY, Downsample(x="minute", y="total", points=100))
+    executor.execute(QUERY)
+
+    assert prefetcher.calls == ["started", ("finished", False), "started", ("finished", True)]
+    downsampled, full = log.entries
+    assert downsampled.fingerprint == f"minmax:{full.fingerprint}"
+
+
+def test_cached_results_are_downsampled_in_process(executor):
+    full = executor.execute(QUERY)
+    minmax = executor.execute_downsampled(QUERY, Downsample(x="minute", y="total", points=100))
+    lttb = executor.execute_downsampled(QUERY, Downsample(x="minute", y="total", points=100, method="lttb"))
+
+    assert minmax.source == lttb.source == "cache"
+    for sensor in ("a", "b"):
+        assert _extremes(minmax.result, sensor) == _extremes(full.result, sensor)
+        assert lttb.result.filter(pc.equal(lttb.result["sensor"], sensor)).num_rows == 100
+
+
+def test_lttb_keeps_endpoints_and_spikes():
+    x = np.arange(1000, dtype=float)
+    y = np.zeros(1000)
+    y[437] = 50.0
+
+    kept = lttb_indices(x, y, 20)
+
+    assert len(kept) == 20
+    assert kept[0] == 0 and kept[-1] == 999
+    assert 437 in kept
+    assert np.all(np.diff(kept) > 0)
+
+
+def test_minmax_indices_pick_bucket_extremes():
+    x = np.arange(8, dtype=float)
+    y = np.array([3.0, 1.0, 4.0, 1.5, 5.0, 9.0, 2.0, 6.0])
+
+    assert minmax_indices(x, y, 4).tolist() == [1, 2, 5, 6]
+    assert minmax_indices(x, y, 10).tolist() == list(range(8))
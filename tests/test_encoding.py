@@ -0,0 +1,80 @@
+import datetime
+import json
+import pyarrow as pa
+from src.datachain.execution import encode_columnar, encode_result, decode_columnar
+from src.datachain.execution.encoding import TRUNCATION_MARKER
+
+
+def test_columns_are_named_once_and_repeated_strings_dictionary_encoded():
+    table = pa.table({
+        "region": ["north", "south", "north", "north"],
+        "name": ["ann", "bob", "cid", "dan"],
+        "revenue": [10.123, 5.0, float("nan"), None],
+        "orders": [1, 2, 3, 4],
+    })
+
+    payload = encode_columnar(table)
+
+    assert payload["columns"] == ["region", "name", "revenue", "orders"]
+    assert payload["types"] == ["string", "string", "float", "integer"]
+    assert payload["data"][0] == {"values": ["north", "south"], "codes": [0, 1, 0, 0]}
+    assert payload["data"][1] == ["ann", "bob", "cid", "dan"]
+    assert payload["data"][2] == [10.12, 5.0, None, None]
+    assert "truncated" not in payload
+    assert decode_columnar(json.loads(encode_result(table)))["region"].to_pylist() == table["region"].to_pylist()
+
+
+def test_dates_and_day_truncated_timestamps_are_written_as_dates():
+    table = pa.table({
+        "month": pa.array([datetime.datetime(2024, 1, 1), datetime.datetime(2024, 2, 1)]),
+        "at": pa.array([datetime.datetime(2024, 1, 1, 8, 30), None]),
+        "day": pa.array([datetime.date(2024, 1, 5), datetime.date(2024, 1, 6)]),
+    })
+
+    payload = encode_columnar(table)
+
+    assert payload["types"] == ["date", "timestamp", "date"]
+    assert payload["data"] == [["2024-01-01", "2024-02-01"], ["2024-01-01T08:30:00", None], ["2024-01-05", "2024-01-06"]]
+
+
+def test_truncation_is_marked():
+    table = pa.table({"note": ["short", "x" * 100, "also short"]})
+
+    payload = encode_columnar(table, max_rows=2, max_string_length=10)
+
+    assert payload["rows"] == 2
+    assert payload["truncated"] == {"rows": 1, "strings": ["note"]}
+    assert payload["data"][0] == ["short", "x" * 9 + TRUNCATION_MARKER]
+
+
+def test_encoding_is_smaller_than_row_oriented_json():
+    table = pa.table({
+        "region": ["north", "south"] * 500,
+        "revenue": [i * 1.123456 for i in range(1000)],
+    })
+
+    assert len(encode_result(table)) < len(table.to_pandas().to_json(orient="records")) / 2
+
+
+def test_json_text_matches_the_encoded_payload():
+    table = pa.table({
+        "region": ["north", "south", None, "north"],
+        "month": pa.array([datetime.date(2024, 1, 1)] * 3 + [None]),
+        "revenue": [1.005, 2e20, None, -3.5],
+        "orders": pa.array([1, None, 3, 4], pa.int64()),
+        "active": [True, False, None, True],
+    })
+
+    assert json.loads(encode_result(table)) == encode_columnar(table)
+    assert json.loads(encode_result(table.slice(0, 0)))["data"] == [[], [], [], [], []]
+
+
+def test_infinite_floats_are_sent_as_null():
+    table = pa.table({"ratio": [1.5, float("inf"), float("-inf"), None]})
+
+    payload = encode_columnar(table)
+    text = encode_result(table)
+
+    assert payload["data"][0] == [1.5, None, None, None]
+    assert json.loads(text)["data"][0] == [1.5, None, None, None]
+    assert "inf" not in text.lower()
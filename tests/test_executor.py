@@ -0,0 +1,93 @@
+import pytest
+from src.datachain.biquery import BIQuery
+from src.datachain.execution import QueryExecutor, ResultCache
+from .conftest import build_model
+
+
+def test_execute_joins_and_aggregates(connection):
+    builder = build_model()
+    executor = QueryExecutor(builder.data_model, builder.semantic_model, connection)
+
+    result = executor.execute(BIQuery(dimensions=["region"], metrics=["revenue"], orderby=[("revenue", "DESC")]))
+    assert result.success, result.errors
+    assert result.result.to_pydict() == {"region": ["north", "south"], "revenue": [80, 5]}
+
+
+def test_derived_metric_computed_from_cached_bases(connection):
+    builder = build_model()
+    cache = ResultCache()
+    executor = QueryExecutor(builder.data_model, builder.semantic_model, connection, cache=cache)
+
+    base = executor.execute(BIQuery(dimensions=["region"], metrics=["revenue"], filters=["large_orders"]))
+    assert base.source == "database"
+
+    derived = executor.execute(BIQuery(dimensions=["region"], metrics=["margin_pct"], filters=["large_orders"], orderby=[("region", "asc")]))
+    assert derived.success and derived.source == "derived"
+    # Only the missing cost base hit the database
+    assert connection.queries == 2
+
+    uncached = QueryExecutor(builder.data_model, builder.semantic_model, connection).execute(
+        BIQuery(dimensions=["region"], metrics=["margin_pct"], filters=["large_orders"], orderby=[("region", "asc")])
+    )
+    assert derived.result.column_names == ["region", "margin_pct"]
+    assert derived.result["margin_pct"].to_pylist() == pytest.approx(uncached.result["margin_pct"].to_pylist())
+
+    again = executor.execute(BIQuery(dimensions=["region"], metrics=["margin_pct"], filters=["large_orders"], orderby=[("region", "asc")]))
+    assert again.source == "cache"
+    assert connection.queries == 3
+
+
+def test_roll_up_from_finer_grained_cache(connection):
+    builder = build_model()
+    executor = QueryExecutor(builder.data_model, builder.semantic_model, connection, cache=ResultCache())
+
+    fine = executor.execute(BIQuery(dimensions=["region", "month"], metrics=["revenue", "cost", "order_count"]))
+    assert fine.source == "database"
+
+    coarse = executor.execute(BIQuery(dimensions=["region"], metrics=["order_count", "margin_pct"], orderby=[("region", "asc")]))
+    assert coarse.success and coarse.source == "rollup"
+    assert connection.queries == 1
+
+    expected = QueryExecutor(builder.data_model, builder.semantic_model, connection).execute(
+        BIQuery(dimensions=["region"], metrics=["order_count", "margin_pct"], orderby=[("region", "asc")])
+    )
+    assert coarse.result["region"].to_pylist() == expected.result["region"].to_pylist()
+    assert coarse.result["order_count"].to_pylist() == expected.result["order_count"].to_pylist()
+    assert coarse.result["margin_pct"].to_pylist() == pytest.approx(expected.result["margin_pct"].to_pylist())
+
+    total = executor.execute(BIQuery(metrics=["revenue"]))
+    assert total.source == "rollup"
+    assert total.result["revenue"].to_pylist() == [85]
+
+
+def test_cache_hit_keeps_the_requested_column_order(connection):
+    builder = build_model()
+    executor = QueryExecutor(builder.data_model, builder.semantic_model, connection, cache=ResultCache())
+
+    first = executor.execute(BIQuery(dimensions=["region", "month"], metrics=["revenue", "cost"]))
+    again = executor.execute(BIQuery(dimensions=["month", "region"], metrics=["cost", "revenue"]))
+
+    assert again.source == "cache" and connection.queries == 1
+    assert first.result.column_names == ["region", "month", "revenue", "cost"]
+    assert again.result.column_names == ["month", "region", "cost", "revenue"]
+
+
+def test_division_by_zero_is_null_in_database_and_cache(connection):
+    builder = build_model()
+    revenue, cost = builder.semantic_model.get_metric("revenue"), builder.semantic_model.get_metric("cost")
+
+    @builder.metric(name="revenue_per_extra_cost", grain="orders", dependencies=[revenue, cost])
+    def revenue_per_extra_cost_metric(dm, sm):
+        # The south region has a cost of exactly 1
+        return sm.get_metric("revenue").resolve(dm, sm) / (sm.get_metric("cost").resolve(dm, sm) - 1)
+
+    query = BIQuery(dimensions=["region"], metrics=["revenue_per_extra_cost"], orderby=[("region", "asc")])
+    executor = QueryExecutor(builder.data_model, builder.semantic_model, connection, cache=ResultCache())
+    executor.execute(BIQuery(dimensions=["region"], metrics=["revenue", "cost"]))
+
+    derived = executor.execute(query)
+    in_database = QueryExecutor(builder.data_model, builder.semantic_model, connection).execute(query)
+
+    assert derived.source == "derived"
+    assert derived.result["revenue_per_extra_cost"].to_pylist() == [80 / 38, None]
+    assert in_database.result["revenue_per_extra_cost"].to_pylist() == [80 / 38, None]
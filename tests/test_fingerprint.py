@@ -0,0 +1,41 @@
+from src.datachain.biquery import BIQuery, canonical_key, fingerprint_biquery
+from .conftest import build_threshold_model
+
+
+def test_fingerprint_ignores_set_ordering_and_direction_case():
+    builder = build_threshold_model()
+    sm, dm = builder.semantic_model, builder.data_model
+
+    a = BIQuery(
+        dimensions=["user_name"],
+        metrics=["total_order_amount", "avg_order_amount"],
+        filters=["high_value_orders"],
+        orderby=[("total_order_amount", "DESC")],
+    )
+    b = BIQuery(
+        dimensions=["user_name"],
+        metrics=["avg_order_amount", "total_order_amount"],
+        filters=["high_value_orders", "high_value_orders"],
+        orderby=[("total_order_amount", "desc")],
+    )
+    assert canonical_key(a) == canonical_key(b)
+    assert fingerprint_biquery(a, sm, dm) == fingerprint_biquery(b, sm, dm)
+
+    reordered = BIQuery(
+        dimensions=["user_name"],
+        metrics=["total_order_amount", "avg_order_amount"],
+        filters=["high_value_orders"],
+        orderby=[("total_order_amount", "asc")],
+    )
+    assert fingerprint_biquery(a, sm, dm) != fingerprint_biquery(reordered, sm, dm)
+
+
+def test_fingerprint_changes_with_definitions():
+    query = BIQuery(metrics=["total_order_amount"], filters=["high_value_orders"])
+
+    original = build_threshold_model()
+    changed = build_threshold_model(threshold=500.0)
+
+    assert fingerprint_biquery(query, original.semantic_model, original.data_model) != fingerprint_biquery(
+        query, changed.semantic_model, changed.data_model
+    )
@@ -0,0 +1,81 @@
+import pytest
+from src.datachain.biquery import BIQuery
+from src.datachain.execution import QueryExecutor, HookRegistry, StageEvent, STAGES
+from .conftest import build_model
+
+
+def test_hooks_see_every_stage_in_order(connection):
+    builder = build_model()
+    hooks = HookRegistry()
+    events: list[tuple[str, str]] = []
+    for stage in STAGES:
+        hooks.before(stage, lambda event: events.append(("before", event.stage)))
+        hooks.after(stage, lambda event: events.append(("after", event.stage)))
+
+    executor = QueryExecutor(builder.data_model, builder.semantic_model, connection, hooks=hooks)
+    assert executor.execute(BIQuery(dimensions=["region"], metrics=["revenue"])).success
+
+    assert events == [(when, stage) for stage in STAGES for when in ("before", "after")]
+
+
+def test_after_hooks_receive_inputs_outputs_and_timing(connection):
+    builder = build_model()
+    hooks = HookRegistry()
+    seen: dict[str, StageEvent] = {}
+
+    @hooks.after("compile")
+    def record_compile(event):
+        seen["compile"] = event
+
+    @hooks.after("execute")
+    def record_execute(event):
+        seen["execute"] = event
+
+    executor = QueryExecutor(builder.data_model, builder.semantic_model, connection, hooks=hooks)
+    result = executor.execute(BIQuery(dimensions=["region"], metrics=["revenue"]))
+
+    assert "SELECT" in seen["compile"].output
+    assert seen["compile"].inputs["query"] is seen["execute"].inputs["query"]
+    assert seen["execute"].output is result.result
+    assert seen["execute"].duration_ms >= 0
+    assert seen["execute"].error is None
+
+
+def test_before_hooks_can_hand_state_to_after_hooks():
+    hooks = HookRegistry()
+    hooks.before("resolve_query", lambda event: event.state.update(calls=1))
+    durations = []
+    hooks.after("resolve_query", lambda event: durations.append((event.state["calls"], event.output)))
+
+    assert hooks.run("resolve_query", lambda biquery: biquery * 2, biquery=21) == 42
+    assert durations == [(1, 42)]
+
+
+def test_after_hooks_run_when_the_stage_raises():
+    hooks = HookRegistry()
+    errors = []
+    hooks.after("execute", lambda event: errors.append(event.error))
+
+    def fail(query):
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        hooks.run("execute", fail, query=None)
+    assert isinstance(errors[0], RuntimeError)
+
+
+def test_removed_hooks_are_no_longer_called():
+    hooks = HookRegistry()
+    calls = []
+    hook = hooks.before("execute", lambda event: calls.append(event.stage))
+    hooks.run("execute", lambda query: None, query=None)
+    hooks.remove("execute", hook)
+    hooks.run("execute", lambda query: None, query=None)
+
+    assert calls == ["execute"]
+    assert not hooks.observes("execute")
+
+
+def test_unknown_stage_is_rejected():
+    with pytest.raises(ValueError):
+        HookRegistry().before("optimize", lambda event: None)
@@ -1,4 +1,6 @@
 from src.datachain.data_model import ModelBuilder, DataModel, SemanticModel, Relationship, TableModel, ColumnType
+from src.datachain.data_connection import DataConnection
+import ibis
 import ibis.expr.types as ir
 
 
@@ -56,4 +58,63 @@ def test_model_builder():
     # Semantic definitions exits
     assert len(semantic_model._metrics) == 1
     assert len(semantic_model._dimensions) == 1
-    assert len(semantic_model._filters) == 1
\ No newline at end of file
+    assert len(semantic_model._filters) == 1
+
+class CountingConnection:
+    """Stands in for a warehouse connection and records which tables were introspected"""
+    name = "counting"
+
+    def __init__(self, schemas: dict[str, dict[str, str]]):
+        self.schemas = schemas
+        self.introspected: list[str] = []
+
+    def table(self, name: str) -> ir.Table:
+        self.introspected.append(name)
+        return ibis.table(self.schemas[name], name=name)
+
+
+def test_lazy_table_introspects_on_first_use():
+    conn = CountingConnection({"events": {"id": "int64", "kind": "string"}})
+    builder = ModelBuilder(connection=DataConnection(conn))
+
+    events = builder.lazy_table("events")
+    assert conn.introspected == []
+
+    assert events["kind"].type().is_string()
+    events.ibis()
+    assert conn.introspected == ["events"]
+    assert events.get_schema() == {"id": "int64", "kind": "string"}
+
+    # Bumping the version refetches the schema from the warehouse
+    conn.schemas["events"]["amount"] = "float64"
+    events.refresh()
+    assert "amount" in events.get_schema()
+    assert conn.introspected == ["events", "events"]
+
+
+def test_refresh_re_resolves_semantic_expressions():
+    conn = CountingConnection({"events": {"id": "int64", "amount": "decimal(10, 2)", "day": "date"}})
+    builder = ModelBuilder(connection=DataConnection(conn))
+    events = builder.lazy_table("events")
+    amount = builder.dimension(name="amount")(lambda dm: dm["events"]["amount"])
+
+    # Introspected columns keep the warehouse type
+    assert events.get_schema() == {"id": "int64", "amount": "decimal(10, 2)", "day": "date"}
+    before = amount.resolve(builder.data_model)
+    assert amount.resolve(builder.data_model) is before
+
+    conn.schemas["events"]["amount"] = "int64"
+    events.refresh()
+    after = amount.resolve(builder.data_model)
+    assert after.type().is_integer()
+    assert after.op().rel is events.ibis().op()
+
+
+def test_lazy_tables_keep_columns_without_a_column_type():
+    conn = CountingConnection({"events": {"id": "int64", "payload": "json", "at": "time", "tags": "array<string>"}})
+    builder = ModelBuilder(connection=DataConnection(conn))
+    events = builder.lazy_table("events")
+
+    assert events.get_schema() == {"id": "int64", "payload": "json", "at": "time", "tags": "array<string>"}
+    assert events["id"].type().is_integer()
+    assert events["tags"].type().is_array()
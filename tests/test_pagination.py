@@ -0,0 +1,73 @@
+import pyarrow as pa
+from src.datachain.biquery import BIQuery
+from src.datachain.execution import QueryExecutor, CursorStore
+from .conftest import build_model
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_pages_are_served_without_rerunning_the_query(connection):
+    builder = build_model()
+    executor = QueryExecutor(builder.data_model, builder.semantic_model, connection)
+    query = BIQuery(dimensions=["month", "region"], metrics=["revenue"], orderby=[("month", "asc"), ("region", "asc")])
+    expected = executor.execute(query).result
+    queries = connection.queries
+
+    first = executor.execute_paginated(query, page_size=2)
+    second = executor.fetch_page(first.cursor)
+
+    assert first.total_rows == 3 and first.offset == 0 and first.result.num_rows == 2
+    assert second.offset == 2 and second.cursor is None
+    assert pa.concat_tables([first.result, second.result]).equals(expected)
+    assert connection.queries == queries + 1
+
+
+def test_abandoned_cursors_expire():
+    clock = FakeClock()
+    store = CursorStore(ttl_seconds=10, clock=clock)
+    page = store.open(pa.table({"x": list(range(10))}), page_size=3)
+
+    clock.now = 5
+    page = store.fetch(page.cursor)
+    assert page.success and page.result["x"].to_pylist() == [3, 4, 5]
+
+    clock.now = 20
+    expired = store.fetch(page.cursor)
+    assert not expired.success
+    assert expired.errors[0].code == "cursor_expired"
+    assert len(store) == 0
+
+
+def test_handles_beyond_the_limit_are_evicted_and_bad_cursors_rejected():
+    store = CursorStore(max_handles=1)
+    first = store.open(pa.table({"x": [1, 2]}), page_size=1)
+    store.open(pa.table({"x": [3, 4]}), page_size=1)
+
+    assert store.fetch(first.cursor).errors[0].code == "cursor_expired"
+    assert store.fetch("not a cursor").errors[0].code == "invalid_cursor"
+
+
+def test_the_last_page_can_be_fetched_again():
+    store = CursorStore()
+    first = store.open(pa.table({"x": [1, 2, 3, 4, 5]}), page_size=2)
+    second = store.fetch(first.cursor)
+
+    last = store.fetch(second.cursor)
+    retried = store.fetch(second.cursor)
+
+    assert last.cursor is None and last.result["x"].to_pylist() == [5]
+    assert retried.success and retried.result.equals(last.result)
+
+
+def test_single_page_results_release_their_handle():
+    store = CursorStore()
+    page = store.open(pa.table({"x": [1, 2]}), page_size=5)
+
+    assert page.cursor is None and page.result.num_rows == 2
+    assert len(store) == 0
@@ -0,0 +1,101 @@
+import threading
+import ibis
+import pytest
+from src.datachain.biquery import BIQuery
+from src.datachain.data_connection import DataConnection
+from src.datachain.execution import QueryExecutor, ResultCache, Prefetcher, suggest_followups
+from src.datachain.execution import prefetch
+from .conftest import build_model
+
+
+def spare_connection(connection: DataConnection) -> DataConnection:
+    """A second connection to the same in-memory database"""
+    return DataConnection(ibis.duckdb.from_connection(connection.conn.con.cursor()))
+
+
+def build_drillable_model():
+    builder = build_model()
+    builder.dimension(name="user_name")(lambda dm: dm["users"]["name"])
+    return builder
+
+
+def test_suggests_time_dimension_and_drill_down():
+    builder = build_drillable_model()
+    query = BIQuery(dimensions=["region"], metrics=["revenue"], orderby=[("revenue", "desc")], limit=1)
+
+    followups = suggest_followups(
+        query, builder.semantic_model, builder.data_model, ["month"], {"region": ["user_name"]},
+    )
+
+    assert followups == [
+        BIQuery(dimensions=["region", "month"], metrics=["revenue"]),
+        BIQuery(dimensions=["region", "user_name"], metrics=["revenue"]),
+    ]
+    assert suggest_followups(
+        BIQuery(dimensions=["month"], metrics=["revenue"]), builder.semantic_model, builder.data_model, ["month"], {},
+    ) == []
+
+
+def test_follow_ups_are_served_from_the_cache(connection):
+    builder = build_drillable_model()
+    prefetcher = Prefetcher([spare_connection(connection)], drill_dimensions={"region": ["user_name"]})
+    executor = QueryExecutor(builder.data_model, builder.semantic_model, connection, cache=ResultCache(), prefetcher=prefetcher)
+
+    try:
+        executor.execute(BIQuery(dimensions=["region"], metrics=["revenue"]))
+        assert prefetcher.wait_idle(timeout=10)
+        assert prefetcher.stats.executed == 2
+        queries = connection.queries
+
+        by_month = executor.execute(BIQuery(dimensions=["region", "month"], metrics=["revenue"], orderby=[("month", "asc")]))
+        by_user = executor.execute(BIQuery(dimensions=["user_name", "region"], metrics=["revenue"]))
+    finally:
+        prefetcher.close()
+
+    assert by_month.success and by_month.source in ("cache", "derived")
+    assert by_user.success and by_user.source == "cache"
+    # Only the foreground query reached the counted connection
+    assert connection.queries == queries == 1
+
+
+def test_slow_or_large_queries_are_not_followed_up(connection):
+    builder = build_drillable_model()
+    prefetcher = Prefetcher([spare_connection(connection)], max_source_rows=1)
+    executor = QueryExecutor(builder.data_model, builder.semantic_model, connection, cache=ResultCache(), prefetcher=prefetcher)
+
+    try:
+        executor.execute(BIQuery(dimensions=["region"], metrics=["revenue"]))
+        assert prefetcher.wait_idle(timeout=10)
+    finally:
+        prefetcher.close()
+
+    assert prefetcher.stats.enqueued == 0
+    assert prefetcher.stats.skipped == 1
+
+
+def test_prefetching_needs_a_result_cache(connection):
+    builder = build_model()
+    with pytest.raises(ValueError):
+        QueryExecutor(builder.data_model, builder.semantic_model, connection, prefetcher=Prefetcher([spare_connection(connection)]))
+
+
+def test_follow_ups_are_suggested_on_the_workers(connection, monkeypatch):
+    builder = build_drillable_model()
+    threads = []
+
+    def recording_suggest(*args, **kwargs):
+        threads.append(threading.current_thread().name)
+        return suggest_followups(*args, **kwargs)
+
+    monkeypatch.setattr(prefetch, "suggest_followups", recording_suggest)
+    prefetcher = Prefetcher([spare_connection(connection)], drill_dimensions={"region": ["user_name"]})
+    executor = QueryExecutor(builder.data_model, builder.semantic_model, connection, cache=ResultCache(), prefetcher=prefetcher)
+
+    try:
+        executor.execute(BIQuery(dimensions=["region"], metrics=["revenue"]))
+        assert prefetcher.wait_idle(timeout=10)
+    finally:
+        prefetcher.close()
+
+    assert threads == ["datachain-prefetch-0"]
+    assert prefetcher.stats.executed == 2
@@ -0,0 +1,123 @@
+import ibis
+import pyarrow as pa
+from src.datachain.biquery import BIQuery
+from src.datachain.biquery.fingerprint import fingerprint_biquery
+from src.datachain.execution import QueryExecutor, ResultCache, QueryLog, Downsample
+from src.datachain.execution import executor as executor_module
+from src.datachain.execution.profile import profile_expression, profile_table, read_profile
+from .conftest import build_model, RecordingPrefetcher
+
+QUERY = BIQuery(dimensions=["region", "month"], metrics=["revenue", "order_count"])
+
+
+def test_profile_is_computed_in_one_query_without_rows(connection):
+    builder = build_model()
+    executor = QueryExecutor(builder.data_model, builder.semantic_model, connection)
+
+    result = executor.execute_profiled(QUERY, top_k=1)
+
+    assert result.success and result.source == "database"
+    assert connection.queries == 1
+    profile = result.profile
+    assert profile.row_count == 3
+    region = profile.columns["region"]
+    assert (region.min, region.max, region.null_count) == ("north", "south", 0)
+    assert region.top_values == [("north", 2)]
+    assert profile.columns["order_count"].total == 4
+    assert profile.columns["order_count"].mean == 4 / 3
+    assert profile.columns["revenue"].total == 85
+    assert profile.columns["month"].mean is None
+
+
+def test_cached_results_are_profiled_in_process(connection):
+    builder = build_model()
+    executor = QueryExecutor(builder.data_model, builder.semantic_model, connection, cache=ResultCache())
+    in_engine = executor.execute_profiled(QUERY)
+    executor.execute(QUERY)
+    queries = connection.queries
+
+    cached = executor.execute_profiled(QUERY)
+
+    assert cached.source == "cache"
+    assert connection.queries == queries
+    assert cached.profile.row_count == in_engine.profile.row_count
+    for name, column in in_engine.profile.columns.items():
+        other = cached.profile.columns[name]
+        assert (other.min, other.max, other.mean, other.total, other.top_values) == (
+            column.min, column.max, column.mean, column.total, column.top_values,
+        )
+
+
+def test_the_query_is_fingerprinted_once(connection, monkeypatch):
+    builder = build_model()
+    executor = QueryExecutor(builder.data_model, builder.semantic_model, connection, cache=ResultCache(), query_log=QueryLog())
+    executor.execute(QUERY)
+    calls = []
+
+    def counting_fingerprint(biquery, *args):
+        if biquery.dimensions == QUERY.dimensions:
+            calls.append(biquery)
+        return fingerprint_biquery(biquery, *args)
+
+    monkeypatch.setattr(executor_module, "fingerprint_biquery", counting_fingerprint)
+    executor.execute_profiled(QUERY)
+    executor.execute_downsampled(QUERY, Downsample(x="month", y="revenue", points=10))
+
+    assert len(calls) == 2
+
+
+def test_profile_queries_hold_back_prefetching_and_are_logged_apart(connection):
+    builder = build_model()
+    prefetcher, log = RecordingPrefetcher(), QueryLog()
+    executor = QueryExecutor(
+        builder.data_model, builder.semantic_model, connection, cache=ResultCache(), query_log=log, prefetcher=prefetcher,
+    )
+
+    executor.execute_profiled(QUERY)
+    executor.execute(QUERY)
+
+    assert prefetcher.calls == ["started", ("finished", False), "started", ("finished", True)]
+    profiled, plain = log.entries
+    assert profiled.fingerprint == f"profile:{plain.fingerprint}"
+    assert log.histogram(plain.fingerprint).count == 1
+
+
+def test_failed_queries_return_errors(connection):
+    builder = build_model()
+    executor = QueryExecutor(builder.data_model, builder.semantic_model, connection)
+
+    result = executor.execute_profiled(BIQuery(dimensions=["nope"], metrics=["revenue"]))
+
+    assert not result.success and result.profile is None
+    assert result.errors[0].code == "dimension_not_found"
+
+
+def test_profile_table_counts_nulls_and_skips_empty_columns():
+    table = pa.table({"name": ["a", None, "a"], "value": pa.array([None, None, None], pa.float64())})
+
+    profile = profile_table(table, ["value"])
+
+    assert profile.columns["name"].null_count == 1
+    assert profile.columns["name"].top_values[0] == ("a", 2)
+    assert profile.columns["value"].min is None and profile.columns["value"].total is None
+
+
+def test_profile_expression_matches_profile_table():
+    table = pa.table({
+        "region": ["north", "south", "north", None, "east"],
+        "city": ["a", "b", "c", "c", None],
+        "active": [True, None, False, True, True],
+        "amount": [1.0, 2.0, None, 4.0, 5.0],
+    })
+    expr = ibis.memtable(table)
+
+    in_engine = read_profile(ibis.duckdb.connect().to_pyarrow(profile_expression(expr, ["amount"], top_k=2)), top_k=2)
+    in_process = profile_table(table, ["amount"], top_k=2)
+
+    assert in_engine.row_count == in_process.row_count == 5
+    for name, column in in_process.columns.items():
+        other = in_engine.columns[name]
+        assert (other.dtype, other.null_count, other.min, other.max, other.mean, other.total, other.top_values) == (
+            column.dtype, column.null_count, column.min, column.max, column.mean, column.total, column.top_values,
+        )
+    assert in_engine.columns["active"].top_values == [(True, 3), (False, 1)]
@@ -0,0 +1,108 @@
+import json
+from src.datachain.biquery import BIQuery
+from src.datachain.execution import QueryExecutor, ResultCache, QueryLog, QueryLogEntry, LatencyHistogram
+from .conftest import build_model
+
+
+def test_records_fingerprint_stages_sql_hash_and_cache_use(connection):
+    builder = build_model()
+    log = QueryLog(hash_sql=True)
+    executor = QueryExecutor(builder.data_model, builder.semantic_model, connection, cache=ResultCache(), query_log=log)
+    query = BIQuery(dimensions=["region"], metrics=["revenue"])
+
+    executor.execute(query)
+    executor.execute(BIQuery(dimensions=["region", "region"], metrics=["revenue"]))
+
+    first, second = log.entries
+    assert first.fingerprint == second.fingerprint
+    assert set(first.stage_ms) == {
+        "validate_biquery", "resolve_query", "generate_logical_plan", "build_ibis_expression", "compile", "execute",
+    }
+    assert len(first.sql_hash) == 64
+    assert first.rows == 2 and not first.cache_hit and first.error_code is None
+    assert second.cache_hit and second.source == "cache" and second.sql_hash is None
+    assert log.histogram(first.fingerprint).count == 2
+
+
+def test_sql_is_only_compiled_separately_when_hashed(connection):
+    builder = build_model()
+    executor = QueryExecutor(builder.data_model, builder.semantic_model, connection, query_log=QueryLog())
+
+    executor.execute(BIQuery(dimensions=["region"], metrics=["revenue"]))
+
+    assert not executor.hooks.observes("compile")
+    assert executor.query_log.entries[0].sql_hash is None
+
+
+def test_only_whole_cached_results_are_cache_hits(connection):
+    builder = build_model()
+    log = QueryLog()
+    executor = QueryExecutor(builder.data_model, builder.semantic_model, connection, cache=ResultCache(), query_log=log)
+
+    executor.execute(BIQuery(dimensions=["region", "month"], metrics=["revenue"]))
+    executor.execute(BIQuery(dimensions=["region"], metrics=["revenue"]))
+
+    rolled_up = log.entries[1]
+    assert rolled_up.source == "rollup" and not rolled_up.cache_hit
+
+
+def test_finish_without_start_still_records():
+    log = QueryLog()
+
+    entry = log.finish(None, BIQuery(metrics=["revenue"]), error_code="exception")
+
+    assert entry.fingerprint == "" and entry.total_ms == 0.0
+    assert log.entries[0] is entry
+
+
+def test_records_error_codes(connection):
+    builder = build_model()
+    log = QueryLog()
+    executor = QueryExecutor(builder.data_model, builder.semantic_model, connection, query_log=log)
+
+    executor.execute(BIQuery(dimensions=["nope"], metrics=["revenue"]))
+
+    assert log.entries[0].error_code == "dimension_not_found"
+    assert log.entries[0].rows is None
+
+
+def test_slow_queries_are_written_as_json_lines(connection, tmp_path):
+    builder = build_model()
+    path = tmp_path / "slow.jsonl"
+    log = QueryLog(slow_query_ms=0, slow_query_path=str(path))
+    executor = QueryExecutor(builder.data_model, builder.semantic_model, connection, query_log=log)
+
+    executor.execute(BIQuery(dimensions=["region"], metrics=["revenue"]))
+    log.close()
+
+    (line,) = path.read_text().splitlines()
+    record = json.loads(line)
+    assert record["query"]["dimensions"] == ["region"]
+    assert record["rows"] == 2
+    assert record["total_ms"] >= 0
+
+
+def test_slow_query_file_rotates(tmp_path):
+    path = tmp_path / "slow.jsonl"
+    log = QueryLog(slow_query_ms=0, slow_query_path=str(path), max_bytes=200, backup_count=2)
+    for i in range(10):
+        log.record(QueryLogEntry(fingerprint=f"fp{i}", total_ms=5.0))
+    log.close()
+
+    assert (tmp_path / "slow.jsonl.1").exists()
+    assert not (tmp_path / "slow.jsonl.3").exists()
+
+
+def test_histogram_percentiles_and_summary_order():
+    histogram = LatencyHistogram()
+    for ms in [0.5] * 90 + [40.0] * 9 + [90_000.0]:
+        histogram.observe(ms)
+    assert histogram.percentile(50) == 1
+    assert histogram.percentile(95) == 50
+    assert histogram.percentile(100) == 90_000.0
+
+    log = QueryLog()
+    log.record(QueryLogEntry(fingerprint="cheap", total_ms=1.0))
+    log.record(QueryLogEntry(fingerprint="cheap", total_ms=1.0))
+    log.record(QueryLogEntry(fingerprint="costly", total_ms=500.0))
+    assert [row["fingerprint"] for row in log.summary()] == ["costly", "cheap"]
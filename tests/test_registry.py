@@ -0,0 +1,115 @@
+import ibis
+from src.datachain.biquery import BIQuery
+from src.datachain.data_connection import DataConnection
+from src.datachain.data_model import ModelRegistry, ModelChange
+from src.datachain.execution import QueryExecutor
+from .conftest import build_threshold_model
+
+
+def test_reload_without_changes_keeps_live_version():
+    registry = ModelRegistry(build_threshold_model())
+    live = registry.current
+
+    result = registry.reload(build_threshold_model())
+    assert result.success
+    assert result.changes == []
+    assert registry.current is live
+
+
+def test_reload_swaps_only_changed_objects():
+    registry = ModelRegistry(build_threshold_model())
+    old = registry.current
+    old_metric = old.semantic_model.get_metric("total_order_amount")
+    old_filter = old.semantic_model.get_filter("high_value_orders")
+
+    result = registry.reload(build_threshold_model(threshold=500.0, extra_table=True))
+    assert result.success
+    assert set(result.changes) == {
+        ModelChange("filter", "high_value_orders", "changed"),
+        ModelChange("table", "refunds", "added"),
+    }
+
+    new = registry.current
+    assert new.version == old.version + 1
+    # Unchanged objects are carried over with their caches and versions
+    assert new.semantic_model.get_metric("total_order_amount") is old_metric
+    assert new.data_model.get_table("orders") is old.data_model.get_table("orders")
+    # Changed objects get a bumped version while the old model stays intact for in-flight queries
+    assert new.semantic_model.get_filter("high_value_orders").version == old_filter.version + 1
+    assert old.semantic_model.get_filter("high_value_orders") is old_filter
+
+
+def test_reload_rejects_invalid_definitions():
+    registry = ModelRegistry(build_threshold_model())
+    live = registry.current
+
+    broken = build_threshold_model()
+
+    @broken.metric(name="refund_total", grain="refunds")
+    def refund_total_metric(dm, sm):
+        return dm["refunds"]["amount"].sum()
+
+    result = registry.reload(broken)
+    assert not result.success
+    assert result.errors[0].code == "invalid_definition"
+    assert registry.current is live
+
+
+def test_reload_leaves_the_builder_untouched():
+    registry = ModelRegistry(build_threshold_model())
+    builder = build_threshold_model(threshold=500.0)
+    new_filter = builder.semantic_model.get_filter("high_value_orders")
+
+    assert registry.reload(builder).success
+    assert new_filter.version == 0 and new_filter._cached_expr is None
+    live = registry.current.semantic_model.get_filter("high_value_orders")
+    assert live is not new_filter and live.version == 1
+
+
+def with_large_orders_relationship(builder):
+    """Adds a second users -> orders relationship next to user_orders_relationship"""
+    users, orders = builder.data_model.get_table("users"), builder.data_model.get_table("orders")
+
+    @builder.relationship(left=users, right=orders, how="inner")
+    def user_large_orders_relationship(left, right):
+        return (left["id"] == right["user_id"]) & (right["amount"] > 1000)
+
+    return builder
+
+
+def test_reload_tells_relationships_between_the_same_tables_apart():
+    registry = ModelRegistry(build_threshold_model())
+
+    result = registry.reload(with_large_orders_relationship(build_threshold_model()))
+    assert result.success
+    assert result.changes == [
+        ModelChange("relationship", "users -> orders (user_large_orders_relationship)", "added")
+    ]
+    two = registry.current
+
+    reordered = with_large_orders_relationship(build_threshold_model())
+    reordered.data_model._relationships.reverse()
+    result = registry.reload(reordered)
+    assert result.success and result.changes == []
+    assert registry.current is two
+
+    result = registry.reload(build_threshold_model())
+    assert result.success
+    assert result.changes == [
+        ModelChange("relationship", "users -> orders (user_large_orders_relationship)", "removed")
+    ]
+    kept = registry.current.data_model._relationships
+    assert len(kept) == 1 and kept[0] is two.data_model._relationships[0]
+
+
+def test_executor_serves_reloaded_models():
+    con = ibis.duckdb.connect()
+    con.raw_sql("CREATE TABLE users AS SELECT * FROM (VALUES (1, 'ann')) t(id, name)")
+    con.raw_sql("CREATE TABLE orders AS SELECT * FROM (VALUES (1, 1, 200.0), (2, 1, 600.0)) t(id, user_id, amount)")
+    registry = ModelRegistry(build_threshold_model())
+    executor = QueryExecutor.from_registry(registry, DataConnection(con))
+    query = BIQuery(metrics=["total_order_amount"], filters=["high_value_orders"])
+
+    assert executor.execute(query).result["total_order_amount"].to_pylist() == [800.0]
+    registry.reload(build_threshold_model(threshold=500.0))
+    assert executor.execute(query).result["total_order_amount"].to_pylist() == [600.0]
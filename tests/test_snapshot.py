@@ -0,0 +1,54 @@
+import pytest
+from src.datachain.data_model import compile_snapshot, write_snapshot, load_snapshot
+from src.datachain.errors import SnapshotError
+from .conftest import build_threshold_model
+
+
+def test_snapshot_round_trip(tmp_path):
+    builder = build_threshold_model()
+    snapshot = compile_snapshot(builder.data_model, builder.semantic_model, model_version="v1")
+    path = tmp_path / "model.snapshot"
+    write_snapshot(snapshot, path)
+
+    loaded = load_snapshot(path, expected_checksum=snapshot.checksum)
+    assert loaded.checksum == snapshot.checksum
+    assert loaded.model_version == "v1"
+    with pytest.raises(TypeError):
+        loaded.schemas["orders"]["amount"] = "string"
+
+    data_model, semantic_model = loaded.to_models()
+    assert data_model.get_table("orders").schema == builder.data_model.get_table("orders").schema
+    assert len(data_model.get_relationship_graph()["users"]) == 1
+
+    avg = semantic_model.get_metric("avg_order_amount")
+    assert avg.dependencies[0] is semantic_model.get_metric("total_order_amount")
+    assert avg.resolve(data_model, semantic_model).equals(
+        builder.semantic_model.get_metric("avg_order_amount")._cached_expr
+    )
+    assert semantic_model.get_filter("high_value_orders")._cached_expr is not None
+
+
+def test_snapshot_checksum_tracks_definitions():
+    first = build_threshold_model()
+    same = build_threshold_model()
+    changed = build_threshold_model(threshold=500.0)
+
+    checksum = compile_snapshot(first.data_model, first.semantic_model).checksum
+    assert compile_snapshot(same.data_model, same.semantic_model).checksum == checksum
+    assert compile_snapshot(changed.data_model, changed.semantic_model).checksum != checksum
+
+
+def test_stale_or_corrupt_snapshot_rejected(tmp_path):
+    builder = build_threshold_model()
+    snapshot = compile_snapshot(builder.data_model, builder.semantic_model)
+    path = tmp_path / "model.snapshot"
+    write_snapshot(snapshot, path)
+
+    with pytest.raises(SnapshotError):
+        load_snapshot(path, expected_checksum="not-the-deployed-model")
+    with pytest.raises(SnapshotError):
+        load_snapshot(path, expected_model_version="v2")
+
+    path.write_bytes(path.read_bytes()[:-10])
+    with pytest.raises(SnapshotError):
+        load_snapshot(path)